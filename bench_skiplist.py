@@ -0,0 +1,575 @@
+'''
+Benchmarks for Skiplist and MultiSet.
+
+Every target is bulk loaded with n keys from a distribution, then timed on
+a fixed number of single operations at that size, plus the set algebra
+against a second set of the same size. The targets are MultiSets in both
+storage modes and a plain Skiplist. A sorted list driven by bisect is
+always measured as the baseline, and sortedcontainers.SortedList too if
+it is installed. Results are printed as JSON.
+
+    python bench_skiplist.py --sizes 1000 100000 --distributions random
+    python bench_skiplist.py --sizes 1000000 --targets bisect --workers 8
+'''
+import argparse
+import bisect
+import concurrent.futures
+import json
+import random as r
+import sys
+import time
+from collections import Counter
+
+import multiset as m
+import sharded_multiset as sm
+import skiplist as sl
+
+try:
+    import sortedcontainers
+except ImportError:
+    sortedcontainers = None
+
+DISTRIBUTIONS = ('random', 'sorted', 'reverse', 'duplicate')
+OPERATIONS = ('build', 'insert', 'search', 'count', 'rank', 'len',
+              'remove', 'union', 'difference', 'intersection')
+
+
+def make_keys(distribution, n, rand):
+    '''
+    (str, int, random.Random) -> list of int
+    Returns n keys drawn from distribution.
+    '''
+    if distribution == 'random':
+        return [rand.randrange(n * 10) for i in range(n)]
+    elif distribution == 'sorted':
+        return list(range(n))
+    elif distribution == 'reverse':
+        return list(range(n, 0, -1))
+    elif distribution == 'duplicate':
+        # a handful of distinct keys, each repeated many times
+        return [rand.randrange(16) for i in range(n)]
+    raise ValueError('unknown distribution ' + repr(distribution))
+
+
+def make_probes(distribution, n, ops, rand):
+    '''
+    (str, int, int, random.Random) -> list of int
+    Returns ops keys to insert into a set of n keys from distribution. They
+    extend sorted and reversed sets at their ends, like appends would.
+    '''
+    if distribution == 'sorted':
+        return list(range(n, n + ops))
+    elif distribution == 'reverse':
+        return list(range(0, -ops, -1))
+    elif distribution == 'duplicate':
+        return [rand.randrange(16) for i in range(ops)]
+    return [rand.randrange(n * 10) for i in range(ops)]
+
+
+class MultiSetTarget():
+    '''
+    Runs the benchmark operations on a MultiSet.
+    '''
+
+    def __init__(self, compressed, seed):
+        '''
+        (MultiSetTarget, bool, int) -> NoneType
+        Initializes a target on MultiSets in the given storage mode, with
+        tower heights drawn from seed.
+        '''
+        self.compressed = compressed
+        self.seed = seed
+
+    def build(self, keys):
+        '''
+        (MultiSetTarget, list) -> MultiSet
+        Returns a MultiSet bulk loaded with keys.
+        '''
+        return m.MultiSet.from_iterable(
+            keys, self.compressed, sl.LevelGenerator(seed=self.seed))
+
+    def insert(self, s, key):
+        '''
+        (MultiSetTarget, MultiSet, obj) -> NoneType
+        inserts key into s.
+        '''
+        s.insert(key)
+
+    def search(self, s, key):
+        '''
+        (MultiSetTarget, MultiSet, obj) -> bool
+        Returns whether key is in s.
+        '''
+        return key in s
+
+    def count(self, s, key):
+        '''
+        (MultiSetTarget, MultiSet, obj) -> int
+        Returns the number of occurrences of key in s.
+        '''
+        return s.count(key)
+
+    def rank(self, s, key):
+        '''
+        (MultiSetTarget, MultiSet, obj) -> int
+        Returns the number of elements of s smaller than key.
+        '''
+        return s.rank(key)
+
+    def remove(self, s, key):
+        '''
+        (MultiSetTarget, MultiSet, obj) -> NoneType
+        Removes one occurrence of key from s.
+        '''
+        s.remove(key)
+
+    def union(self, s1, s2):
+        '''
+        (MultiSetTarget, MultiSet, MultiSet) -> MultiSet
+        Returns the union of s1 and s2.
+        '''
+        return s1 + s2
+
+    def difference(self, s1, s2):
+        '''
+        (MultiSetTarget, MultiSet, MultiSet) -> MultiSet
+        Returns s1 without the elements of s2.
+        '''
+        return s1 - s2
+
+    def intersection(self, s1, s2):
+        '''
+        (MultiSetTarget, MultiSet, MultiSet) -> MultiSet
+        Returns the elements s1 and s2 have in common.
+        '''
+        return s1 & s2
+
+
+class SkiplistTarget():
+    '''
+    Runs the benchmark operations on a plain Skiplist, without the MultiSet
+    around it. The set algebra merges the sorted values once and bulk loads
+    the result.
+    '''
+
+    def __init__(self, seed):
+        '''
+        (SkiplistTarget, int) -> NoneType
+        Initializes a target on Skiplists with tower heights drawn from
+        seed.
+        '''
+        self.seed = seed
+
+    def build(self, keys):
+        '''
+        (SkiplistTarget, list) -> sl.Skiplist
+        Returns a Skiplist bulk loaded with keys.
+        '''
+        return sl.Skiplist.from_sorted(keys, sl.LevelGenerator(seed=self.seed))
+
+    def insert(self, s, key):
+        '''
+        (SkiplistTarget, sl.Skiplist, obj) -> NoneType
+        inserts key into s.
+        '''
+        s.insert(key)
+
+    def search(self, s, key):
+        '''
+        (SkiplistTarget, sl.Skiplist, obj) -> bool
+        Returns whether key is in s.
+        '''
+        return s.search(key)
+
+    def count(self, s, key):
+        '''
+        (SkiplistTarget, sl.Skiplist, obj) -> int
+        Returns the number of occurrences of key in s.
+        '''
+        return s.count(key)
+
+    def rank(self, s, key):
+        '''
+        (SkiplistTarget, sl.Skiplist, obj) -> int
+        Returns the number of values of s smaller than key.
+        '''
+        return s.rank(key)
+
+    def remove(self, s, key):
+        '''
+        (SkiplistTarget, sl.Skiplist, obj) -> NoneType
+        Removes one occurrence of key from s.
+        '''
+        s.remove(key)
+
+    def _merge(self, s1, s2, keep_left, keep_both, keep_right):
+        '''
+        (SkiplistTarget, sl.Skiplist, sl.Skiplist, bool, bool, bool)
+        -> sl.Skiplist
+        Returns a new Skiplist of the values kept by merging s1 and s2, see
+        m.merge_sorted.
+        '''
+        return s1.from_sorted(m.merge_sorted(s1, s2, keep_left, keep_both,
+                                             keep_right),
+                              s1.level_generator)
+
+    def union(self, s1, s2):
+        '''
+        (SkiplistTarget, sl.Skiplist, sl.Skiplist) -> sl.Skiplist
+        Returns the union of s1 and s2.
+        '''
+        return self._merge(s1, s2, True, True, True)
+
+    def difference(self, s1, s2):
+        '''
+        (SkiplistTarget, sl.Skiplist, sl.Skiplist) -> sl.Skiplist
+        Returns s1 without the values of s2.
+        '''
+        return self._merge(s1, s2, True, False, False)
+
+    def intersection(self, s1, s2):
+        '''
+        (SkiplistTarget, sl.Skiplist, sl.Skiplist) -> sl.Skiplist
+        Returns the values s1 and s2 have in common.
+        '''
+        return self._merge(s1, s2, False, True, False)
+
+
+class BisectTarget():
+    '''
+    Runs the benchmark operations on a plain sorted list using bisect.
+    '''
+
+    def build(self, keys):
+        '''
+        (BisectTarget, list) -> list
+        Returns keys sorted.
+        '''
+        return sorted(keys)
+
+    def insert(self, s, key):
+        '''
+        (BisectTarget, list, obj) -> NoneType
+        inserts key into s, keeping it sorted.
+        '''
+        bisect.insort(s, key)
+
+    def search(self, s, key):
+        '''
+        (BisectTarget, list, obj) -> bool
+        Returns whether key is in s.
+        '''
+        i = bisect.bisect_left(s, key)
+        return i < len(s) and s[i] == key
+
+    def count(self, s, key):
+        '''
+        (BisectTarget, list, obj) -> int
+        Returns the number of occurrences of key in s.
+        '''
+        return bisect.bisect_right(s, key) - bisect.bisect_left(s, key)
+
+    def rank(self, s, key):
+        '''
+        (BisectTarget, list, obj) -> int
+        Returns the number of keys of s smaller than key.
+        '''
+        return bisect.bisect_left(s, key)
+
+    def remove(self, s, key):
+        '''
+        (BisectTarget, list, obj) -> NoneType
+        Removes one occurrence of key from s, if there is one.
+        '''
+        i = bisect.bisect_left(s, key)
+        if i < len(s) and s[i] == key:
+            del s[i]
+
+    def union(self, s1, s2):
+        '''
+        (BisectTarget, list, list) -> list
+        Returns the union of s1 and s2.
+        '''
+        return sorted(s1 + s2)
+
+    def difference(self, s1, s2):
+        '''
+        (BisectTarget, list, list) -> list
+        Returns s1 without the keys of s2.
+        '''
+        return sorted((Counter(s1) - Counter(s2)).elements())
+
+    def intersection(self, s1, s2):
+        '''
+        (BisectTarget, list, list) -> list
+        Returns the keys s1 and s2 have in common.
+        '''
+        return sorted((Counter(s1) & Counter(s2)).elements())
+
+
+class SortedListTarget(BisectTarget):
+    '''
+    Runs the benchmark operations on sortedcontainers.SortedList.
+    '''
+
+    def build(self, keys):
+        '''
+        (SortedListTarget, list) -> SortedList
+        Returns a SortedList holding keys.
+        '''
+        return sortedcontainers.SortedList(keys)
+
+    def insert(self, s, key):
+        '''
+        (SortedListTarget, SortedList, obj) -> NoneType
+        inserts key into s.
+        '''
+        s.add(key)
+
+    def search(self, s, key):
+        '''
+        (SortedListTarget, SortedList, obj) -> bool
+        Returns whether key is in s.
+        '''
+        return key in s
+
+    def count(self, s, key):
+        '''
+        (SortedListTarget, SortedList, obj) -> int
+        Returns the number of occurrences of key in s.
+        '''
+        return s.count(key)
+
+    def rank(self, s, key):
+        '''
+        (SortedListTarget, SortedList, obj) -> int
+        Returns the number of keys of s smaller than key.
+        '''
+        return s.bisect_left(key)
+
+    def remove(self, s, key):
+        '''
+        (SortedListTarget, SortedList, obj) -> NoneType
+        Removes one occurrence of key from s, if there is one.
+        '''
+        s.discard(key)
+
+    def union(self, s1, s2):
+        '''
+        (SortedListTarget, SortedList, SortedList) -> SortedList
+        Returns the union of s1 and s2.
+        '''
+        return s1 + s2
+
+    def difference(self, s1, s2):
+        '''
+        (SortedListTarget, SortedList, SortedList) -> SortedList
+        Returns s1 without the keys of s2.
+        '''
+        return sortedcontainers.SortedList(
+            (Counter(s1) - Counter(s2)).elements())
+
+    def intersection(self, s1, s2):
+        '''
+        (SortedListTarget, SortedList, SortedList) -> SortedList
+        Returns the keys s1 and s2 have in common.
+        '''
+        return sortedcontainers.SortedList(
+            (Counter(s1) & Counter(s2)).elements())
+
+
+def make_targets(names, seed):
+    '''
+    (list of str, int) -> dict of str to target
+    Returns the targets named in names, leaving out sortedlist if
+    sortedcontainers is not installed.
+    '''
+    targets = {}
+    for name in names:
+        if name == 'skiplist':
+            targets[name] = MultiSetTarget(False, seed)
+        elif name == 'plain':
+            targets[name] = SkiplistTarget(seed)
+        elif name == 'compressed':
+            targets[name] = MultiSetTarget(True, seed)
+        elif name == 'bisect':
+            targets[name] = BisectTarget()
+        elif name == 'sortedlist':
+            if sortedcontainers is not None:
+                targets[name] = SortedListTarget()
+        else:
+            raise ValueError('unknown target ' + repr(name))
+    return targets
+
+
+def _timed(func, *args):
+    '''
+    (function, optional arguments) -> (object, float)
+    Returns the result of func(*args) and the seconds it took.
+    '''
+    start = time.perf_counter()
+    ret = func(*args)
+    return ret, time.perf_counter() - start
+
+
+def _each(op, s, keys):
+    '''
+    (function, object, list) -> NoneType
+    Calls op(s, key) for every key.
+    '''
+    for key in keys:
+        op(s, key)
+
+
+def _lens(s, ops):
+    '''
+    (object, int) -> NoneType
+    Calls len(s) ops times.
+    '''
+    for i in range(ops):
+        len(s)
+
+
+def bench_one(target, distribution, n, ops, seed):
+    '''
+    (target, str, int, int, int) -> dict of str to float
+    Returns the seconds every operation took on target with n keys.
+    '''
+    rand = r.Random(seed)
+    keys = make_keys(distribution, n, rand)
+    other = make_keys(distribution, n, rand)
+    probes = make_probes(distribution, n, ops, rand)
+    times = {}
+    s, times['build'] = _timed(target.build, keys)
+    s2 = target.build(other)
+    times['insert'] = _timed(_each, target.insert, s, probes)[1]
+    times['search'] = _timed(_each, target.search, s, probes)[1]
+    times['count'] = _timed(_each, target.count, s, probes)[1]
+    times['rank'] = _timed(_each, target.rank, s, probes)[1]
+    times['len'] = _timed(_lens, s, ops)[1]
+    times['remove'] = _timed(_each, target.remove, s, probes)[1]
+    times['union'] = _timed(target.union, s, s2)[1]
+    times['difference'] = _timed(target.difference, s, s2)[1]
+    times['intersection'] = _timed(target.intersection, s, s2)[1]
+    return times
+
+
+def run(sizes, distributions, target_names, ops, seed):
+    '''
+    (list of int, list of str, list of str, int, int) -> list of dict
+    Runs every target at every size and distribution and returns one
+    record per operation.
+    '''
+    records = []
+    targets = make_targets(target_names, seed)
+    for n in sizes:
+        for distribution in distributions:
+            for name, target in targets.items():
+                times = bench_one(target, distribution, n, ops, seed)
+                for operation in OPERATIONS:
+                    # bulk operations touch every key once
+                    if operation in ('build', 'union', 'difference',
+                                     'intersection'):
+                        count = max(n, 1)
+                    else:
+                        count = ops
+                    records.append({
+                        'target': name,
+                        'operation': operation,
+                        'distribution': distribution,
+                        'size': n,
+                        'ops': count,
+                        'seconds': times[operation],
+                        'ns_per_op': times[operation] / count * 1e9})
+    return records
+
+
+def bench_sharded(n, workers, num_shards, seed):
+    '''
+    (int, int, int, int) -> list of dict
+    Returns one record per way of running the set algebra on two sets of n
+    random keys: on MultiSets, on ShardedMultiSets of num_shards shards in
+    this process, and on the same with the merges on a pool of workers
+    processes.
+    '''
+    rand = r.Random(seed)
+    keys1 = make_keys('random', n, rand)
+    keys2 = make_keys('random', n, rand)
+    operations = ('union', 'difference', 'intersection')
+    times = {}
+    s1 = m.MultiSet.from_iterable(keys1)
+    s2 = m.MultiSet.from_iterable(keys2)
+    target = MultiSetTarget(False, seed)
+    for operation in operations:
+        times['multiset', operation] = _timed(getattr(target, operation),
+                                              s1, s2)[1]
+    s1 = sm.ShardedMultiSet.from_iterable(keys1, num_shards, seed=seed)
+    s2 = sm.ShardedMultiSet.from_iterable(keys2, num_shards, seed=seed)
+    for operation in operations:
+        times['sharded', operation] = _timed(getattr(s1, operation), s2)[1]
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        # the bulk loads start the worker processes before the timing
+        s1 = sm.ShardedMultiSet.from_iterable(keys1, num_shards,
+                                              executor=pool, seed=seed)
+        s2 = sm.ShardedMultiSet.from_iterable(keys2, num_shards,
+                                              executor=pool, seed=seed)
+        for operation in operations:
+            times['sharded_pool', operation] = _timed(
+                getattr(s1, operation), s2, pool)[1]
+    records = []
+    for (name, operation), seconds in times.items():
+        records.append({
+            'target': name,
+            'operation': operation,
+            'distribution': 'random',
+            'size': n,
+            'ops': max(n, 1),
+            'seconds': seconds,
+            'ns_per_op': seconds / max(n, 1) * 1e9})
+    return records
+
+
+def main(argv=None):
+    '''
+    (list of str) -> NoneType
+    Parses the command line, runs the benchmarks and writes the records as
+    JSON to standard output or to --output.
+    '''
+    parser = argparse.ArgumentParser(
+        description='Benchmark Skiplist and MultiSet against baselines.')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000],
+                        help='set sizes to run, e.g. 1000 10000000')
+    parser.add_argument('--distributions', nargs='+',
+                        default=list(DISTRIBUTIONS), choices=DISTRIBUTIONS)
+    parser.add_argument('--targets', nargs='+',
+                        default=['skiplist', 'compressed', 'plain', 'bisect',
+                                 'sortedlist'],
+                        choices=['skiplist', 'compressed', 'plain', 'bisect',
+                                 'sortedlist'])
+    parser.add_argument('--ops', type=int, default=1000,
+                        help='single operations timed at every size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int,
+                        help='also run the set algebra sharded, on a pool '
+                        'of this many processes')
+    parser.add_argument('--shards', type=int, default=8,
+                        help='shards of the sharded runs')
+    parser.add_argument('--output', help='file to write the JSON to')
+    args = parser.parse_args(argv)
+    records = run(args.sizes, args.distributions, args.targets, args.ops,
+                  args.seed)
+    if args.workers:
+        for n in args.sizes:
+            records.extend(bench_sharded(n, args.workers, args.shards,
+                                         args.seed))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(records, f, indent=1)
+    else:
+        json.dump(records, sys.stdout, indent=1)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+import itertools
+import threading
+import skiplist as sl
+
+# the tallest tower a node can have, the head is always this tall
+MAX_LEVEL = 32
+
+
+class ConcurrentNode():
+    '''
+    A node in the concurrent skiplist ADT. Besides its value and one 'next'
+    reference per level, a node carries a lock taken by writers, a marked
+    flag set once it is logically removed and a fully_linked flag set once
+    it is reachable on every level of its tower. seq tells apart equal
+    values, so every node has a distinct (data, seq) key.
+    '''
+
+    __slots__ = ('data', 'seq', 'forward', 'lock', 'marked', 'fully_linked')
+
+    def __init__(self, value, seq, level):
+        '''
+        (ConcurrentNode, object, int, int) -> NoneType
+        Initializes an unlinked node with data and a tower of level + 1
+        empty 'next' references.
+        '''
+        self.data = value
+        self.seq = seq
+        self.forward = [None] * (level + 1)
+        self.lock = threading.Lock()
+        self.marked = False
+        self.fully_linked = False
+
+
+class ConcurrentSkiplist():
+    '''
+    A skiplist that can be shared between threads, following the lazy
+    skiplist of Herlihy, Lev, Luchangco and Shavit. search, count and
+    iteration never take a lock: they skip nodes that are marked or not yet
+    fully linked. insert and remove only lock the predecessors of the node
+    they change, level by level, validate them and retry on a conflict.
+    REQ: Data types are comparable
+    '''
+
+    def __init__(self, *args, levels=None):
+        '''
+        (ConcurrentSkiplist, optional arguments, sl.LevelGenerator)
+        -> NoneType
+        Initializes a concurrent skiplist holding args. Tower heights are
+        drawn by levels, or by a new LevelGenerator with p = 0.5 if levels
+        is None.
+        Raises ValueError if levels draws towers of MAX_LEVEL or more.
+        '''
+        if levels is None:
+            levels = sl.LevelGenerator(max_level=MAX_LEVEL - 1)
+        elif levels.max_level >= MAX_LEVEL:
+            raise ValueError('levels.max_level must be below ' +
+                             str(MAX_LEVEL))
+        self.level_generator = levels
+        self.tail_node = ConcurrentNode(None, -1, 0)
+        self.head_node = ConcurrentNode(None, -1, MAX_LEVEL - 1)
+        for level in range(MAX_LEVEL):
+            self.head_node.forward[level] = self.tail_node
+        self.head_node.fully_linked = True
+        self.tail_node.fully_linked = True
+        # next() on a count is atomic, so every node gets its own seq
+        self._seq = itertools.count()
+        # only guards the size counter, never held during a traversal
+        self._size_lock = threading.Lock()
+        self._size = 0
+        for i in args:
+            self.insert(i)
+
+    def get_num_node(self):
+        '''
+        (ConcurrentSkiplist) -> int
+        returns a randomized number drawn by the level generator. This will
+        represent the number of levels above the bottom one.
+        '''
+        return self.level_generator.next_level()
+
+    def _find(self, value, seq, preds, succs):
+        '''
+        (ConcurrentSkiplist, obj, int, list, list) -> NoneType
+        Fills preds and succs with the last node before the key (value, seq)
+        and the node after it on every level. Takes no locks.
+        '''
+        tail = self.tail_node
+        pred = self.head_node
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            current = pred.forward[level]
+            while current is not tail and (
+                    current.data < value or
+                    (current.data == value and current.seq < seq)):
+                pred = current
+                current = pred.forward[level]
+            preds[level] = pred
+            succs[level] = current
+
+    def _lower_bound(self, value):
+        '''
+        (ConcurrentSkiplist, obj) -> ConcurrentNode
+        Returns the first bottom row node whose data is not smaller than
+        value, or the tail node. Takes no locks.
+        '''
+        tail = self.tail_node
+        pred = self.head_node
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            current = pred.forward[level]
+            while current is not tail and current.data < value:
+                pred = current
+                current = pred.forward[level]
+        # pred.forward[0] may already hold a newer node, so return the one
+        # that was compared
+        return current
+
+    def _lock_preds(self, preds, succs, top, victim):
+        '''
+        (ConcurrentSkiplist, list, list, int, ConcurrentNode) -> list
+        Locks the distinct predecessors on levels 0 to top, bottom up, and
+        returns the locks taken. If the predecessors are no longer valid,
+        releases them again and returns None. A predecessor is valid when
+        it is not marked and still points to succs on its level, or to
+        victim if one is given.
+        '''
+        locked = []
+        prev_pred = None
+        for level in range(top + 1):
+            pred = preds[level]
+            if pred is not prev_pred:
+                pred.lock.acquire()
+                locked.append(pred.lock)
+                prev_pred = pred
+            if victim is None:
+                succ = succs[level]
+                valid = (not pred.marked and not succ.marked and
+                         pred.forward[level] is succ)
+            else:
+                valid = not pred.marked and pred.forward[level] is victim
+            if not valid:
+                for lock in locked:
+                    lock.release()
+                return None
+        return locked
+
+    def insert(self, value):
+        '''
+        (ConcurrentSkiplist, obj) -> NoneType
+        adds a node with value to the skiplist.
+        '''
+        top = self.get_num_node()
+        seq = next(self._seq)
+        preds = [None] * MAX_LEVEL
+        succs = [None] * MAX_LEVEL
+        while True:
+            self._find(value, seq, preds, succs)
+            locked = self._lock_preds(preds, succs, top, None)
+            if locked is None:
+                continue
+            node = ConcurrentNode(value, seq, top)
+            for level in range(top + 1):
+                node.forward[level] = succs[level]
+            # publish bottom up, readers only trust it once fully linked
+            for level in range(top + 1):
+                preds[level].forward[level] = node
+            node.fully_linked = True
+            for lock in locked:
+                lock.release()
+            break
+        with self._size_lock:
+            self._size += 1
+
+    def remove(self, value):
+        '''
+        (ConcurrentSkiplist, obj) -> NoneType
+        removes one row (instance) of the value from skiplist.
+        '''
+        victim = None
+        preds = [None] * MAX_LEVEL
+        succs = [None] * MAX_LEVEL
+        while victim is None:
+            # pick the first live node holding value and mark it
+            current = self._lower_bound(value)
+            while (current is not self.tail_node and
+                   current.data == value and
+                   (current.marked or not current.fully_linked)):
+                current = current.forward[0]
+            if current is self.tail_node or current.data != value:
+                return
+            current.lock.acquire()
+            if current.marked:
+                current.lock.release()
+            else:
+                current.marked = True
+                victim = current
+        top = len(victim.forward) - 1
+        while True:
+            self._find(victim.data, victim.seq, preds, succs)
+            locked = self._lock_preds(preds, succs, top, victim)
+            if locked is None:
+                continue
+            for level in range(top, -1, -1):
+                preds[level].forward[level] = victim.forward[level]
+            for lock in locked:
+                lock.release()
+            break
+        victim.lock.release()
+        with self._size_lock:
+            self._size -= 1
+
+    def search(self, value):
+        '''
+        (ConcurrentSkiplist, obj) -> bool
+        Returns true if value can be found in skiplist. Otherwise, False is
+        returned. Takes no locks.
+        '''
+        return self.count(value, 1) > 0
+
+    def count(self, value, limit=None):
+        '''
+        (ConcurrentSkiplist, obj, int) -> int
+        Returns the number of live nodes holding value, stopping early once
+        limit is reached. Takes no locks.
+        '''
+        count = 0
+        tail = self.tail_node
+        current = self._lower_bound(value)
+        while current is not tail and current.data == value:
+            if current.fully_linked and not current.marked:
+                count += 1
+                if count == limit:
+                    break
+            current = current.forward[0]
+        return count
+
+    def __iter__(self):
+        '''
+        (ConcurrentSkiplist) -> iterator
+        Yields every live value of the bottom row in ascending order. Takes
+        no locks, values inserted or removed during the walk may or may not
+        be seen.
+        '''
+        tail = self.tail_node
+        current = self.head_node.forward[0]
+        while current is not tail:
+            if current.fully_linked and not current.marked:
+                yield current.data
+            current = current.forward[0]
+
+    def __len__(self):
+        '''
+        (ConcurrentSkiplist) -> int
+        Returns the number of values in the skiplist.
+        uses len()
+        '''
+        return self._size
+
+    def is_empty(self):
+        '''
+        (ConcurrentSkiplist) -> bool
+        returns true or false depending on whether or not the skiplist
+        is empty.
+        '''
+        return self._size == 0
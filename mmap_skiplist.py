@@ -0,0 +1,420 @@
+import mmap
+import os
+import struct
+import skiplist as sl
+
+# file layout: a header, then fixed size records. Record 0 is the head node,
+# its tower is always full height. A 'next' index of 0 ends a level, since
+# nothing ever points back to the head.
+_MAGIC = b'MSKL'
+_VERSION = 1
+# magic, version, max_level, key format, capacity, used, free list, size,
+# height
+_HEADER = struct.Struct('<4sBB8sQQQQB')
+_HEADER_SIZE = 64
+_INDEX = struct.Struct('<Q')
+_COUNT = struct.Struct('<Q')
+# records added to the file at least every time it grows
+_MIN_GROWTH = 1024
+
+
+class MmapSkiplist():
+    '''
+    A skiplist kept in a memory mapped file, for multisets larger than
+    memory. Every distinct key is one fixed size record holding the key, its
+    number of occurrences, its level and one 'next' record index per level
+    up to max_level. Only the records a descent touches are paged in, and
+    opening an existing file reads nothing but its header.
+    Keys are packed with a struct format of a single field, such as 'q' for
+    integers, 'd' for floats or '16s' for fixed width byte strings, and are
+    compared as they read back from the file.
+    REQ: Data types fit key_format
+    '''
+
+    def __init__(self, path, key_format=None, max_level=None, levels=None):
+        '''
+        (MmapSkiplist, str, str, int, sl.LevelGenerator) -> NoneType
+        Opens the skiplist stored at path, or creates it there if the file
+        does not exist or is empty. key_format defaults to 'q' for a new
+        file and to the stored format for an existing one, and so does
+        max_level, to 24. Tower heights are drawn by levels, or by a new
+        LevelGenerator with p = 0.5 if levels is None.
+        Raises ValueError if path holds something else, or a skiplist with
+        a different key_format or max_level, or if levels draws towers
+        taller than max_level.
+        '''
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        try:
+            if exists:
+                self._open(key_format, max_level)
+            else:
+                self._create(key_format or 'q',
+                             24 if max_level is None else max_level)
+        except Exception:
+            self._file.close()
+            raise
+        if levels is None:
+            levels = sl.LevelGenerator(max_level=self.max_level)
+        elif levels.max_level > self.max_level:
+            self.close()
+            raise ValueError('levels.max_level must not exceed ' +
+                             str(self.max_level))
+        self.level_generator = levels
+
+    def _layout(self, key_format, max_level):
+        '''
+        (MmapSkiplist, str, int) -> NoneType
+        Sets up the record layout for keys packed with key_format and
+        towers of up to max_level + 1 levels.
+        Raises ValueError if key_format does not pack exactly one value.
+        '''
+        try:
+            self._key = struct.Struct('<' + key_format)
+            fields = len(self._key.unpack(bytes(self._key.size)))
+        except struct.error:
+            raise ValueError('bad key format ' + repr(key_format))
+        if fields != 1 or len(key_format) > 8:
+            raise ValueError('bad key format ' + repr(key_format))
+        if not 0 <= max_level < 256:
+            raise ValueError('max_level must be between 0 and 255')
+        self.key_format = key_format
+        self.max_level = max_level
+        # key, count, level, then one 'next' index per level
+        self._count_at = self._key.size
+        self._level_at = self._count_at + _COUNT.size
+        self._forward_at = self._level_at + 1
+        self._record_size = self._forward_at + _INDEX.size * (max_level + 1)
+
+    def _create(self, key_format, max_level):
+        '''
+        (MmapSkiplist, str, int) -> NoneType
+        Writes an empty skiplist holding only the head to the open file.
+        '''
+        self._layout(key_format, max_level)
+        self._capacity = _MIN_GROWTH
+        self._used = 1
+        self._free = 0
+        self._size = 0
+        self._height = 0
+        self._file.truncate(_HEADER_SIZE + self._capacity * self._record_size)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self._write_header()
+
+    def _open(self, key_format, max_level):
+        '''
+        (MmapSkiplist, str, int) -> NoneType
+        Maps the open file and reads its header.
+        '''
+        header = self._file.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError('not a skiplist file')
+        (magic, version, stored_level, stored_format, self._capacity,
+         self._used, self._free, self._size, self._height) = \
+            _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('not a skiplist file')
+        stored_format = stored_format.rstrip(b'\0').decode('ascii')
+        if key_format is not None and key_format != stored_format:
+            raise ValueError('file holds keys of format ' +
+                             repr(stored_format))
+        if max_level is not None and max_level != stored_level:
+            raise ValueError('file holds towers of max_level ' +
+                             str(stored_level))
+        self._layout(stored_format, stored_level)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+
+    def _write_header(self):
+        '''
+        (MmapSkiplist) -> NoneType
+        Stores the counters of the skiplist in the header of the file.
+        '''
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, self.max_level,
+                          self.key_format.encode('ascii'), self._capacity,
+                          self._used, self._free, self._size, self._height)
+
+    def _offset(self, index):
+        '''
+        (MmapSkiplist, int) -> int
+        Returns where record index starts in the file.
+        '''
+        return _HEADER_SIZE + index * self._record_size
+
+    def _data(self, index):
+        '''
+        (MmapSkiplist, int) -> obj
+        Returns the key of record index.
+        '''
+        return self._key.unpack_from(self._mm, self._offset(index))[0]
+
+    def _count(self, index):
+        '''
+        (MmapSkiplist, int) -> int
+        Returns the number of occurrences of the key of record index.
+        '''
+        return _COUNT.unpack_from(
+            self._mm, self._offset(index) + self._count_at)[0]
+
+    def _set_count(self, index, count):
+        '''
+        (MmapSkiplist, int, int) -> NoneType
+        Stores count as the number of occurrences of record index.
+        '''
+        _COUNT.pack_into(self._mm, self._offset(index) + self._count_at,
+                         count)
+
+    def _level(self, index):
+        '''
+        (MmapSkiplist, int) -> int
+        Returns the top level of the tower of record index.
+        '''
+        return self._mm[self._offset(index) + self._level_at]
+
+    def _forward(self, index, level):
+        '''
+        (MmapSkiplist, int, int) -> int
+        Returns the index of the next record after record index on level,
+        or 0 at the end of the level.
+        '''
+        return _INDEX.unpack_from(
+            self._mm,
+            self._offset(index) + self._forward_at + _INDEX.size * level)[0]
+
+    def _set_forward(self, index, level, next_index):
+        '''
+        (MmapSkiplist, int, int, int) -> NoneType
+        Points record index to record next_index on level.
+        '''
+        _INDEX.pack_into(
+            self._mm,
+            self._offset(index) + self._forward_at + _INDEX.size * level,
+            next_index)
+
+    def _normalize(self, value):
+        '''
+        (MmapSkiplist, obj) -> obj
+        Returns value as it reads back from the file, so that it compares
+        equal to a stored copy, e.g. short byte strings padded with zeros.
+        '''
+        return self._key.unpack(self._key.pack(value))[0]
+
+    def _allocate(self):
+        '''
+        (MmapSkiplist) -> int
+        Returns the index of an unused record, reusing removed ones first
+        and growing the file when every record is taken.
+        '''
+        if self._free:
+            index = self._free
+            self._free = self._forward(index, 0)
+            return index
+        if self._used == self._capacity:
+            self._capacity += max(self._capacity, _MIN_GROWTH)
+            self._mm.close()
+            self._file.truncate(_HEADER_SIZE +
+                                self._capacity * self._record_size)
+            self._mm = mmap.mmap(self._file.fileno(), 0)
+        index = self._used
+        self._used += 1
+        return index
+
+    def _find_predecessors(self, value):
+        '''
+        (MmapSkiplist, obj) -> list of int
+        Returns the last record before value on every level, bottom first.
+        '''
+        update = [0] * (self._height + 1)
+        current = 0
+        for level in range(self._height, -1, -1):
+            next_i = self._forward(current, level)
+            while next_i and self._data(next_i) < value:
+                current = next_i
+                next_i = self._forward(current, level)
+            update[level] = current
+        return update
+
+    def _lower_bound(self, value):
+        '''
+        (MmapSkiplist, obj) -> int
+        Returns the index of the first record whose key is not smaller than
+        value, or 0 if there is none.
+        '''
+        current = 0
+        for level in range(self._height, -1, -1):
+            next_i = self._forward(current, level)
+            while next_i and self._data(next_i) < value:
+                current = next_i
+                next_i = self._forward(current, level)
+        return self._forward(current, 0)
+
+    def insert(self, value):
+        '''
+        (MmapSkiplist, obj) -> NoneType
+        adds one occurrence of value to the skiplist.
+        '''
+        value = self._normalize(value)
+        update = self._find_predecessors(value)
+        next_i = self._forward(update[0], 0)
+        if next_i and self._data(next_i) == value:
+            self._set_count(next_i, self._count(next_i) + 1)
+        else:
+            num = self.level_generator.next_level()
+            index = self._allocate()
+            if num > self._height:
+                update.extend([0] * (num - self._height))
+                self._height = num
+            offset = self._offset(index)
+            self._key.pack_into(self._mm, offset, value)
+            self._set_count(index, 1)
+            self._mm[offset + self._level_at] = num
+            for level in range(num + 1):
+                self._set_forward(index, level,
+                                  self._forward(update[level], level))
+                self._set_forward(update[level], level, index)
+        self._size += 1
+        self._write_header()
+
+    def remove(self, value):
+        '''
+        (MmapSkiplist, obj) -> NoneType
+        removes one occurrence of value from the skiplist. If the value is
+        not present, do nothing.
+        '''
+        value = self._normalize(value)
+        update = self._find_predecessors(value)
+        target = self._forward(update[0], 0)
+        if not target or self._data(target) != value:
+            return
+        count = self._count(target)
+        if count > 1:
+            self._set_count(target, count - 1)
+        else:
+            for level in range(self._level(target) + 1):
+                self._set_forward(update[level], level,
+                                  self._forward(target, level))
+            # the removed record heads the free list
+            self._set_forward(target, 0, self._free)
+            self._free = target
+            while self._height and not self._forward(0, self._height):
+                self._height -= 1
+        self._size -= 1
+        self._write_header()
+
+    def search(self, value):
+        '''
+        (MmapSkiplist, obj) -> bool
+        Returns true if value can be found in skiplist. Otherwise, False is
+        returned.
+        '''
+        value = self._normalize(value)
+        current = 0
+        for level in range(self._height, -1, -1):
+            next_i = self._forward(current, level)
+            while next_i:
+                data = self._data(next_i)
+                if not data < value:
+                    # stop as soon as any level holds the value
+                    if data == value:
+                        return True
+                    break
+                current = next_i
+                next_i = self._forward(current, level)
+        return False
+
+    def __contains__(self, value):
+        '''
+        (MmapSkiplist, obj) -> bool
+        returns True if and only if value is in the skiplist.
+        uses in
+        '''
+        return self.search(value)
+
+    def count(self, value):
+        '''
+        (MmapSkiplist, obj) -> int
+        Returns the number of times value occurs in the skiplist.
+        '''
+        value = self._normalize(value)
+        index = self._lower_bound(value)
+        if not index or self._data(index) != value:
+            return 0
+        return self._count(index)
+
+    def runs(self):
+        '''
+        (MmapSkiplist) -> iterator
+        Yields (value, count) for every distinct value in ascending order.
+        REQ: the skiplist is not changed while the iterator is in use
+        '''
+        current = self._forward(0, 0)
+        while current:
+            yield self._data(current), self._count(current)
+            current = self._forward(current, 0)
+
+    def __iter__(self):
+        '''
+        (MmapSkiplist) -> iterator
+        Yields every occurrence of every value in ascending order.
+        REQ: the skiplist is not changed while the iterator is in use
+        '''
+        for value, count in self.runs():
+            for i in range(count):
+                yield value
+
+    def __len__(self):
+        '''
+        (MmapSkiplist) -> int
+        Returns the number of values in the skiplist, counting every
+        occurrence.
+        uses len()
+        '''
+        return self._size
+
+    def is_empty(self):
+        '''
+        (MmapSkiplist) -> bool
+        returns true or false depending on whether or not the skiplist
+        is empty.
+        '''
+        return self._size == 0
+
+    def get_height(self):
+        '''
+        (MmapSkiplist) -> int
+        returns the number of levels above the bottom one.
+        '''
+        return self._height
+
+    def flush(self):
+        '''
+        (MmapSkiplist) -> NoneType
+        Writes every change back to the file.
+        '''
+        self._mm.flush()
+
+    def close(self):
+        '''
+        (MmapSkiplist) -> NoneType
+        Flushes and closes the file. The skiplist cannot be used afterwards.
+        '''
+        if not self._mm.closed:
+            self._mm.flush()
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        '''
+        (MmapSkiplist) -> MmapSkiplist
+        Returns the skiplist itself to a with statement.
+        uses with
+        '''
+        return self
+
+    def __exit__(self, *exc):
+        '''
+        (MmapSkiplist, optional arguments) -> NoneType
+        Closes the file when the with statement ends, letting any exception
+        propagate.
+        uses with
+        '''
+        self.close()
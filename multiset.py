@@ -1,21 +1,221 @@
+import collections
+import io
+import itertools
+import pickle
+import struct
+import weakref
 import skiplist as sl
 
+# marks the end of an iterator in the merge walks below
+_END = object()
+
+# dump format: magic, version and flags, then chunks of runs, each a
+# little endian 32 bit length followed by a pickle of (values, counts),
+# and a length of 0 at the end
+_MAGIC = b'MSET'
+_VERSION = 1
+_HEADER = struct.Struct('<4sBB')
+_CHUNK_LEN = struct.Struct('<I')
+_CHUNK_SIZE = 65536
+# flag bits of the storage mode
+_COMPRESSED = 1
+_LAZY = 2
+_HASHED = 4
+
+
+def merge_sorted(elements1, elements2, keep_left, keep_both, keep_right):
+    '''
+    (iterable, iterable, bool, bool, bool) -> list
+    Walks two sorted iterables in order once, pairing up equal elements, and
+    returns a sorted list of the elements kept. keep_left and keep_right
+    keep unpaired elements of iterables 1 and 2, keep_both keeps both
+    elements of a pair (one of them if only one side is kept).
+    '''
+    ret = []
+    iter1 = iter(elements1)
+    iter2 = iter(elements2)
+    element1 = next(iter1, _END)
+    element2 = next(iter2, _END)
+    while element1 is not _END and element2 is not _END:
+        # equal elements are paired up and both sides move on
+        if element1 == element2:
+            if keep_both:
+                ret.append(element1)
+                if keep_left and keep_right:
+                    ret.append(element2)
+            element1 = next(iter1, _END)
+            element2 = next(iter2, _END)
+        elif element1 < element2:
+            if keep_left:
+                ret.append(element1)
+            element1 = next(iter1, _END)
+        else:
+            if keep_right:
+                ret.append(element2)
+            element2 = next(iter2, _END)
+    # whatever is left over on one of the sides has no pair
+    if keep_left and element1 is not _END:
+        ret.append(element1)
+        ret.extend(iter1)
+    if keep_right and element2 is not _END:
+        ret.append(element2)
+        ret.extend(iter2)
+    return ret
+
 
 class MultiSet():
     '''
     A multiset is a collection of arbitrary elements where elements can occur
     multiple times. Basically treated like a set. For example, multiset
     {1, 1, 2} is different from multiset {1, 2}
+    A compressed multiset keeps every distinct element once together with
+    its number of occurrences, which suits elements repeated many times.
+    A lazy multiset stores elements the same way but leaves removed ones
+    behind as tombstones for compact to clean up, which keeps remove cheap.
+    A hashed multiset also keeps the count of every element in a dict, so
+    in and count take O(1) time.
+    A snapshot is taken in O(1), but the first change made while one is
+    alive copies the whole skiplist, see snapshot.
     '''
 
-    def __init__(self, *args):
+    # elements shown by repr, None shows all of them
+    repr_max_items = 1000
+
+    def __init__(self, *args, compressed=False, levels=None, lazy=False,
+                 hashed=False):
+        '''
+        (Multiset, optional arguments, bool, sl.LevelGenerator, bool, bool)
+        -> None
+        initializes a multiset using the skiplist ADT. levels draws the
+        tower heights of the skiplist, see sl.LevelGenerator.
+        REQ: elements are hashable if hashed is True
+        '''
+        self.compressed = compressed
+        self.lazy = lazy
+        self.hashed = hashed
+        self.slist = self._slist_class()(*args, levels=levels)
+        # weak references to the snapshots reading the same skiplist
+        self._snapshots = []
+        # element -> count of every element present, if hashed
+        self._counts = collections.Counter(args) if hashed else None
+
+    def _slist_class(self):
         '''
-        (Multiset) -> None
-        initializes a multiset using the skiplist ADT.
+        (MultiSet) -> type
+        Returns the skiplist class used for the storage mode of the MultiSet.
         '''
-        self.slist = sl.Skiplist()
-        for i in args:
-            self.insert(i)
+        if self.lazy:
+            return sl.LazySkiplist
+        if self.compressed:
+            return sl.CountedSkiplist
+        return sl.Skiplist
+
+    @classmethod
+    def from_iterable(cls, iterable, compressed=False, levels=None,
+                      lazy=False, hashed=False):
+        '''
+        (type, iterable, bool, sl.LevelGenerator, bool, bool) -> MultiSet
+        Returns a new MultiSet holding every element of iterable. The
+        elements are sorted once and the skiplist is built in linear time.
+        '''
+        ret = cls(compressed=compressed, levels=levels, lazy=lazy,
+                  hashed=hashed)
+        ret._set_slist(ret._slist_class().from_sorted(
+            iterable, ret.slist.level_generator))
+        return ret
+
+    @classmethod
+    def from_runs(cls, values, counts, compressed=False, levels=None,
+                  lazy=False, hashed=False):
+        '''
+        (type, list, list of int, bool, sl.LevelGenerator, bool, bool)
+        -> MultiSet
+        Returns a new MultiSet holding counts[i] occurrences of values[i]
+        for every i. A compressed or lazy MultiSet is built in time linear
+        in the number of distinct elements.
+        REQ: values is sorted without repeats
+        REQ: every count is positive
+        '''
+        ret = cls(compressed=compressed, levels=levels, lazy=lazy,
+                  hashed=hashed)
+        ret._set_slist(ret._slist_class().from_runs(
+            values, counts, ret.slist.level_generator))
+        return ret
+
+    def dump(self, fileobj):
+        '''
+        (MultiSet, binary file) -> NoneType
+        Writes the elements of the MultiSet to fileobj in a compact binary
+        format read back by MultiSet.load. Only the distinct elements and
+        their counts are stored, in chunks, never the towers.
+        REQ: elements can be pickled
+        '''
+        flags = ((_COMPRESSED if self.compressed else 0) |
+                 (_LAZY if self.lazy else 0) |
+                 (_HASHED if self.hashed else 0))
+        fileobj.write(_HEADER.pack(_MAGIC, _VERSION, flags))
+        runs = self.slist.runs()
+        while True:
+            chunk = list(itertools.islice(runs, _CHUNK_SIZE))
+            if not chunk:
+                break
+            values = [value for value, count in chunk]
+            counts = [count for value, count in chunk]
+            blob = pickle.dumps((values, counts), pickle.HIGHEST_PROTOCOL)
+            fileobj.write(_CHUNK_LEN.pack(len(blob)))
+            fileobj.write(blob)
+        fileobj.write(_CHUNK_LEN.pack(0))
+
+    @classmethod
+    def load(cls, fileobj, levels=None):
+        '''
+        (type, binary file, sl.LevelGenerator) -> MultiSet
+        Returns the MultiSet written to fileobj by MultiSet.dump, in the same
+        storage mode. The skiplist is built straight from the stored runs,
+        see MultiSet.from_runs.
+        The chunks are pickles, and unpickling can run arbitrary code, so
+        never load a file from a source you do not trust.
+        Raises ValueError if fileobj does not hold a dumped MultiSet.
+        '''
+        header = fileobj.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError('not a dumped MultiSet')
+        magic, version, flags = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('not a dumped MultiSet')
+        values = []
+        counts = []
+        while True:
+            size = fileobj.read(_CHUNK_LEN.size)
+            if len(size) != _CHUNK_LEN.size:
+                raise ValueError('dumped MultiSet is truncated')
+            size = _CHUNK_LEN.unpack(size)[0]
+            if size == 0:
+                break
+            blob = fileobj.read(size)
+            if len(blob) != size:
+                raise ValueError('dumped MultiSet is truncated')
+            chunk_values, chunk_counts = pickle.loads(blob)
+            values.extend(chunk_values)
+            counts.extend(chunk_counts)
+        return cls.from_runs(values, counts, bool(flags & _COMPRESSED),
+                             levels, bool(flags & _LAZY),
+                             bool(flags & _HASHED))
+
+    def __reduce__(self):
+        '''
+        (MultiSet) -> tuple
+        Lets pickle and copy store the MultiSet as its distinct elements and
+        their counts rather than recursing through the nodes. The tower
+        heights are drawn again when it is rebuilt.
+        '''
+        values = []
+        counts = []
+        for value, count in self.slist.runs():
+            values.append(value)
+            counts.append(count)
+        return (self.from_runs, (values, counts, self.compressed, None,
+                                 self.lazy, self.hashed))
 
     def __contains__(self, element):
         '''
@@ -23,6 +223,8 @@ class MultiSet():
         returns True if and only if element belongs to the multiset object.
         uses in
         '''
+        if self._counts is not None:
+            return element in self._counts
         return self.slist.search(element)
 
     def count(self, element):
@@ -30,23 +232,79 @@ class MultiSet():
         (MultiSet, anything) -> int
         Returns the number of occurrences of element e in multiset s.
         '''
-        temp = self.slist.the_list()
-        count = 0
-        # check if self is empty
-        if len(self) == 0:
-            return count
-        while temp.data is not None:
-            if element == temp.data:
-                count += 1
-            temp = temp.next_node
-        return count
+        if self._counts is not None:
+            return self._counts.get(element, 0)
+        return self.slist.count(element)
+
+    def snapshot(self):
+        '''
+        (MultiSet) -> MultiSetSnapshot
+        Returns a read-only view of the MultiSet as it is now. Taking it
+        costs O(1), but a snapshot followed by any write costs one full
+        copy: the view shares the skiplist until the MultiSet is next
+        changed, and that change first copies the whole skiplist, in O(n)
+        time and memory, so the caller making it pays the copy. A compressed
+        or lazy MultiSet copies one node per distinct element. Changes that
+        find nothing to do, like removing a missing element, copy nothing,
+        and neither does any change once every snapshot is gone.
+        The nodes cannot be shared any finer: a node links back to its
+        predecessor and every link above the bottom row counts the nodes
+        it spans, so copying the path to a changed node would change the
+        nodes after it too, one after the other up to the tail.
+        '''
+        ret = MultiSetSnapshot.__new__(MultiSetSnapshot)
+        ret.compressed = self.compressed
+        ret.lazy = self.lazy
+        ret.hashed = self.hashed
+        ret.slist = self.slist
+        ret._snapshots = []
+        # the counts keep changing with the MultiSet, the view searches
+        ret._counts = None
+        self._snapshots = [ref for ref in self._snapshots
+                           if ref() is not None]
+        self._snapshots.append(weakref.ref(ret))
+        return ret
+
+    def _own(self):
+        '''
+        (MultiSet) -> NoneType
+        Gives the MultiSet a skiplist of its own before it is changed in
+        place, if a snapshot still reads the current one.
+        '''
+        if self._shared():
+            self.slist = self.slist.copy()
+            self._snapshots = []
+
+    def _shared(self):
+        '''
+        (MultiSet) -> bool
+        Returns True if a snapshot still reads the skiplist.
+        '''
+        return any(ref() is not None for ref in self._snapshots)
+
+    def _set_slist(self, slist):
+        '''
+        (MultiSet, sl.Skiplist) -> NoneType
+        Replaces the skiplist of the MultiSet by a new one no snapshot
+        reads, counting its elements again if the MultiSet is hashed.
+        '''
+        self.slist = slist
+        self._snapshots = []
+        if self._counts is not None:
+            self._counts = collections.Counter(dict(slist.runs()))
 
     def insert(self, element):
         '''
         (MultiSet, anything) -> NoneType
         inserts element into multiset.
         '''
+        self._own()
+        if self._counts is not None:
+            # an unhashable element fails before anything changes
+            hash(element)
         self.slist.insert(element)
+        if self._counts is not None:
+            self._counts[element] += 1
 
     def remove(self, element):
         '''
@@ -54,14 +312,106 @@ class MultiSet():
         Removes one occurence of an element from the MultiSet.
         If the element is not present, do nothing.
         '''
+        counts = self._counts
+        if counts is not None:
+            # a missing element needs no descent at all
+            count = counts.get(element, 0)
+            if not count:
+                return
+            if count == 1:
+                del counts[element]
+            else:
+                counts[element] = count - 1
+        elif self._shared() and not self.slist.search(element):
+            # a missing element is not worth a copy
+            return
+        self._own()
         self.slist.remove(element)
 
+    def insert_many(self, elements):
+        '''
+        (MultiSet, iterable) -> NoneType
+        inserts every one of elements into the multiset. A batch that is
+        small next to the multiset is swept in from left to right, a large
+        one is merged in and the skiplist rebuilt.
+        '''
+        elements = sorted(elements)
+        if self._is_small(elements):
+            self._own()
+            counts = self._counts
+            if counts is not None:
+                for element in elements:
+                    hash(element)
+            try:
+                self.slist.insert_many(elements)
+            except Exception:
+                # the sweep may have inserted some of them
+                if counts is not None:
+                    self._counts = collections.Counter(
+                        dict(self.slist.runs()))
+                raise
+            if counts is not None:
+                counts.update(elements)
+        else:
+            self._set_slist(self.slist.from_sorted(
+                self._merge(elements, True, True, True),
+                self.slist.level_generator))
+
+    def remove_many(self, elements):
+        '''
+        (MultiSet, iterable) -> NoneType
+        Removes one occurence of every one of elements from the multiset,
+        like insert_many. Elements that are not present are skipped.
+        '''
+        elements = sorted(elements)
+        if self._is_small(elements):
+            counts = self._counts
+            if counts is not None:
+                # only the elements present reach the skiplist
+                present = []
+                for element in elements:
+                    count = counts.get(element, 0)
+                    if count:
+                        present.append(element)
+                        if count == 1:
+                            del counts[element]
+                        else:
+                            counts[element] = count - 1
+                elements = present
+            self._own()
+            self.slist.remove_many(elements)
+        else:
+            self._set_slist(self.slist.from_sorted(
+                self._merge(elements, True, False, False),
+                self.slist.level_generator))
+
+    def contains_many(self, elements):
+        '''
+        (MultiSet, iterable) -> list of bool
+        Returns for every one of elements, in the order given, whether it
+        belongs to the multiset, looking them up in one sweep.
+        '''
+        if self._counts is not None:
+            counts = self._counts
+            return [element in counts for element in elements]
+        return self.slist.contains_many(elements)
+
+    def compact(self, max_steps=None):
+        '''
+        (MultiSet, int) -> NoneType
+        Cleans up to max_steps removed elements, or all of them if max_steps
+        is None, out of a lazy MultiSet. Does nothing otherwise.
+        '''
+        if self.lazy:
+            self.slist.compact(max_steps)
+
     def clear(self):
         '''
         (MultiSet) -> NoneType
         Removes all elements from the MultiSet.
         '''
-        self.slist = sl.Skiplist()
+        self._set_slist(self._slist_class()(
+            levels=self.slist.level_generator))
 
     def __len__(self):
         '''
@@ -69,37 +419,101 @@ class MultiSet():
         Returns the number of elements in the MultiSet.
         uses len()
         '''
-        if self.slist.is_empty():
-            return 0
-        else:
-            temp = self.slist.the_list()
-            count = 0
-            while temp.data is not None:
-                count += 1
-                temp = temp.next_node
-            return count
+        return len(self.slist)
+
+    def rank(self, element):
+        '''
+        (MultiSet, anything) -> int
+        Returns the number of elements in the MultiSet smaller than element.
+        '''
+        return self.slist.rank(element)
+
+    def count_range(self, lo, hi):
+        '''
+        (MultiSet, anything, anything) -> int
+        Returns the number of elements e in the MultiSet with lo <= e <= hi.
+        '''
+        return self.slist.count_range(lo, hi)
+
+    def __getitem__(self, index):
+        '''
+        (MultiSet, int) -> anything
+        Returns the element at position index in sorted order. Negative
+        indices count from the end.
+        uses []
+        '''
+        return self.slist[index]
+
+    def __iter__(self):
+        '''
+        (MultiSet) -> iterator
+        Yields every occurrence of every element in ascending order.
+        uses iter()
+        '''
+        return iter(self.slist)
+
+    def __reversed__(self):
+        '''
+        (MultiSet) -> iterator
+        Yields every occurrence of every element in descending order.
+        uses reversed()
+        '''
+        return reversed(self.slist)
+
+    def irange(self, lo=None, hi=None, inclusive=(True, True),
+               reverse=False):
+        '''
+        (MultiSet, anything, anything, (bool, bool), bool) -> iterator
+        Yields the elements between lo and hi in ascending order, or in
+        descending order if reverse is True. inclusive says whether lo and
+        hi themselves are included, and a bound of None is left open.
+        REQ: the MultiSet is not changed while the iterator is in use
+        '''
+        return self.slist.irange(lo, hi, inclusive, reverse)
+
+    def render(self, stream, max_items=None, levels=False):
+        '''
+        (MultiSet, text file, int, bool) -> NoneType
+        Writes the representation of the MultiSet to stream a chunk at a
+        time. Only the first max_items elements are written, followed by the
+        number left out. If levels is True, writes the levels of the
+        skiplist instead, see sl.Skiplist.render.
+        '''
+        if levels:
+            self.slist.render(stream, max_items, True)
+            return
+        stream.write("MultiSet([")
+        sl.write_items(stream, self, len(self), max_items)
+        stream.write("])")
 
     def __repr__(self):
         '''
         (MultiSet) -> str
         returns a string representation of the MultiSet, where each element
-        printed is one occurrence of one element in the MultiSet.
+        printed is one occurrence of one element in the MultiSet. Only the
+        first repr_max_items elements are shown, so logging a large
+        MultiSet stays cheap.
         uses repr()
         '''
-        # get the bottom of the list
-        temp = self.slist.the_list()
-        # if skiplist isn't empty
-        if not self.slist.is_empty():
-            ret = "MultiSet([" + str(temp.data)
-            temp = temp.next_node
-            # go throught every node and add the data
-            while temp.data is not None:
-                ret += ", " + str(temp.data)
-                temp = temp.next_node
-            ret += "])"
-        else:
-            ret = "MultiSet([])"
-        return ret
+        ret = io.StringIO()
+        self.render(ret, self.repr_max_items)
+        return ret.getvalue()
+
+    def _merge(self, set2, keep_left, keep_both, keep_right):
+        '''
+        (MultiSet, MultiSet or sorted list, bool, bool, bool) -> list
+        Walks both MultiSets in order once, see merge_sorted.
+        '''
+        return merge_sorted(self, set2, keep_left, keep_both, keep_right)
+
+    def _new(self, sorted_elements):
+        '''
+        (MultiSet, list) -> MultiSet
+        Returns a new MultiSet in the same storage mode as MultiSet 1
+        holding sorted_elements.
+        '''
+        return self.from_iterable(sorted_elements, self.compressed,
+                                  lazy=self.lazy, hashed=self.hashed)
 
     def __eq__(self, set2):
         '''
@@ -110,39 +524,37 @@ class MultiSet():
         Uses ==
         REQ: set2 is a Multiset
         '''
-        temp1 = self.slist.the_list()
-        temp2 = set2.slist.the_list()
-        # if both empty then return true
-        if self.slist.is_empty() and set2.slist.is_empty():
-            is_equal = True
-        # elif only one is empty return false
-        elif ((self.slist.is_empty() and not set2.slist.is_empty()) or
-              (set2.slist.is_empty() and not set1.slist.is_empty())):
-            is_equal = False
-        else:
-            is_equal = True
-            while temp1 is not None and temp2 is not None and is_equal:
-                if temp1.data == temp2.data:
-                    is_equal = True
-                else:
-                    is_equal = False
-                temp1 = temp1.next_node
-                temp2 = temp2.next_node
-        return is_equal
-
-    def __le__(self, set2):  # error, try (2, 2, 2) and (1, 2, 3)
+        if len(self) != len(set2):
+            return False
+        # both rows have the same length, so they end together
+        for element1, element2 in zip(self, set2):
+            if element1 != element2:
+                return False
+        return True
+
+    def __le__(self, set2):
         '''
         (MultiSet, MultiSet) -> bool
         Returns True if and only if MultiSet 1 is a subset of MultiSet 2 or
         is equal to MultiSet 2.
         Uses <=
         '''
-        temp1 = self.slist.the_list()
-        temp2 = set2.slist.the_list()
         if len(self) > len(set2):
             return False
-        else:
-            return self.__sub__(set2).slist.is_empty()
+        iter1 = iter(self)
+        iter2 = iter(set2)
+        element1 = next(iter1, _END)
+        element2 = next(iter2, _END)
+        while element1 is not _END and element2 is not _END:
+            if element1 == element2:
+                element1 = next(iter1, _END)
+                element2 = next(iter2, _END)
+            # an element of MultiSet 1 that MultiSet 2 skipped over
+            elif element1 < element2:
+                return False
+            else:
+                element2 = next(iter2, _END)
+        return element1 is _END
 
     def __sub__(self, set2):
         '''
@@ -152,15 +564,16 @@ class MultiSet():
         difference of MultiSets 1 and 2.
         Uses -
         '''
-        temp1 = self
-        bot2 = set2.slist.the_list()
-        # check if set2 is empty
-        if len(set2) == 0:
-            return temp1
-        while bot2.data is not None:
-            temp1.remove(bot2.data)
-            bot2 = bot2.next_node
-        return temp1
+        return self._new(self._merge(set2, True, False, False))
+
+    def _is_small(self, set2):
+        '''
+        (MultiSet, MultiSet or list) -> bool
+        Returns True if sweeping MultiSet 2 into MultiSet 1 with a finger is
+        cheaper than merging both bottom rows and rebuilding MultiSet 1.
+        '''
+        # a swept element costs about as much as two rebuilt ones
+        return 2 * len(set2) < len(self)
 
     def __isub__(self, set2):
         '''
@@ -169,13 +582,7 @@ class MultiSet():
         removed from MultiSet 1.
         Uses -=
         '''
-        bot2 = set2.slist.the_list()
-        # check if set2 is empty
-        if len(set2) == 0:
-            return self
-        while bot2.data is not None:
-            self.remove(bot2.data)
-            bot2 = bot2.next_node
+        self.remove_many(set2)
         return self
 
     def __add__(self, set2):
@@ -184,15 +591,7 @@ class MultiSet():
         Returns a new MultiSet that is the union of MultiSets 1 and 2.
         Uses +
         '''
-        temp1 = self
-        bot2 = set2.slist.the_list()
-        # check if set2 is empty
-        if len(set2) == 0:
-            return temp1
-        while bot2.data is not None:
-            temp1.insert(bot2.data)
-            bot2 = bot2.next_node
-        return temp1
+        return self._new(self._merge(set2, True, True, True))
 
     def __iadd__(self, set2):
         '''
@@ -201,13 +600,7 @@ class MultiSet():
         MultiSet 1.
         Uses +=
         '''
-        bot2 = set2.slist.the_list()
-        # check if set2 is empty
-        if len(set2) == 0:
-            return temp1
-        while bot2.data is not None:
-            self.insert(bot2.data)
-            bot2 = bot2.next_node
+        self.insert_many(set2)
         return self
 
     def __and__(self, set2):
@@ -218,28 +611,7 @@ class MultiSet():
         previous two.
         Uses &
         '''
-        # initialize stuff
-        temp1 = self.slist.the_list()
-        temp2 = set2.slist.the_list()
-        self._temp_set = MultiSet()
-        # check if both lists are empty
-        if len(set2) == 0 or len(self) == 0:
-            return self._temp_set
-        # go through lists
-        while (temp1.data is not None) and (temp2.data is not None):
-            # if nodes' datas are equal add them into new list
-            # move to next nodes
-            if temp1.data == temp2.data:
-                self._temp_set.insert(temp1.data)
-                temp1 = temp1.next_node
-                temp2 = temp2.next_node
-            # If temp1's data is smaller, move on to temp1's next node
-            elif temp1.data < temp2.data:
-                temp1 = temp1.next_node
-            # else temp1's data is bigger, move to temp2's next node
-            else:
-                temp2 = temp2.next_node
-        return self._temp_set
+        return self._new(self._merge(set2, False, True, False))
 
     def __iand__(self, set2):
         '''
@@ -248,26 +620,9 @@ class MultiSet():
         MultiSet 1 and 2.
         Uses &=
         '''
-        temp1 = self.slist.the_list()
-        temp2 = set2.slist.the_list()
-        # check if both lists are empty
-        if len(set2) == 0 or len(self) == 0:
-            return self
-        self.clear()
-        # go through lists
-        while (temp1.data is not None) and (temp2.data is not None):
-            # if nodes' datas are equal add them into new list
-            # move to next nodes
-            if temp1.data == temp2.data:
-                self.insert(temp1.data)
-                temp1 = temp1.next_node
-                temp2 = temp2.next_node
-            # If temp1's data is smaller, move on to temp1's next node
-            elif temp1.data < temp2.data:
-                temp1 = temp1.next_node
-            # else temp1's data is bigger, move to temp2's next node
-            else:
-                temp2 = temp2.next_node
+        self._set_slist(self.slist.from_sorted(
+            self._merge(set2, False, True, False),
+            self.slist.level_generator))
         return self
 
     def isdisjoint(self, set2):
@@ -276,4 +631,51 @@ class MultiSet():
         Returns True if and only if MultiSet 1 has no element in common with
         MultiSet 2.
         '''
-        return self.__and__(set2).slist.is_empty()
+        iter1 = iter(self)
+        iter2 = iter(set2)
+        element1 = next(iter1, _END)
+        element2 = next(iter2, _END)
+        while element1 is not _END and element2 is not _END:
+            if element1 == element2:
+                return False
+            elif element1 < element2:
+                element1 = next(iter1, _END)
+            else:
+                element2 = next(iter2, _END)
+        return True
+
+
+class MultiSetSnapshot(MultiSet):
+    '''
+    A read-only view of a MultiSet at the time MultiSet.snapshot was called.
+    It answers every query of a MultiSet, and its set algebra returns new
+    MultiSets, but it cannot be changed. Its MultiSet pays one full copy of
+    the skiplist on the first change while the view is alive.
+    '''
+
+    def _read_only(self, *args):
+        '''
+        (MultiSetSnapshot, optional arguments) -> NoneType
+        Raises TypeError, a snapshot cannot be changed.
+        '''
+        raise TypeError('MultiSet snapshots are read-only')
+
+    insert = remove = insert_many = remove_many = clear = _read_only
+    compact = _read_only
+    __iadd__ = __isub__ = __iand__ = _read_only
+
+    def snapshot(self):
+        '''
+        (MultiSetSnapshot) -> MultiSetSnapshot
+        Returns the snapshot itself, it never changes.
+        '''
+        return self
+
+    def _new(self, sorted_elements):
+        '''
+        (MultiSetSnapshot, list) -> MultiSet
+        Returns a new MultiSet in the same storage mode holding
+        sorted_elements.
+        '''
+        return MultiSet.from_iterable(sorted_elements, self.compressed,
+                                      lazy=self.lazy, hashed=self.hashed)
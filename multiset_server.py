@@ -0,0 +1,412 @@
+'''
+A local asyncio server sharing one MultiSet between processes, and its
+client.
+
+Every frame is a 4 byte big endian length followed by a marshal payload.
+A request frame holds a list of operations, each a tuple of an operation
+code and its arguments, and is answered by one frame holding the list of
+results in the same order together with a dict of the operations that
+failed. Clients may send many frames without waiting for the answers, and
+frames are answered in the order they were sent. Every frame is applied
+as a whole before the next one, with runs of inserts, removes and
+membership tests applied as one sweep.
+
+    python multiset_server.py --unix /tmp/multiset.sock
+'''
+import argparse
+import asyncio
+import builtins
+import collections
+import marshal
+import struct
+import multiset as m
+
+_LENGTH = struct.Struct('>I')
+# frames larger than this close the connection
+MAX_FRAME = 64 * 1024 * 1024
+
+INSERT = 'i'
+REMOVE = 'r'
+CONTAINS = 'h'
+COUNT = 'c'
+RANK = 'k'
+GET = 'g'
+LEN = 'n'
+IRANGE = 'q'
+COUNT_RANGE = 'x'
+
+
+async def _read_frame(reader):
+    '''
+    (asyncio.StreamReader) -> object
+    Returns the payload of the next frame, or None at the end of the
+    stream.
+    Raises ValueError if the frame is larger than MAX_FRAME.
+    '''
+    try:
+        size = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))[0]
+    except asyncio.IncompleteReadError:
+        return None
+    if size > MAX_FRAME:
+        raise ValueError('frame of ' + str(size) + ' bytes is too large')
+    return marshal.loads(await reader.readexactly(size))
+
+
+def _write_frame(writer, payload):
+    '''
+    (asyncio.StreamWriter, object) -> NoneType
+    Queues payload as one frame on writer.
+    '''
+    data = marshal.dumps(payload)
+    writer.write(_LENGTH.pack(len(data)) + data)
+
+
+class MultiSetServer():
+    '''
+    Serves one MultiSet to every client connected over a Unix socket or TCP
+    loopback. All operations run on the event loop, so each request frame
+    sees the MultiSet as the frames before it left it.
+    REQ: Data types can be marshalled
+    '''
+
+    def __init__(self, multiset=None):
+        '''
+        (MultiSetServer, MultiSet) -> NoneType
+        Initializes a server for multiset, or for a new empty MultiSet if
+        None.
+        '''
+        if multiset is None:
+            multiset = m.MultiSet()
+        self.multiset = multiset
+        self._server = None
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        '''
+        (MultiSetServer, str, str, int) -> NoneType
+        Starts listening on the Unix socket at path, or on host and port if
+        path is None. Port 0 picks a free port, see address.
+        '''
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._serve, path)
+        else:
+            self._server = await asyncio.start_server(self._serve, host,
+                                                      port)
+
+    @property
+    def address(self):
+        '''
+        (MultiSetServer) -> str or (str, int)
+        Returns the socket path or the (host, port) the server listens on.
+        '''
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        '''
+        (MultiSetServer) -> NoneType
+        Serves clients until the server is closed.
+        '''
+        await self._server.serve_forever()
+
+    async def close(self):
+        '''
+        (MultiSetServer) -> NoneType
+        Stops listening and waits for the server to shut down.
+        '''
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        '''
+        (MultiSetServer, asyncio.StreamReader, asyncio.StreamWriter)
+        -> NoneType
+        Answers the request frames of one client until it disconnects.
+        '''
+        try:
+            while True:
+                ops = await _read_frame(reader)
+                if ops is None:
+                    break
+                _write_frame(writer, self.apply(ops))
+                await writer.drain()
+        except (ValueError, EOFError, ConnectionError):
+            # a broken frame or peer leaves nothing to answer
+            pass
+        finally:
+            writer.close()
+
+    def apply(self, ops):
+        '''
+        (MultiSetServer, list of tuple) -> [list, dict]
+        Applies ops in order and returns their results, and the name and
+        message of the exception raised by every operation that failed, by
+        position. A run of inserts, removes or membership tests is applied
+        as one batch. A payload that is not a list fails as one operation.
+        '''
+        if not isinstance(ops, list):
+            return [[None], {0: ('TypeError',
+                                 'a request frame holds a list')}]
+        results = [None] * len(ops)
+        errors = {}
+        multiset = self.multiset
+        i = 0
+        while i < len(ops):
+            code = _code(ops[i])
+            j = i + 1
+            if code in (INSERT, REMOVE, CONTAINS):
+                while j < len(ops) and _code(ops[j]) == code:
+                    j += 1
+            try:
+                if code is None:
+                    raise TypeError('an operation is a tuple starting with '
+                                    'its code')
+                elif code == INSERT:
+                    multiset.insert_many([op[1] for op in ops[i:j]])
+                elif code == REMOVE:
+                    multiset.remove_many([op[1] for op in ops[i:j]])
+                elif code == CONTAINS:
+                    results[i:j] = multiset.contains_many(
+                        [op[1] for op in ops[i:j]])
+                else:
+                    results[i] = self._query(ops[i])
+            except Exception as e:
+                for k in range(i, j):
+                    errors[k] = (type(e).__name__, str(e))
+            i = j
+        return [results, errors]
+
+    def _query(self, op):
+        '''
+        (MultiSetServer, tuple) -> object
+        Returns the result of a single read operation.
+        Raises ValueError if the operation code is unknown.
+        '''
+        multiset = self.multiset
+        code = op[0]
+        if code == COUNT:
+            return multiset.count(op[1])
+        elif code == RANK:
+            return multiset.rank(op[1])
+        elif code == GET:
+            return multiset[op[1]]
+        elif code == LEN:
+            return len(multiset)
+        elif code == IRANGE:
+            return list(multiset.irange(*op[1:]))
+        elif code == COUNT_RANGE:
+            return multiset.count_range(op[1], op[2])
+        raise ValueError('unknown operation ' + repr(code))
+
+
+def _code(op):
+    '''
+    (object) -> str
+    Returns the code of the operation op, or None if op is not a tuple or
+    list starting with one.
+    '''
+    if isinstance(op, (tuple, list)) and op and isinstance(op[0], str):
+        return op[0]
+    return None
+
+
+class MultiSetClient():
+    '''
+    A client of a MultiSetServer. Every call sends one frame and awaits its
+    answer, and concurrent calls are pipelined on the one connection. Use
+    execute to send many operations in one frame.
+    '''
+
+    def __init__(self, reader, writer):
+        '''
+        (MultiSetClient, asyncio.StreamReader, asyncio.StreamWriter)
+        -> NoneType
+        Initializes a client on an open connection, see connect.
+        '''
+        self._reader = reader
+        self._writer = writer
+        # futures of the frames sent and not answered yet, oldest first
+        self._pending = collections.deque()
+        self._task = asyncio.ensure_future(self._read_answers())
+
+    @classmethod
+    async def connect(cls, path=None, host='127.0.0.1', port=None):
+        '''
+        (type, str, str, int) -> MultiSetClient
+        Returns a client connected to the server on the Unix socket at
+        path, or on host and port if path is None.
+        '''
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _read_answers(self):
+        '''
+        (MultiSetClient) -> NoneType
+        Hands every answer frame to the oldest pending call until the
+        connection ends, then fails the calls still pending.
+        '''
+        error = ConnectionError('connection to the server was closed')
+        try:
+            while True:
+                answer = await _read_frame(self._reader)
+                if answer is None:
+                    break
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(answer)
+        except Exception as e:
+            error = e
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def execute(self, ops):
+        '''
+        (MultiSetClient, list of tuple) -> list
+        Sends ops in one frame and returns their results in order.
+        Raises the exception of the first operation that failed, after the
+        whole frame was applied.
+        Raises ConnectionError if the connection was closed.
+        '''
+        if self._task.done():
+            # nothing is left to answer the frame
+            raise ConnectionError('connection to the server was closed')
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        _write_frame(self._writer, list(ops))
+        await self._writer.drain()
+        results, errors = await future
+        if errors:
+            name, message = errors[min(errors)]
+            error = getattr(builtins, name, None)
+            if not (isinstance(error, type) and
+                    issubclass(error, Exception)):
+                error = RuntimeError
+            raise error(message)
+        return results
+
+    async def _one(self, *op):
+        '''
+        (MultiSetClient, optional arguments) -> object
+        Sends the single operation op and returns its result.
+        '''
+        return (await self.execute([op]))[0]
+
+    async def insert(self, element):
+        '''
+        (MultiSetClient, anything) -> NoneType
+        inserts element into the MultiSet.
+        '''
+        await self._one(INSERT, element)
+
+    async def remove(self, element):
+        '''
+        (MultiSetClient, anything) -> NoneType
+        Removes one occurence of element from the MultiSet.
+        If the element is not present, do nothing.
+        '''
+        await self._one(REMOVE, element)
+
+    async def contains(self, element):
+        '''
+        (MultiSetClient, anything) -> bool
+        Returns True if and only if element belongs to the MultiSet.
+        '''
+        return await self._one(CONTAINS, element)
+
+    async def count(self, element):
+        '''
+        (MultiSetClient, anything) -> int
+        Returns the number of occurrences of element in the MultiSet.
+        '''
+        return await self._one(COUNT, element)
+
+    async def rank(self, element):
+        '''
+        (MultiSetClient, anything) -> int
+        Returns the number of elements of the MultiSet smaller than
+        element.
+        '''
+        return await self._one(RANK, element)
+
+    async def get(self, index):
+        '''
+        (MultiSetClient, int) -> anything
+        Returns the element at position index in ascending order.
+        Raises IndexError if index is out of range.
+        '''
+        return await self._one(GET, index)
+
+    async def len(self):
+        '''
+        (MultiSetClient) -> int
+        Returns the number of elements in the MultiSet.
+        '''
+        return await self._one(LEN)
+
+    async def irange(self, lo=None, hi=None, inclusive=(True, True),
+                     reverse=False):
+        '''
+        (MultiSetClient, obj, obj, (bool, bool), bool) -> list
+        Returns the elements between lo and hi in ascending order, or in
+        descending order if reverse, see MultiSet.irange.
+        '''
+        return await self._one(IRANGE, lo, hi, tuple(inclusive), reverse)
+
+    async def count_range(self, lo, hi):
+        '''
+        (MultiSetClient, obj, obj) -> int
+        Returns the number of elements e in the MultiSet with lo <= e <= hi.
+        '''
+        return await self._one(COUNT_RANGE, lo, hi)
+
+    async def insert_many(self, elements):
+        '''
+        (MultiSetClient, iterable) -> NoneType
+        inserts every one of elements in one frame.
+        '''
+        await self.execute([(INSERT, element) for element in elements])
+
+    async def contains_many(self, elements):
+        '''
+        (MultiSetClient, iterable) -> list of bool
+        Returns whether every one of elements is in the MultiSet, asking in
+        one frame.
+        '''
+        return await self.execute([(CONTAINS, element)
+                                   for element in elements])
+
+    async def close(self):
+        '''
+        (MultiSetClient) -> NoneType
+        Closes the connection.
+        '''
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._task
+
+
+def main(argv=None):
+    '''
+    (list of str) -> NoneType
+    Parses the command line and serves an empty MultiSet until killed.
+    '''
+    parser = argparse.ArgumentParser(
+        description='Serve one MultiSet to local processes.')
+    parser.add_argument('--unix', help='Unix socket path to listen on')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7379)
+    parser.add_argument('--compressed', action='store_true')
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = MultiSetServer(m.MultiSet(compressed=args.compressed))
+        await server.start(args.unix, args.host, args.port)
+        await server.serve_forever()
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+import itertools
+import numpy as np
+import skiplist as sl
+
+
+class NumericMultiSet():
+    '''
+    A multiset of integer or float keys kept in sorted NumPy blocks. A
+    skiplist over the largest key of every block finds the block a single
+    key belongs to, and the batch operations search every block at once
+    with searchsorted instead of calling into Python per key.
+    Equal keys may spread over neighbouring blocks, so a key belongs to the
+    first block whose largest key is not smaller than it.
+    REQ: Data types can be stored in dtype
+    '''
+
+    def __init__(self, values=(), dtype='int64', block_size=4096,
+                 levels=None):
+        '''
+        (NumericMultiSet, array_like, str, int, sl.LevelGenerator)
+        -> NoneType
+        Initializes a multiset of dtype keys holding values. Blocks are
+        built block_size keys long and split once they hold twice as many.
+        levels draws the tower heights of the skiplist over the blocks, see
+        sl.LevelGenerator.
+        Raises ValueError if dtype cannot hold every one of values exactly.
+        '''
+        if block_size < 1:
+            raise ValueError('block_size must be positive')
+        self.dtype = np.dtype(dtype)
+        self.block_size = block_size
+        # the skiplist holds (largest key, smallest key, block id) for every
+        # block, which sorts blocks sharing a largest key in their order
+        self._index = sl.Skiplist(levels=levels)
+        self._blocks = {}
+        self._ids = itertools.count()
+        self._size = 0
+        # blocks in order with their largest keys and start positions, built
+        # by the batch operations when needed
+        self._layout = None
+        self._build(np.sort(self._array(values)))
+
+    def _array(self, values):
+        '''
+        (NumericMultiSet, array_like) -> ndarray
+        Returns values as a flat array of dtype.
+        Raises ValueError if dtype cannot hold every one of values exactly.
+        '''
+        keys, exact = self._exact(values)
+        if not exact.all():
+            raise ValueError('values cannot be stored exactly as ' +
+                             str(self.dtype))
+        return keys
+
+    def _exact(self, values):
+        '''
+        (NumericMultiSet, array_like) -> (ndarray, ndarray)
+        Returns values as a flat array of dtype, and a mask of the values
+        dtype holds exactly. The others cannot be in the multiset.
+        '''
+        given = np.asarray(values).ravel()
+        if given.dtype == object:
+            # Python ints too large for any NumPy type, among others
+            exact = np.array([self._fits(value) for value in given],
+                             dtype=bool)
+            keys = np.array([value if fits else 0
+                             for value, fits in zip(given, exact)],
+                            dtype=self.dtype)
+            return keys, exact
+        with np.errstate(invalid='ignore', over='ignore'):
+            keys = given.astype(self.dtype)
+            # the sign catches integers that wrapped around both ways
+            exact = ((keys.astype(given.dtype) == given) &
+                     ((keys < 0) == (given < 0)))
+        return keys, exact
+
+    def _fits(self, value):
+        '''
+        (NumericMultiSet, obj) -> bool
+        Returns True if and only if dtype holds value exactly.
+        '''
+        try:
+            return np.array(value, dtype=self.dtype).item() == value
+        except (OverflowError, TypeError, ValueError):
+            return False
+
+    def _key(self, element):
+        '''
+        (NumericMultiSet, number) -> obj
+        Returns element as a Python number of dtype, or None if dtype
+        cannot hold it exactly.
+        '''
+        keys, exact = self._exact(element)
+        return keys[0].item() if exact[0] else None
+
+    def _build(self, keys):
+        '''
+        (NumericMultiSet, ndarray) -> NoneType
+        Cuts keys into blocks of block_size and indexes them.
+        REQ: the multiset is empty
+        REQ: keys is sorted
+        '''
+        entries = []
+        for start in range(0, len(keys), self.block_size):
+            entries.append(self._add_block(keys[start:start +
+                                                 self.block_size]))
+        self._index = sl.Skiplist.from_sorted(entries,
+                                              self._index.level_generator)
+        self._size = len(keys)
+        self._layout = None
+
+    def _add_block(self, block):
+        '''
+        (NumericMultiSet, ndarray) -> (obj, obj, int)
+        Stores block under a new id and returns its skiplist entry.
+        REQ: block is sorted and not empty
+        '''
+        block_id = next(self._ids)
+        self._blocks[block_id] = block
+        return (block[-1].item(), block[0].item(), block_id)
+
+    def _replace(self, entry, block):
+        '''
+        (NumericMultiSet, (obj, obj, int), ndarray) -> NoneType
+        Replaces the block of entry by block, which is dropped if it is
+        empty and split if it grew past twice the block size.
+        '''
+        self._index.remove(entry)
+        del self._blocks[entry[2]]
+        limit = 2 * self.block_size
+        if len(block) > limit:
+            for start in range(0, len(block), self.block_size):
+                self._index.insert(self._add_block(
+                    block[start:start + self.block_size]))
+        elif len(block):
+            self._index.insert(self._add_block(block))
+        self._layout = None
+
+    def _first_block(self, key):
+        '''
+        (NumericMultiSet, obj) -> sl.Node
+        Returns the skiplist node of the first block whose largest key is
+        not smaller than key, or the tail node if there is none.
+        '''
+        # (key,) sorts before every (key, smallest key, block id)
+        return self._index.lower_bound((key,))
+
+    def _get_layout(self):
+        '''
+        (NumericMultiSet) -> (ndarray, list of ndarray, ndarray)
+        Returns the largest key of every block, the blocks in order and the
+        position of the first key of every block.
+        '''
+        if self._layout is None:
+            blocks = [self._blocks[entry[2]] for entry in self._index]
+            maxima = np.array([block[-1] for block in blocks],
+                              dtype=self.dtype)
+            starts = np.zeros(len(blocks), dtype=np.int64)
+            if blocks:
+                np.cumsum([len(block) for block in blocks[:-1]],
+                          out=starts[1:])
+            self._layout = (maxima, blocks, starts)
+        return self._layout
+
+    def insert(self, element):
+        '''
+        (NumericMultiSet, number) -> NoneType
+        inserts element into multiset.
+        Raises ValueError if dtype cannot hold element exactly.
+        '''
+        key = self._array(element)[0].item()
+        node = self._first_block(key)
+        if node is self._index.tail_node:
+            # larger than every key, it goes at the end of the last block
+            node = self._index.tail_node.backward
+            if node is self._index.head_node:
+                self._build(self._array([key]))
+                return
+        block = self._blocks[node.data[2]]
+        pos = np.searchsorted(block, key, 'right')
+        self._replace(node.data, np.insert(block, pos, key))
+        self._size += 1
+
+    def remove(self, element):
+        '''
+        (NumericMultiSet, number) -> NoneType
+        Removes one occurence of element from the multiset.
+        If the element is not present, do nothing.
+        '''
+        key = self._key(element)
+        if key is None:
+            return
+        node = self._first_block(key)
+        if node is self._index.tail_node:
+            return
+        block = self._blocks[node.data[2]]
+        pos = np.searchsorted(block, key, 'left')
+        if block[pos] != key:
+            return
+        self._replace(node.data, np.delete(block, pos))
+        self._size -= 1
+
+    def count(self, element):
+        '''
+        (NumericMultiSet, number) -> int
+        Returns the number of occurrences of element in the multiset.
+        '''
+        key = self._key(element)
+        if key is None:
+            return 0
+        count = 0
+        tail = self._index.tail_node
+        node = self._first_block(key)
+        # walk the blocks the run of key spreads over
+        while node is not tail:
+            block = self._blocks[node.data[2]]
+            count += int(np.searchsorted(block, key, 'right') -
+                         np.searchsorted(block, key, 'left'))
+            if node.data[0] > key:
+                break
+            node = node.forward[0]
+        return count
+
+    def __contains__(self, element):
+        '''
+        (NumericMultiSet, number) -> bool
+        returns True if and only if element belongs to the multiset.
+        uses in
+        '''
+        key = self._key(element)
+        if key is None:
+            return False
+        node = self._first_block(key)
+        if node is self._index.tail_node:
+            return False
+        block = self._blocks[node.data[2]]
+        return block[np.searchsorted(block, key, 'left')] == key
+
+    def _positions(self, keys, side):
+        '''
+        (NumericMultiSet, ndarray, str) -> ndarray
+        Returns where every one of keys would be inserted into the whole
+        multiset, before equal keys if side is 'left' and after them if it
+        is 'right', like np.searchsorted over all the keys.
+        REQ: keys is sorted
+        '''
+        maxima, blocks, starts = self._get_layout()
+        ret = np.full(len(keys), self._size, dtype=np.int64)
+        # the block each key falls into, len(blocks) past the last one
+        which = np.searchsorted(maxima, keys, side)
+        bounds = np.searchsorted(which, np.arange(len(blocks) + 1), 'left')
+        for j in np.unique(which[which < len(blocks)]):
+            lo, hi = bounds[j], bounds[j + 1]
+            ret[lo:hi] = starts[j] + np.searchsorted(blocks[j],
+                                                     keys[lo:hi], side)
+        return ret
+
+    def count_many(self, elements):
+        '''
+        (NumericMultiSet, array_like) -> ndarray
+        Returns the number of occurrences of every one of elements, in the
+        order given.
+        '''
+        keys, exact = self._exact(elements)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        ret = np.empty(len(keys), dtype=np.int64)
+        ret[order] = (self._positions(keys, 'right') -
+                      self._positions(keys, 'left'))
+        ret[~exact] = 0
+        return ret
+
+    def contains_many(self, elements):
+        '''
+        (NumericMultiSet, array_like) -> ndarray
+        Returns for every one of elements, in the order given, whether it
+        belongs to the multiset.
+        '''
+        return self.count_many(elements) > 0
+
+    def insert_many(self, elements):
+        '''
+        (NumericMultiSet, array_like) -> NoneType
+        inserts every one of elements into the multiset, merging them into
+        the blocks they fall into in one pass over each.
+        Raises ValueError if dtype cannot hold every one of them exactly.
+        '''
+        keys = np.sort(self._array(elements))
+        if not len(keys):
+            return
+        if not self._size:
+            self._build(keys)
+            return
+        maxima, blocks, starts = self._get_layout()
+        entries = list(self._index)
+        # keys past the largest one go to the last block
+        which = np.minimum(np.searchsorted(maxima, keys, 'left'),
+                           len(blocks) - 1)
+        bounds = np.searchsorted(which, np.arange(len(blocks) + 1), 'left')
+        for j in np.unique(which):
+            batch = keys[bounds[j]:bounds[j + 1]]
+            block = blocks[j]
+            self._replace(entries[j], np.insert(
+                block, np.searchsorted(block, batch, 'right'), batch))
+        self._size += len(keys)
+
+    def __len__(self):
+        '''
+        (NumericMultiSet) -> int
+        returns the number of elements in the multiset.
+        uses len()
+        '''
+        return self._size
+
+    def __iter__(self):
+        '''
+        (NumericMultiSet) -> iterator
+        Yields every element in ascending order as a Python number.
+        '''
+        for entry in self._index:
+            yield from self._blocks[entry[2]].tolist()
+
+    def to_array(self):
+        '''
+        (NumericMultiSet) -> ndarray
+        Returns every element in ascending order in one array.
+        '''
+        blocks = self._get_layout()[1]
+        if not blocks:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(blocks)
+
+    def __repr__(self):
+        '''
+        (NumericMultiSet) -> str
+        returns a string representation of the multiset.
+        uses repr()
+        '''
+        return "NumericMultiSet([" + ", ".join(str(i) for i in self) + "])"
@@ -0,0 +1,460 @@
+import bisect
+import itertools
+import random as r
+import multiset as m
+
+# sampled elements per shard when picking pivots
+_SAMPLES_PER_SHARD = 64
+# shards smaller than this never trigger a rebalance
+_MIN_REBALANCE = 1024
+
+
+def _map(executor, func, *iterables):
+    '''
+    (concurrent.futures.Executor, function, iterables) -> list
+    Returns func applied to the items of iterables, on executor if given
+    and in this process otherwise.
+    '''
+    if executor is None:
+        return list(map(func, *iterables))
+    return list(executor.map(func, *iterables))
+
+
+class PackedShard():
+    '''
+    A shard held as the sorted list of its elements, the way a bulk load,
+    the set algebra or a rebalance hands it over, so attaching it costs
+    O(1). It answers lookups by bisection and is turned into a MultiSet
+    by the first change made to it.
+    '''
+
+    def __init__(self, elements):
+        '''
+        (PackedShard, list) -> NoneType
+        Initializes a shard holding elements.
+        REQ: elements is sorted and is not changed afterwards
+        '''
+        self.elements = elements
+
+    def __len__(self):
+        '''
+        (PackedShard) -> int
+        returns the number of elements in the shard.
+        uses len()
+        '''
+        return len(self.elements)
+
+    def __iter__(self):
+        '''
+        (PackedShard) -> iterator
+        Yields every element in ascending order.
+        '''
+        return iter(self.elements)
+
+    def __contains__(self, element):
+        '''
+        (PackedShard, anything) -> bool
+        returns True if and only if element belongs to the shard.
+        uses in
+        '''
+        i = bisect.bisect_left(self.elements, element)
+        return i < len(self.elements) and self.elements[i] == element
+
+    def count(self, element):
+        '''
+        (PackedShard, anything) -> int
+        Returns the number of occurrences of element.
+        '''
+        return (bisect.bisect_right(self.elements, element) -
+                bisect.bisect_left(self.elements, element))
+
+    def rank(self, element):
+        '''
+        (PackedShard, anything) -> int
+        Returns the number of elements smaller than element.
+        '''
+        return bisect.bisect_left(self.elements, element)
+
+    def __getitem__(self, index):
+        '''
+        (PackedShard, int) -> anything
+        Returns the element at position index in ascending order.
+        uses []
+        '''
+        return self.elements[index]
+
+    def contains_many(self, elements):
+        '''
+        (PackedShard, iterable) -> list of bool
+        Returns for every one of elements, in the order given, whether it
+        belongs to the shard.
+        '''
+        return [element in self for element in elements]
+
+
+def _elements(shard):
+    '''
+    (MultiSet or PackedShard) -> list
+    Returns the elements of shard as a sorted list, without copying a
+    packed one.
+    '''
+    if isinstance(shard, PackedShard):
+        return shard.elements
+    return list(shard)
+
+
+class ShardedMultiSet():
+    '''
+    A multiset split into shards by ranges of elements. pivots holds the
+    sorted boundaries between the shards: shard i holds the elements from
+    pivots[i - 1] up to but not including pivots[i]. Bulk loads and set
+    algebra work shard by shard, and the sorting and merging can run on a
+    concurrent.futures executor, e.g. a ProcessPoolExecutor to use every
+    core. Their result shards are attached as the sorted lists the workers
+    return, see PackedShard, and each becomes a MultiSet of its own on its
+    first change. Shards are rebalanced once one of them grows max_skew
+    times larger than the average.
+    REQ: Data types are comparable and can be pickled to use processes
+    '''
+
+    def __init__(self, pivots=(), compressed=False, levels=None,
+                 max_skew=2.0):
+        '''
+        (ShardedMultiSet, list, bool, sl.LevelGenerator, float) -> NoneType
+        Initializes an empty multiset with one shard more than pivots.
+        compressed and levels are passed on to the MultiSet of every shard.
+        REQ: pivots is sorted without repeats
+        '''
+        self.pivots = list(pivots)
+        self.compressed = compressed
+        self.levels = levels
+        self.max_skew = max_skew
+        # shards rebalance aims for, repeated elements may allow fewer
+        self.num_shards = len(self.pivots) + 1
+        self.shards = [self._shard(()) for i in range(len(self.pivots) + 1)]
+        # no rebalance is tried before the multiset outgrows this, raised
+        # when new pivots could not split the largest shard
+        self._next_rebalance = 0
+
+    def _shard(self, sorted_elements):
+        '''
+        (ShardedMultiSet, list) -> PackedShard
+        Returns a new shard holding sorted_elements, in O(1).
+        REQ: sorted_elements is not changed afterwards
+        '''
+        return PackedShard(sorted_elements)
+
+    def _writable(self, i):
+        '''
+        (ShardedMultiSet, int) -> MultiSet
+        Returns shard i, turning it into a MultiSet first if it is packed.
+        '''
+        shard = self.shards[i]
+        if isinstance(shard, PackedShard):
+            shard = m.MultiSet.from_iterable(shard.elements, self.compressed,
+                                             self.levels)
+            self.shards[i] = shard
+        return shard
+
+    @classmethod
+    def from_iterable(cls, iterable, num_shards=4, compressed=False,
+                      levels=None, max_skew=2.0, executor=None, seed=None):
+        '''
+        (type, iterable, int, bool, sl.LevelGenerator, float,
+        concurrent.futures.Executor, int) -> ShardedMultiSet
+        Returns a new ShardedMultiSet holding every element of iterable in
+        up to num_shards shards, split at pivots picked from a sample drawn
+        with seed. Every shard is sorted on executor and attached as it
+        comes back.
+        '''
+        elements = list(iterable)
+        rand = r.Random(seed)
+        sample = rand.sample(elements, min(len(elements),
+                                           num_shards * _SAMPLES_PER_SHARD))
+        ret = cls(_pick_pivots(sorted(sample), num_shards), compressed,
+                  levels, max_skew)
+        ret.num_shards = num_shards
+        buckets = [[] for shard in ret.shards]
+        pivots = ret.pivots
+        for element in elements:
+            buckets[bisect.bisect_right(pivots, element)].append(element)
+        ret.shards = [ret._shard(bucket) for bucket in
+                      _map(executor, sorted, buckets)]
+        return ret
+
+    def _shard_of(self, element):
+        '''
+        (ShardedMultiSet, anything) -> MultiSet
+        Returns the shard element belongs to.
+        '''
+        return self.shards[bisect.bisect_right(self.pivots, element)]
+
+    def _split(self, sorted_elements):
+        '''
+        (ShardedMultiSet, list) -> list of list
+        Returns sorted_elements cut into one slice per shard.
+        '''
+        cuts = [0]
+        for pivot in self.pivots:
+            cuts.append(bisect.bisect_left(sorted_elements, pivot, cuts[-1]))
+        cuts.append(len(sorted_elements))
+        return [sorted_elements[cuts[i]:cuts[i + 1]]
+                for i in range(len(cuts) - 1)]
+
+    def _slices(self, set2):
+        '''
+        (ShardedMultiSet, ShardedMultiSet) -> list of list
+        Returns the elements of ShardedMultiSet 2 cut into one sorted slice
+        per shard of ShardedMultiSet 1.
+        '''
+        if set2.pivots == self.pivots:
+            return [_elements(shard) for shard in set2.shards]
+        return self._split(list(set2))
+
+    def insert(self, element):
+        '''
+        (ShardedMultiSet, anything) -> NoneType
+        inserts element into its shard.
+        '''
+        shard = self._writable(bisect.bisect_right(self.pivots, element))
+        shard.insert(element)
+        if self._skewed(shard):
+            self.rebalance()
+
+    def remove(self, element):
+        '''
+        (ShardedMultiSet, anything) -> NoneType
+        Removes one occurence of element from its shard.
+        If the element is not present, do nothing.
+        '''
+        i = bisect.bisect_right(self.pivots, element)
+        if element in self.shards[i]:
+            self._writable(i).remove(element)
+
+    def __contains__(self, element):
+        '''
+        (ShardedMultiSet, anything) -> bool
+        returns True if and only if element belongs to the multiset.
+        uses in
+        '''
+        return element in self._shard_of(element)
+
+    def count(self, element):
+        '''
+        (ShardedMultiSet, anything) -> int
+        Returns the number of occurrences of element.
+        '''
+        return self._shard_of(element).count(element)
+
+    def rank(self, element):
+        '''
+        (ShardedMultiSet, anything) -> int
+        Returns the number of elements smaller than element.
+        '''
+        i = bisect.bisect_right(self.pivots, element)
+        return (sum(len(shard) for shard in self.shards[:i]) +
+                self.shards[i].rank(element))
+
+    def __getitem__(self, index):
+        '''
+        (ShardedMultiSet, int) -> anything
+        Returns the element at position index in ascending order. Negative
+        indices count from the end.
+        uses []
+        '''
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('ShardedMultiSet index out of range')
+        for shard in self.shards:
+            if index < len(shard):
+                return shard[index]
+            index -= len(shard)
+
+    def __len__(self):
+        '''
+        (ShardedMultiSet) -> int
+        returns the number of elements in the multiset.
+        uses len()
+        '''
+        return sum(len(shard) for shard in self.shards)
+
+    def __iter__(self):
+        '''
+        (ShardedMultiSet) -> iterator
+        Yields every element in ascending order, shard after shard.
+        '''
+        return itertools.chain.from_iterable(self.shards)
+
+    def __eq__(self, set2):
+        '''
+        (ShardedMultiSet, ShardedMultiSet) -> bool
+        Returns True if and only if both hold the same elements, however
+        they are sharded.
+        '''
+        if len(self) != len(set2):
+            return False
+        for element1, element2 in zip(self, set2):
+            if element1 != element2:
+                return False
+        return True
+
+    def contains_many(self, elements):
+        '''
+        (ShardedMultiSet, iterable) -> list of bool
+        Returns for every one of elements, in the order given, whether it
+        belongs to the multiset. Every shard answers its elements in one
+        sweep. This runs in this process, as sending a shard to a worker
+        costs more than looking up its elements.
+        '''
+        elements = list(elements)
+        groups = [[] for shard in self.shards]
+        for i, element in enumerate(elements):
+            groups[bisect.bisect_right(self.pivots, element)].append(i)
+        ret = [False] * len(elements)
+        for shard, group in zip(self.shards, groups):
+            if group:
+                found = shard.contains_many([elements[i] for i in group])
+                for i, answer in zip(group, found):
+                    ret[i] = answer
+        return ret
+
+    def insert_many(self, elements):
+        '''
+        (ShardedMultiSet, iterable) -> NoneType
+        inserts every one of elements into its shard, one batch per shard,
+        then rebalances the shards if they skewed.
+        '''
+        groups = [[] for shard in self.shards]
+        for element in elements:
+            groups[bisect.bisect_right(self.pivots, element)].append(element)
+        for i, group in enumerate(groups):
+            if group:
+                self._writable(i).insert_many(group)
+        if any(self._skewed(shard) for shard in self.shards):
+            self.rebalance()
+
+    def _combine(self, set2, keep_left, keep_both, keep_right, executor):
+        '''
+        (ShardedMultiSet, ShardedMultiSet, bool, bool, bool,
+        concurrent.futures.Executor) -> ShardedMultiSet
+        Returns a new ShardedMultiSet with the pivots of ShardedMultiSet 1,
+        merging every shard with the matching elements of ShardedMultiSet 2
+        on executor, see m.merge_sorted. The merged lists become the shards
+        as they are.
+        '''
+        lefts = [_elements(shard) for shard in self.shards]
+        n = len(lefts)
+        merged = _map(executor, m.merge_sorted, lefts, self._slices(set2),
+                      [keep_left] * n, [keep_both] * n, [keep_right] * n)
+        ret = ShardedMultiSet(self.pivots, self.compressed, self.levels,
+                              self.max_skew)
+        ret.num_shards = self.num_shards
+        ret.shards = [ret._shard(elements) for elements in merged]
+        return ret
+
+    def union(self, set2, executor=None):
+        '''
+        (ShardedMultiSet, ShardedMultiSet, concurrent.futures.Executor)
+        -> ShardedMultiSet
+        Returns the union of both, merging shard by shard on executor.
+        '''
+        return self._combine(set2, True, True, True, executor)
+
+    def difference(self, set2, executor=None):
+        '''
+        (ShardedMultiSet, ShardedMultiSet, concurrent.futures.Executor)
+        -> ShardedMultiSet
+        Returns ShardedMultiSet 1 without one occurrence of every element
+        of ShardedMultiSet 2, merging shard by shard on executor.
+        '''
+        return self._combine(set2, True, False, False, executor)
+
+    def intersection(self, set2, executor=None):
+        '''
+        (ShardedMultiSet, ShardedMultiSet, concurrent.futures.Executor)
+        -> ShardedMultiSet
+        Returns the elements both have in common, merging shard by shard on
+        executor.
+        '''
+        return self._combine(set2, False, True, False, executor)
+
+    def __add__(self, set2):
+        '''
+        (ShardedMultiSet, ShardedMultiSet) -> ShardedMultiSet
+        Returns the union of both, in this process.
+        Uses +
+        '''
+        return self.union(set2)
+
+    def __sub__(self, set2):
+        '''
+        (ShardedMultiSet, ShardedMultiSet) -> ShardedMultiSet
+        Returns the difference of both, in this process.
+        Uses -
+        '''
+        return self.difference(set2)
+
+    def __and__(self, set2):
+        '''
+        (ShardedMultiSet, ShardedMultiSet) -> ShardedMultiSet
+        Returns the intersection of both, in this process.
+        Uses &
+        '''
+        return self.intersection(set2)
+
+    def _skewed(self, shard):
+        '''
+        (ShardedMultiSet, MultiSet) -> bool
+        Returns True if shard grew max_skew times larger than the average,
+        unless the multiset did not grow enough since a rebalance that could
+        not split the shards.
+        '''
+        size = len(shard)
+        total = len(self)
+        return (size > _MIN_REBALANCE and total >= self._next_rebalance and
+                size > self.max_skew * total / len(self.shards))
+
+    def rebalance(self):
+        '''
+        (ShardedMultiSet) -> NoneType
+        Picks new pivots at the quantiles of the elements so that the
+        shards are as even as repeated elements allow, and cuts every shard
+        from the sorted elements. If the new pivots would not make the largest
+        shard smaller, as when it holds one repeated element, the shards
+        are kept. If the shards are still skewed either way, no rebalance
+        is tried again before the multiset grows by half, which keeps their
+        cost amortized O(1) per insert.
+        '''
+        elements = list(self)
+        largest = max(len(shard) for shard in self.shards)
+        pivots = self.pivots
+        self.pivots = _pick_pivots(elements, self.num_shards)
+        parts = self._split(elements)
+        new_largest = max(len(part) for part in parts)
+        if new_largest >= largest:
+            self.pivots = pivots
+        else:
+            self.shards = [self._shard(part) for part in parts]
+        if min(new_largest, largest) > (self.max_skew * len(elements) /
+                                        len(self.shards)):
+            self._next_rebalance = len(elements) + len(elements) // 2 + 1
+        else:
+            self._next_rebalance = 0
+
+
+def _pick_pivots(sorted_elements, num_shards):
+    '''
+    (list, int) -> list
+    Returns up to num_shards - 1 pivots cutting sorted_elements into parts
+    of about the same size, without repeats.
+    '''
+    pivots = []
+    n = len(sorted_elements)
+    for i in range(1, num_shards):
+        if n:
+            pivot = sorted_elements[i * n // num_shards]
+            if not pivots or pivots[-1] < pivot:
+                pivots.append(pivot)
+    return pivots
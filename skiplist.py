@@ -1,77 +1,646 @@
+import io
+import itertools
+import math
 import random as r
+import time
+
+# bottom row links always span one node, so nodes of height one share this
+# width tower instead of each allocating their own
+_BOTTOM_WIDTH = (1,)
+
+# levels drawn by one call to the random generator, bounding the memory
+# of a batch to 8 bytes per level twice over
+_LEVEL_BATCH = 65536
+
+# values joined into one string before every write of a renderer
+_RENDER_CHUNK = 1024
+
+
+def write_items(stream, items, total, max_items=None, sep=', '):
+    '''
+    (text file, iterable, int, int, str) -> NoneType
+    Writes str of every one of items to stream, separated by sep, a chunk at
+    a time. Only the first max_items are written, followed by an ellipsis
+    and the number of the total items left out.
+    '''
+    items = iter(items)
+    if max_items is not None:
+        items = itertools.islice(items, max_items)
+    written = 0
+    while True:
+        chunk = [str(i) for i in itertools.islice(items, _RENDER_CHUNK)]
+        if not chunk:
+            break
+        if written:
+            stream.write(sep)
+        stream.write(sep.join(chunk))
+        written += len(chunk)
+    if written < total:
+        if written:
+            stream.write(sep)
+        stream.write("...(" + str(total - written) + " more)")
 
 
 class Node():
     '''
-    A normal node in the skiplist ADT containing a value, a 'down' and an
-    'up' reference.
+    A node in the skiplist ADT. Every value is stored in exactly one node,
+    which holds the value once plus one 'next' reference and one width per
+    level of its tower. The width of a level is the number of bottom row
+    steps from this node to its next node on that level. The bottom row is
+    also linked backwards.
     '''
 
-    def __init__(self, value, next_n, down_n):
+    __slots__ = ('data', 'forward', 'width', 'backward')
+
+    def __init__(self, value, level):
         '''
-        (Node, object, Node, Node) -> NoneType
-        Initializes a node with data, a 'down' and an 'up' reference.
+        (Node, object, int) -> NoneType
+        Initializes a node with data and a tower of level + 1 empty 'next'
+        references.
         '''
         self.data = value
-        self.next_node = next_n
-        self.down_node = down_n
+        self.backward = None
+        self.forward = [None] * (level + 1)
+        if level == 0:
+            self.width = _BOTTOM_WIDTH
+        else:
+            self.width = [1] * (level + 1)
+
+    @property
+    def next_node(self):
+        '''
+        (Node) -> Node
+        returns the next node on the bottom row.
+        '''
+        return self.forward[0]
 
 
 class HeadNode(Node):
     '''
-    A head node inheriting from Node. Contains a 'down' and an 'up' reference,
-    but no value.
+    The head node inheriting from Node. Contains no value, and its tower is
+    as tall as the skiplist.
     '''
 
-    def __init__(self, next_n, down_n):
+    __slots__ = ()
+
+    def __init__(self, next_n):
         '''
-        (HeadNode, Node, Node) -> NoneType
-        Initializes a node with a 'down' and an 'up' reference.
+        (HeadNode, Node) -> NoneType
+        Initializes a head node with one level pointing to next_n.
         '''
-        Node.__init__(self, None, next_n, down_n)
+        Node.__init__(self, None, 0)
+        self.forward[0] = next_n
+        self.width = [1]
 
 
 class TailNode(HeadNode):
     '''
-    A Tail node inheriting from Node. Contains a 'down' refence.
+    The tail node inheriting from HeadNode. Contains no value and ends every
+    level.
+    '''
+
+    __slots__ = ()
+
+    def __init__(self):
+        '''
+        (TailNode) -> NoneType
+        Initializes a tail node.
+        '''
+        HeadNode.__init__(self, None)
+
+
+class Finger():
+    '''
+    A cursor on a skiplist that remembers the predecessors of the last value
+    it visited on every level. The next search starts from there and only
+    climbs as high as it needs to, so a value d positions away from the last
+    one is found in O(log d) steps. Changes made to the skiplist without
+    going through the finger make it start over from the head once.
+    '''
+
+    def __init__(self, slist):
+        '''
+        (Finger, Skiplist) -> NoneType
+        Initializes a finger on slist that has not visited anything yet.
+        '''
+        self.slist = slist
+        self._update = None
+        self._rank = None
+        self._version = -1
+
+    def _seek(self, value):
+        '''
+        (Finger, obj) -> (list of Node, list of int)
+        Moves the finger to value and returns its predecessors and their
+        positions on every level, like Skiplist._find_predecessors.
+        '''
+        slist = self.slist
+        head = slist.head_node
+        tail = slist.tail_node
+        height = len(head.forward) - 1
+        update = self._update
+        rank = self._rank
+        if self._version != slist._version or len(update) != height + 1:
+            update, rank = slist._find_predecessors(value)
+        else:
+            level = 0
+            if update[0] is head or update[0].data < value:
+                # moving right, climb while the next node is still too small
+                while level < height and (
+                        update[level].forward[level] is not tail and
+                        update[level].forward[level].data < value):
+                    level += 1
+            else:
+                # moving left, climb until a predecessor is small enough
+                while update[level] is not head and not (
+                        update[level].data < value):
+                    if level == height:
+                        update[level] = head
+                        rank[level] = 0
+                    else:
+                        level += 1
+            current = update[level]
+            pos = rank[level]
+            for level in range(level, -1, -1):
+                next_n = current.forward[level]
+                while next_n is not tail and next_n.data < value:
+                    pos += current.width[level]
+                    current = next_n
+                    next_n = current.forward[level]
+                update[level] = current
+                rank[level] = pos
+        self._update = update
+        self._rank = rank
+        self._version = slist._version
+        return update, rank
+
+    def _done(self):
+        '''
+        (Finger) -> NoneType
+        Lets the finger trust its predecessors again after it changed the
+        skiplist itself, dropping levels the head lost.
+        '''
+        height = len(self.slist.head_node.forward)
+        del self._update[height:]
+        del self._rank[height:]
+        self._version = self.slist._version
+
+    def search(self, value):
+        '''
+        (Finger, obj) -> bool
+        Returns true if value can be found in the skiplist, searching from
+        the last value visited.
+        '''
+        update = self._seek(value)[0]
+        next_n = update[0].forward[0]
+        return next_n is not self.slist.tail_node and next_n.data == value
+
+    def insert(self, value):
+        '''
+        (Finger, obj) -> NoneType
+        adds value to the skiplist, searching from the last value visited.
+        '''
+        update, rank = self._seek(value)
+        self.slist._insert_at(value, update, rank)
+        self._done()
+
+    def remove(self, value):
+        '''
+        (Finger, obj) -> NoneType
+        removes one occurrence of value from the skiplist, searching from
+        the last value visited.
+        '''
+        self.slist._remove_at(value, self._seek(value)[0])
+        self._done()
+
+
+class LazyFinger(Finger):
+    '''
+    A finger on a LazySkiplist, which does not find removed values.
+    '''
+
+    def search(self, value):
+        '''
+        (LazyFinger, obj) -> bool
+        Returns true if value can be found in the skiplist, searching from
+        the last value visited.
+        '''
+        update = self._seek(value)[0]
+        next_n = update[0].forward[0]
+        return (next_n is not self.slist.tail_node and
+                next_n.data == value and next_n.count > 0)
+
+    def remove(self, value):
+        '''
+        (LazyFinger, obj) -> NoneType
+        removes one occurrence of value from the skiplist, searching from
+        the last value visited. Compaction runs after the finger took note
+        of its own change, so the finger descends afresh from the head if
+        it unlinked anything.
+        '''
+        Finger.remove(self, value)
+        self.slist._compact_if_dead()
+
+
+class SkiplistStats():
+    '''
+    Operation counters of an instrumented skiplist, see
+    Skiplist.enable_stats. For every operation type it keeps the number of
+    calls, node hops, comparisons and the total and largest latency, and
+    hands the latency of every call to an optional callback.
+    '''
+
+    # the operations that are timed and counted
+    OPERATIONS = ('insert', 'remove', 'search', 'count', 'rank',
+                  'count_range', 'lower_bound', 'upper_bound')
+
+    def __init__(self, slist, callback=None):
+        '''
+        (SkiplistStats, Skiplist, function) -> NoneType
+        Initializes empty counters for slist. callback, if given, is called
+        as callback(operation, seconds) after every operation.
+        '''
+        self.slist = slist
+        self.callback = callback
+        self.operations = {}
+        for name in self.OPERATIONS:
+            self.operations[name] = {'calls': 0, 'hops': 0,
+                                     'comparisons': 0, 'seconds': 0.0,
+                                     'max_seconds': 0.0}
+        # counters of the operation in progress, nested calls add to them
+        self._depth = 0
+        self._hops = 0
+        self._comparisons = 0
+
+    def wrap(self, name, method):
+        '''
+        (SkiplistStats, str, method) -> function
+        Returns method wrapped so that every outermost call is timed and
+        recorded under name.
+        '''
+        def timed(*args):
+            if self._depth:
+                return method(*args)
+            self._depth = 1
+            self._hops = 0
+            self._comparisons = 0
+            start = time.perf_counter()
+            try:
+                return method(*args)
+            finally:
+                seconds = time.perf_counter() - start
+                self._depth = 0
+                self._record(name, seconds)
+        return timed
+
+    def _record(self, name, seconds):
+        '''
+        (SkiplistStats, str, float) -> NoneType
+        Adds the finished operation to the counters of name.
+        '''
+        op = self.operations[name]
+        op['calls'] += 1
+        op['hops'] += self._hops
+        op['comparisons'] += self._comparisons
+        op['seconds'] += seconds
+        if seconds > op['max_seconds']:
+            op['max_seconds'] = seconds
+        if self.callback is not None:
+            self.callback(name, seconds)
+
+    def find_predecessors(self, value):
+        '''
+        (SkiplistStats, obj) -> (list of Node, list of int)
+        Skiplist._find_predecessors, counting hops and comparisons.
+        '''
+        slist = self.slist
+        height = len(slist.head_node.forward) - 1
+        update = [None] * (height + 1)
+        rank = [0] * (height + 1)
+        pos = 0
+        hops = 0
+        comparisons = 0
+        tail = slist.tail_node
+        current = slist.head_node
+        for level in range(height, -1, -1):
+            next_n = current.forward[level]
+            while next_n is not tail:
+                comparisons += 1
+                if not next_n.data < value:
+                    break
+                hops += 1
+                pos += current.width[level]
+                current = next_n
+                next_n = current.forward[level]
+            update[level] = current
+            rank[level] = pos
+        self._hops += hops
+        self._comparisons += comparisons
+        return update, rank
+
+    def descend(self, value, inclusive):
+        '''
+        (SkiplistStats, obj, bool) -> (Node, int)
+        Skiplist._descend, counting hops and comparisons.
+        '''
+        slist = self.slist
+        pos = 0
+        hops = 0
+        comparisons = 0
+        tail = slist.tail_node
+        current = slist.head_node
+        for level in range(len(current.forward) - 1, -1, -1):
+            next_n = current.forward[level]
+            while next_n is not tail:
+                comparisons += 1
+                if not next_n.data < value:
+                    if not inclusive:
+                        break
+                    comparisons += 1
+                    if not next_n.data == value:
+                        break
+                hops += 1
+                pos += current.width[level]
+                current = next_n
+                next_n = current.forward[level]
+        self._hops += hops
+        self._comparisons += comparisons
+        return current, pos
+
+    def search(self, value):
+        '''
+        (SkiplistStats, obj) -> bool
+        Skiplist.search, counting hops and comparisons.
+        '''
+        slist = self.slist
+        hops = 0
+        comparisons = 0
+        found = False
+        tail = slist.tail_node
+        current = slist.head_node
+        for level in range(len(current.forward) - 1, -1, -1):
+            next_n = current.forward[level]
+            while next_n is not tail:
+                comparisons += 1
+                if not next_n.data < value:
+                    break
+                hops += 1
+                current = next_n
+                next_n = current.forward[level]
+            if next_n is not tail:
+                comparisons += 1
+                if next_n.data == value:
+                    found = True
+                    break
+        self._hops += hops
+        self._comparisons += comparisons
+        return found
+
+    def level_histogram(self):
+        '''
+        (SkiplistStats) -> dict of int to int
+        Returns how many nodes have their top at every level. Walks the
+        whole bottom row.
+        '''
+        histogram = {}
+        tail = self.slist.tail_node
+        current = self.slist.head_node.forward[0]
+        while current is not tail:
+            level = len(current.forward) - 1
+            histogram[level] = histogram.get(level, 0) + 1
+            current = current.forward[0]
+        return histogram
+
+    def report(self):
+        '''
+        (SkiplistStats) -> dict
+        Returns the current height, size, level histogram and a copy of the
+        counters of every operation type.
+        '''
+        operations = {}
+        for name, op in self.operations.items():
+            operations[name] = dict(op)
+        return {'height': self.slist.get_height(),
+                'size': len(self.slist),
+                'levels': self.level_histogram(),
+                'operations': operations}
+
+
+class CountedNode(Node):
+    '''
+    A node inheriting from Node that stands for count occurrences of its
+    value. Its bottom row width is the count of the next node, so it always
+    has its own width tower.
+    '''
+
+    __slots__ = ('count',)
+
+    def __init__(self, value, level, count=1):
+        '''
+        (CountedNode, object, int, int) -> NoneType
+        Initializes a node with data occurring count times.
+        '''
+        Node.__init__(self, value, level)
+        self.width = [1] * (level + 1)
+        self.count = count
+
+
+class LevelGenerator():
+    '''
+    Draws the tower heights of a skiplist. A node reaches each next level
+    with probability p, and no tower goes above max_level. Every generator
+    has its own random state, so a given seed always rebuilds the same
+    shape of skiplist from the same operations.
     '''
 
-    def __init__(self, down_n):
+    def __init__(self, p=0.5, max_level=32, seed=None):
+        '''
+        (LevelGenerator, float, int, object) -> NoneType
+        Initializes a level generator seeded with seed, or from the system
+        if seed is None.
+        REQ: 0 < p < 1
+        REQ: max_level >= 0
+        '''
+        if not 0 < p < 1:
+            raise ValueError('p must be between 0 and 1')
+        if max_level < 0:
+            raise ValueError('max_level must not be negative')
+        self.p = p
+        self.max_level = max_level
+        self._random = r.Random(seed)
+        self._log_p = math.log(p)
+
+    def next_level(self):
         '''
-        (TailNode, Node) -> NoneType
-        Initializes a node with a 'down' reference.
+        (LevelGenerator) -> int
+        returns the number of levels a new node reaches above the bottom
+        one, drawn with a single call to the random generator.
         '''
-        HeadNode.__init__(self, None, down_n)
+        if self.p == 0.5:
+            # every trailing one bit is one more level
+            bits = self._random.getrandbits(self.max_level)
+            return (~bits & (bits + 1)).bit_length() - 1
+        # invert the geometric distribution, u is uniform in (0, 1]
+        u = (self._random.getrandbits(53) + 1) / 9007199254740992.0
+        return min(int(math.log(u) / self._log_p), self.max_level)
+
+    def levels(self, n):
+        '''
+        (LevelGenerator, int) -> list of int
+        returns the levels of the next n nodes, drawn in batches: a single
+        call to the random generator gives a 64 bit word to each of up to
+        _LEVEL_BATCH nodes.
+        '''
+        if self.p == 0.5 and self.max_level > 64:
+            # a word holds too few bits to reach the top level
+            next_level = self.next_level
+            return [next_level() for i in range(n)]
+        ret = []
+        for start in range(0, n, _LEVEL_BATCH):
+            ret.extend(self._batch(min(_LEVEL_BATCH, n - start)))
+        return ret
+
+    def _batch(self, n):
+        '''
+        (LevelGenerator, int) -> list of int
+        returns the levels of the next n nodes, drawn with a single call to
+        the random generator.
+        '''
+        words = memoryview(self._random.getrandbits(64 * n).to_bytes(
+            8 * n, 'little')).cast('Q')
+        max_level = self.max_level
+        if self.p == 0.5:
+            return [min((~bits & (bits + 1)).bit_length() - 1, max_level)
+                    for bits in words]
+        log_p = self._log_p
+        # the top 53 bits of a word make u uniform in (0, 1]
+        return [min(int(math.log(((bits >> 11) + 1) / 9007199254740992.0) /
+                        log_p), max_level)
+                for bits in words]
 
 
 class Skiplist():
     '''
-    A class representing a skiplist. Nodes have an up and a down reference, as
-    well as a data value. Head nodes contain no data and tail nodes only
-    contain down references. There will be only one tail node.
-    There will be no extra levels of heads above the other nodes.
+    A class representing a skiplist. Every value lives in a single node whose
+    tower holds a 'next' reference and a width for each of its levels. One
+    head node contains no data and its tower reaches the top level, and there
+    is one tail node ending every level.
+    There will be no extra levels of the head above the other nodes.
+    Every link stores its width, so the skiplist can be indexed by position.
     REQ: Data types are comparable
     '''
 
-    def __init__(self, *args):
+    _node_class = Node
+    _finger_class = Finger
+
+    def __init__(self, *args, levels=None):
         '''
-        (Skiplist, optional arguments) -> NoneType
+        (Skiplist, optional arguments, LevelGenerator) -> NoneType
         Initializes a skiplist. If no arguments are given the skiplist is
-        initialized empty.
+        initialized empty. Tower heights are drawn by levels, or by a new
+        LevelGenerator with p = 0.5 if levels is None.
         '''
-        # keep at 0.5, only have this just in case
-        self._f_probability = 0.5
+        if levels is None:
+            levels = LevelGenerator()
+        self.level_generator = levels
         # initial
-        self.tail_node = TailNode(None)
-        self.head_node = HeadNode(self.tail_node, None)
-        # current node for printing
-        self.current_print = self.head_node
-        # current node
-        self.current = self.head_node
-        # node for insertion
-        self.added_node = None
-        for i in args:
-            self.insert(i)
+        self.tail_node = TailNode()
+        self.head_node = HeadNode(self.tail_node)
+        self.tail_node.backward = self.head_node
+        # number of values in the bottom row
+        self._size = 0
+        # bumped on every change to the links, so fingers know when the
+        # nodes they remember may be gone
+        self._version = 0
+        if args:
+            self._bulk_load(sorted(args))
+
+    @classmethod
+    def from_sorted(cls, iterable, levels=None):
+        '''
+        (type, iterable, LevelGenerator) -> Skiplist
+        Returns a new skiplist holding every value of iterable, built in one
+        left to right pass. The input is sorted first, which costs linear
+        time when it is already in order.
+        '''
+        values = list(iterable)
+        values.sort()
+        slist = cls(levels=levels)
+        slist._bulk_load(values)
+        return slist
+
+    @classmethod
+    def from_runs(cls, values, counts, levels=None):
+        '''
+        (type, list, list of int, LevelGenerator) -> Skiplist
+        Returns a new skiplist holding counts[i] occurrences of values[i]
+        for every i, built in one left to right pass.
+        REQ: values is sorted without repeats
+        REQ: every count is positive
+        '''
+        slist = cls(levels=levels)
+        slist._bulk_load_runs(values, counts)
+        return slist
+
+    def copy(self):
+        '''
+        (Skiplist) -> Skiplist
+        Returns a new skiplist holding the same values, sharing no nodes,
+        built in one pass over them. Tower heights are drawn again.
+        '''
+        return self.from_sorted(self, self.level_generator)
+
+    def _bulk_load_runs(self, values, counts):
+        '''
+        (Skiplist, list, list of int) -> NoneType
+        Builds the skiplist from runs of equal values, one node per
+        occurrence.
+        REQ: skiplist is empty
+        REQ: values is sorted without repeats
+        '''
+        self._bulk_load(list(itertools.chain.from_iterable(
+            itertools.repeat(value, count)
+            for value, count in zip(values, counts))))
+
+    def _bulk_load(self, values):
+        '''
+        (Skiplist, list) -> NoneType
+        Builds the bottom row and every level above it from values in a
+        single pass, appending each tower at the end of its levels.
+        REQ: skiplist is empty
+        REQ: values is sorted
+        '''
+        tail = self.tail_node
+        head = self.head_node
+        node_class = self._node_class
+        # last node on every level and its position
+        last = [head]
+        last_pos = [0]
+        pos = 0
+        for value, num in zip(values, self.level_generator.levels(
+                len(values))):
+            pos += 1
+            while len(last) <= num:
+                head.forward.append(tail)
+                head.width.append(1)
+                last.append(head)
+                last_pos.append(0)
+            node = node_class(value, num)
+            last[0].forward[0] = node
+            node.backward = last[0]
+            last[0] = node
+            for level in range(1, num + 1):
+                last[level].forward[level] = node
+                last[level].width[level] = pos - last_pos[level]
+                last[level] = node
+                last_pos[level] = pos
+        # close every level off at the tail
+        last[0].forward[0] = tail
+        tail.backward = last[0]
+        for level in range(1, len(last)):
+            last[level].forward[level] = tail
+            last[level].width[level] = pos + 1 - last_pos[level]
+        self._size = pos
 
     def the_list(self):
         '''
@@ -79,15 +648,12 @@ class Skiplist():
         returns the bottom row of a skiplist, not including the head.
         If empty, return none.
         '''
-        current = self.head_node
-        # find the bottom headnode
-        while current.down_node is not None:
-            current = current.down_node
+        first = self.head_node.forward[0]
         # check if list is empty
-        if isinstance(current.next_node, TailNode):
+        if first is self.tail_node:
             return None
         else:
-            return current.next_node
+            return first
 
     def is_empty(self):
         '''
@@ -97,261 +663,204 @@ class Skiplist():
         '''
         return self.the_list() is None
 
-    def get_num_node(self, p):
+    def get_num_node(self):
         '''
         (skiplist) -> int
-        returns a randomized number using given fixed probability. This will
+        returns a randomized number drawn by the level generator. This will
         represent the number of nodes to be added above the bottom one.
         '''
-        num_of_nodes = 0
-        # increase num_of_nodes until a number greater or equal to .5 is rolled
-        while r.random() < p:
-            num_of_nodes += 1
-        return num_of_nodes
+        return self.level_generator.next_level()
 
     def get_height(self):
         '''
         (skiplist) -> int
         returns the height of the list, with bottom row being height of 0.
         '''
-        temp = self.head_node
-        ret = 0
-        # starts at head, counts until bottom is reached
-        while temp.down_node is not None:
-            ret += 1
-            temp = temp.down_node
-        return ret
+        return len(self.head_node.forward) - 1
 
     def add_height(self, num):
         '''
         (Skiplist, int) -> NoneType
-        adds a number of head nodes above the list, all pointing to tail
-        '''
-        # automatically adds one head pointing to current head
-        temp = HeadNode(self.tail_node, self.head_node)
-        for i in range(num - 1):
-            temp = HeadNode(self.tail_node, temp)
-        # stack of head is created, self.head_node now points to the top
-        self.head_node = temp
-
-    def _add_helper(self, current, value):
-        '''
-        (Skiplist, Node, obj) -> NoneType
-        Adds node inbetween nodes. Only use for when node is to be inserted
-        inbetween Nodes and Nodes, Nodes and TailNodes, or HeadNodes
-        and TailNodes.
-        REQ: current Skiplist height is greater than number of nodes added
-        REQ: Skiplist is not empty
-        '''
-        # base case add node to bottom level of list, down reference is None
-        if ((current.down_node is None) and
-            (isinstance(current, HeadNode) or (current.data <= value)) and
-            ((isinstance(current.next_node, TailNode))
-             or (current.next_node.data >= value))):
-
-            temp = current.next_node
-            current.next_node = Node(value, temp, None)
-            self.added_node = current.next_node
-
-        # base case 2, bottom of list and insert between node and tail
-        elif ((current.down_node is None) and not
-              (isinstance(current, HeadNode)) and (current.data <= value)
-              and (isinstance(current.next_node, TailNode))):
-
-            current.next_node = Node(value, self.tail_node, self.added_node)
-            self.added_node = current.next_node
-
-        # else if node is to be added between headnode and tailnode
-        # meaning there is another level of nodes to be added
-        elif ((isinstance(current, HeadNode)) and
-              isinstance(current.next_node, TailNode)):
-
-            self._add_helper(current.down_node, value)
-            current.next_node = Node(value, self.tail_node, self.added_node)
-            self.added_node = current.next_node
-
-        # else if node is to be inserted between a node and the tail
-        elif (not (isinstance(current, HeadNode)) and (current.data <= value)
-              and (isinstance(current.next_node, TailNode))):
-
-            self._add_helper(current.down_node, value)
-            current.next_node = Node(value, self.tail_node, self.added_node)
-            self.added_node = current.next_node
-
-        # else if node is to be inserted between 2 nodes
-        elif (not(isinstance(current, HeadNode)) and (current.data < value)
-              and (current.next_node.data > value)):
-
-            self._add_helper(current.down_node, value)
-            temp = current.next_node
-            current.next_node = Node(value, temp, self.added_node)
-            self.added_node = current.next_node
-
-        # else if current position is to be moved right
-        elif (((not (isinstance(current.next_node, TailNode))) or
-               (current.data < value)) and
-              (current.next_node.data <= value)):
-            self._add_helper(current.next_node, value)
-
-        else:  # if none of above apply, go down to the lower node
-            self._add_helper(current.down_node, value)
-
-    def _add_helper_empty_list(self, current, value):
-        '''
-        (Skiplist, obj, Node, int) -> NoneType
-        Populates empty skiplist.
-        REQ: skiplist height is the same as the number of nodes to be added
-        REQ: skiplist is empty
-        '''
-        # base case add node to the bottom
-        if current.down_node is None:
-            current.next_node = Node(value, self.tail_node, None)
-            self.added_node = current.next_node
-
-        # else recurse and stack the nodes on top
-        else:
-            self._add_helper_empty_list(current.down_node, value)
-            current.next_node = Node(value, self.tail_node, self.added_node)
-            self.added_node = current.next_node
-
-    def check_node_after_head(self, value):
+        adds a number of levels to the head, all pointing to tail
         '''
-        (Skiplist, obj) -> bool
-        checks if value to be added is less than or equal to the first node
-        int the list
-        REQ: skiplist is not empty
-        '''
-        first_node = self.the_list()
-        return (first_node.data >= value)
+        # every new level spans the whole list
+        for i in range(num):
+            self.head_node.forward.append(self.tail_node)
+            self.head_node.width.append(self._size + 1)
 
-    def _add_helper_after_head(self, current, value):
+    def _find_predecessors(self, value):
         '''
-        (Skiplist, obj, Node, int) -> NoneType
-        Adds nodes right after the head nodes.
-        REQ: skiplist height is the same as the number of nodes to be added
-        REQ: skiplist is not empty
+        (Skiplist, obj) -> (list of Node, list of int)
+        Walks down from the head once and returns the last node before
+        value on every level together with its position (the head is at 0),
+        both indexed by level with the bottom row at 0.
         '''
-        # base case add node to the bottom
-        if not isinstance(current.down_node, HeadNode):
-            temp = current.next_node
-            current.next_node = Node(value, current.next_node, None)
-            current.next_node.next_node = temp
-            self.added_node = current.next_node
-
-        # else recurse and add the nodes right after the head
-        else:
-            self._add_helper_after_head(current.down_node, value)
-            temp = current.next_node
-            current.next_node = Node(value, temp, self.added_node)
-            current.next_node.next_node = temp
-            self.added_node = current.next_node
+        height = len(self.head_node.forward) - 1
+        update = [None] * (height + 1)
+        rank = [0] * (height + 1)
+        pos = 0
+        tail = self.tail_node
+        current = self.head_node
+        for level in range(height, -1, -1):
+            # move right while the next node is still smaller than value
+            next_n = current.forward[level]
+            while next_n is not tail and next_n.data < value:
+                pos += current.width[level]
+                current = next_n
+                next_n = current.forward[level]
+            update[level] = current
+            rank[level] = pos
+        return update, rank
 
     def insert(self, value):
         '''
         (SkipList, obj) -> None
         adds a node with value to the skiplist.
         '''
+        update, rank = self._find_predecessors(value)
+        self._insert_at(value, update, rank)
+
+    def _insert_at(self, value, update, rank):
+        '''
+        (Skiplist, obj, list of Node, list of int) -> NoneType
+        adds a node with value after its predecessors in update, whose
+        positions are in rank. update and rank grow with the head.
+        '''
         # do the random thing and find the number of nodes to be added
-        self._num = self.get_num_node(self._f_probability)
+        num = self.get_num_node()
 
-        # add heads pointing to tail if current height is less than the
+        # add levels pointing to tail if current height is less than the
         # number of nodes to be added, if not do nothing
-        heads_to_be_added = self._num - self.get_height()
+        heads_to_be_added = num - self.get_height()
         if heads_to_be_added > 0:
             self.add_height(heads_to_be_added)
+            update.extend([self.head_node] * heads_to_be_added)
+            rank.extend([0] * heads_to_be_added)
+        self._splice(update, rank, self._node_class(value, num))
 
-        # scroll down to the head node level where nodes are to be added
-        self.current = self.head_node
-        for i in range(self.get_height() - self._num):
-            self.current = self.current.down_node
-
-        # check if list is empty, add nodes if they are
-        if self.is_empty():
-            self._add_helper_empty_list(self.head_node, value)
-
-        # else check if node to be added needs to be added right after headNode
-        elif (self.check_node_after_head(value)):
-            self._add_helper_after_head(self.current, value)
+    def _splice(self, update, rank, node):
+        '''
+        (Skiplist, list of Node, list of int, Node) -> NoneType
+        Links node in after its predecessors in update, whose positions are
+        in rank, on every level of its tower and widens the links above it.
+        REQ: update reaches at least as high as the tower of node
+        '''
+        num = len(node.forward) - 1
+        pos = rank[0] + 1
+        node.forward[0] = update[0].forward[0]
+        node.backward = update[0]
+        update[0].forward[0] = node
+        node.forward[0].backward = node
+        for level in range(1, num + 1):
+            pred = update[level]
+            node.forward[level] = pred.forward[level]
+            node.width[level] = rank[level] + pred.width[level] + 1 - pos
+            pred.forward[level] = node
+            pred.width[level] = pos - rank[level]
+        # links above the tower now span one more node
+        for level in range(num + 1, len(update)):
+            update[level].width[level] += 1
+        self._size += 1
+        self._version += 1
 
-        # else check if there are no heads and tails above everything else,
-        # if true run _add_helper so that it points to the next node (not head)
-        elif (not (isinstance(self.head_node.next_node, TailNode)) and
-              (self.head_node.next_node.data < value)):
-            self._add_helper(self.current.next_node, value)
+    def print_helper(self, level):
+        '''
+        (Skiplist, int) -> str
+        helper to print one level of a Skiplist.
+        '''
+        ret = io.StringIO()
+        self._render_level(ret, level, None)
+        return ret.getvalue()
 
-        # else use _add_helper and hopefully it works
-        # case where there are heads above list
-        else:
-            self._add_helper(self.current, value)
+    def _render_level(self, stream, level, max_items):
+        '''
+        (Skiplist, text file, int, int) -> NoneType
+        Writes one level of the skiplist to stream as head -> ... -> tail.
+        After max_items nodes, writes how many values of the bottom row are
+        left out instead of the rest of the level.
+        '''
+        tail = self.tail_node
+        chunk = ["head"]
+        written = 0
+        pos = 0
+        current = self.head_node
+        while current.forward[level] is not tail:
+            if written == max_items:
+                chunk.append("...(" + str(self._size - pos) + " more)")
+                break
+            pos += current.width[level]
+            current = current.forward[level]
+            chunk.append(str(current.data))
+            written += 1
+            if len(chunk) == _RENDER_CHUNK:
+                stream.write(" -> ".join(chunk) + " -> ")
+                chunk = []
+        chunk.append("tail")
+        stream.write(" -> ".join(chunk))
 
-    def print_helper(self, current):
+    def render(self, stream, max_items=None, levels=False):
         '''
-        (Skiplist, Node) -> NoneType
-        helper to print a representation of a Skiplist.
-        '''
-        # base case bottom head node
-        if isinstance(current, HeadNode) and current.down_node is None:
-            while current is not None:
-                if isinstance(current, TailNode):
-                    self.ret += " -> tail"
-                elif isinstance(current, HeadNode):
-                    self.ret += "head"
-                elif isinstance(current, Node):
-                    self.ret += " -> " + str(current.data)
-                current = current.next_node
-        else:  # recurse
-            while current is not None:
-                if isinstance(current, TailNode):
-                    self.ret += " -> tail" + "\n"
-                elif isinstance(current, HeadNode):
-                    self.ret += "head"
-                elif isinstance(current, Node):
-                    self.ret += " -> " + str(current.data)
-                current = current.next_node
-            self.current_print = self.current_print.down_node
-            self.print_helper(self.current_print)
+        (Skiplist, text file, int, bool) -> NoneType
+        Writes the values of the skiplist to stream in ascending order,
+        separated by commas, a chunk at a time. Only the first max_items are
+        written, followed by the number left out. If levels is True, writes
+        every level from the top down instead, like str does, with at most
+        max_items nodes per level.
+        '''
+        if not levels:
+            write_items(stream, self, len(self), max_items)
+            return
+        for level in range(self.get_height(), -1, -1):
+            self._render_level(stream, level, max_items)
+            if level:
+                stream.write("\n")
 
     def __str__(self):
         '''
         (skiplist) -> str
         returns a representation of a Skiplist.
         '''
-        self.ret = ""
-        self.current_print = self.head_node
-        self.print_helper(self.head_node)
-        return self.ret
+        ret = io.StringIO()
+        self.render(ret, levels=True)
+        return ret.getvalue()
 
-    def _search_helper(self, current, value):
+    def enable_stats(self, callback=None):
         '''
-        (Skiplist, Node, obj) -> Node or None
-        Searches for the value in the skiplist. If value is not found,
-        None is returned. Otherwise, the node right before the value
-        is returned.
+        (Skiplist, function) -> SkiplistStats
+        Starts counting node hops, comparisons and latency of every
+        operation and returns the counters. callback, if given, is called as
+        callback(operation, seconds) after every operation. The counting
+        methods are bound on this instance only, so a skiplist without stats
+        runs the plain methods at full speed.
         '''
-        # case where current is at bottom, and needs to be moved right
-        if ((current.down_node is None) and not
-            (isinstance(current.next_node, TailNode))
-             and (current.next_node.data < value)):
-            return self._search_helper(current.next_node, value)
-
-        # base case bottom level of list and item is not found
-        elif ((current.down_node is None) and
-              ((isinstance(current.next_node, TailNode)) or
-               (current.next_node.data != value))):
-            return None
-
-        # else if base case 2, item is found
-        elif (current.next_node.data == value):
-            return current
+        self.disable_stats()
+        stats = SkiplistStats(self, callback)
+        self.stats = stats
+        self._find_predecessors = stats.find_predecessors
+        self._descend = stats.descend
+        for name in SkiplistStats.OPERATIONS:
+            if name == 'search' and type(self).search is Skiplist.search:
+                method = stats.search
+            else:
+                method = getattr(type(self), name).__get__(self)
+            setattr(self, name, stats.wrap(name, method))
+        return stats
 
-        # else if current needs to be moved right.
-        elif (((isinstance(current, HeadNode)) or (current.data < value))
-              and not (isinstance(current.next_node, TailNode)) and
-              (current.next_node.data < value)):
-            return self._search_helper(current.next_node, value)
+    def disable_stats(self):
+        '''
+        (Skiplist) -> NoneType
+        Stops counting and goes back to the plain methods.
+        '''
+        for name in ('stats', '_find_predecessors', '_descend') + \
+                SkiplistStats.OPERATIONS:
+            self.__dict__.pop(name, None)
 
-        else:  # if none of above apply, go down to the lower node
-            return self._search_helper(current.down_node, value)
+    def finger(self):
+        '''
+        (Skiplist) -> Finger
+        Returns a new finger on the skiplist, see Finger.
+        '''
+        return self._finger_class(self)
 
     def search(self, value):
         '''
@@ -359,57 +868,638 @@ class Skiplist():
         Returns true if value can be found in skiplist. Otherwise, False is
         returned.
         '''
-        if self.is_empty():
-            return False
-        elif isinstance(self._search_helper(self.head_node, value), Node):
-            return True
+        tail = self.tail_node
+        current = self.head_node
+        for level in range(len(current.forward) - 1, -1, -1):
+            next_n = current.forward[level]
+            while next_n is not tail and next_n.data < value:
+                current = next_n
+                next_n = current.forward[level]
+            # stop as soon as any level holds the value
+            if next_n is not tail and next_n.data == value:
+                return True
+        return False
+
+    def guillotine(self, current):
+        '''
+        (Skiplist, Node) -> NoneType
+        chops off all levels of the head that point straight to tail
+        REQ: current MUST point to head of list
+        '''
+        while (len(current.forward) > 1 and
+               current.forward[-1] is self.tail_node):
+            current.forward.pop()
+            current.width.pop()
+
+    def remove(self, value):
+        '''
+        (Skiplist, obj) -> NoneType
+        removes one row (instance) of the value from skiplist.
+        '''
+        self._remove_at(value, self._find_predecessors(value)[0])
+
+    def insert_many(self, values):
+        '''
+        (Skiplist, iterable) -> NoneType
+        adds every one of values to the skiplist. The values are sorted once
+        and inserted left to right by one finger, so each descent starts
+        from the predecessors of the value before it.
+        '''
+        finger = self.finger()
+        for value in sorted(values):
+            finger.insert(value)
+
+    def remove_many(self, values):
+        '''
+        (Skiplist, iterable) -> NoneType
+        removes one occurrence of every one of values from the skiplist, in
+        one left to right sweep like insert_many. Values that are not
+        present are skipped.
+        '''
+        finger = self.finger()
+        for value in sorted(values):
+            finger.remove(value)
+
+    def contains_many(self, values):
+        '''
+        (Skiplist, iterable) -> list of bool
+        Returns for every one of values, in the order given, whether it can
+        be found in the skiplist. The values are looked up in sorted order
+        in one left to right sweep.
+        '''
+        values = list(values)
+        ret = [False] * len(values)
+        finger = self.finger()
+        for i in sorted(range(len(values)), key=values.__getitem__):
+            ret[i] = finger.search(values[i])
+        return ret
+
+    def _remove_at(self, value, update):
+        '''
+        (Skiplist, obj, list of Node) -> NoneType
+        removes one row (instance) of value, given its predecessors.
+        '''
+        # the first node holding value, nothing to do if there is none
+        target = update[0].forward[0]
+        if target is self.tail_node or target.data != value:
+            return
+        self._unlink(update, target)
+
+    def _unlink(self, update, target):
+        '''
+        (Skiplist, list of Node, Node) -> NoneType
+        Unlinks target from every level of its tower and narrows the links
+        above it.
+        REQ: update holds the predecessors of target on every level
+        '''
+        # the first equal node on the bottom row is also the first one on
+        # every level of its tower, so its predecessors are in update
+        height = len(target.forward)
+        update[0].forward[0] = target.forward[0]
+        target.forward[0].backward = update[0]
+        for level in range(1, height):
+            pred = update[level]
+            pred.width[level] += target.width[level] - 1
+            pred.forward[level] = target.forward[level]
+        # links above the tower span one node less
+        for level in range(height, len(update)):
+            update[level].width[level] -= 1
+        self._size -= 1
+        self._version += 1
+        # remove excess heads
+        self.guillotine(self.head_node)
+
+    def __len__(self):
+        '''
+        (Skiplist) -> int
+        Returns the number of values in the skiplist.
+        uses len()
+        '''
+        return self._size
+
+    def _descend(self, value, inclusive):
+        '''
+        (Skiplist, obj, bool) -> (Node, int)
+        Walks down from the head to the last bottom row node smaller than
+        value, or smaller than or equal to value if inclusive is True.
+        Returns that node and its position (the head is at 0).
+        '''
+        pos = 0
+        tail = self.tail_node
+        current = self.head_node
+        for level in range(len(current.forward) - 1, -1, -1):
+            next_n = current.forward[level]
+            while next_n is not tail and (next_n.data < value or
+                                          (inclusive and
+                                           next_n.data == value)):
+                pos += current.width[level]
+                current = next_n
+                next_n = current.forward[level]
+        return current, pos
+
+    def lower_bound(self, value):
+        '''
+        (Skiplist, obj) -> Node
+        Returns the first bottom row node whose data is not smaller than
+        value, or the tail node if there is none.
+        '''
+        return self._descend(value, False)[0].forward[0]
+
+    def upper_bound(self, value):
+        '''
+        (Skiplist, obj) -> Node
+        Returns the first bottom row node whose data is greater than value,
+        or the tail node if there is none.
+        '''
+        return self._descend(value, True)[0].forward[0]
+
+    def count(self, value):
+        '''
+        (Skiplist, obj) -> int
+        Returns the number of times value occurs in the skiplist.
+        '''
+        # the positions around the run of equal values give its length
+        # without walking it
+        return self._count_before(value, True) - \
+            self._count_before(value, False)
+
+    def _count_before(self, value, inclusive):
+        '''
+        (Skiplist, obj, bool) -> int
+        Returns the number of values smaller than value, or smaller than or
+        equal to value if inclusive is True.
+        '''
+        return self._descend(value, inclusive)[1]
+
+    def rank(self, value):
+        '''
+        (Skiplist, obj) -> int
+        Returns the number of values in the skiplist smaller than value,
+        which is the index value has or would have in the bottom row.
+        '''
+        return self._count_before(value, False)
+
+    def count_range(self, lo, hi):
+        '''
+        (Skiplist, obj, obj) -> int
+        Returns the number of values v in the skiplist with lo <= v <= hi.
+        '''
+        if hi < lo:
+            return 0
+        return self._count_before(hi, True) - self._count_before(lo, False)
+
+    def __getitem__(self, index):
+        '''
+        (Skiplist, int) -> obj
+        Returns the value at position index of the bottom row. Negative
+        indices count from the end.
+        uses []
+        '''
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('Skiplist index out of range')
+        # the head sits at position 0, so the value is at index + 1. Stop
+        # right before the first node reaching that position.
+        target = index + 1
+        pos = 0
+        current = self.head_node
+        for level in range(len(current.forward) - 1, -1, -1):
+            while pos + current.width[level] < target:
+                pos += current.width[level]
+                current = current.forward[level]
+        return current.forward[0].data
+
+    def __iter__(self):
+        '''
+        (Skiplist) -> iterator
+        Yields every value of the bottom row in ascending order.
+        '''
+        tail = self.tail_node
+        current = self.head_node.forward[0]
+        while current is not tail:
+            yield current.data
+            current = current.forward[0]
+
+    def __reversed__(self):
+        '''
+        (Skiplist) -> iterator
+        Yields every value of the bottom row in descending order.
+        '''
+        head = self.head_node
+        current = self.tail_node.backward
+        while current is not head:
+            yield current.data
+            current = current.backward
+
+    def runs(self):
+        '''
+        (Skiplist) -> iterator
+        Yields (value, count) for every distinct value in ascending order.
+        '''
+        tail = self.tail_node
+        current = self.head_node.forward[0]
+        while current is not tail:
+            value = current.data
+            count = 0
+            while current is not tail and current.data == value:
+                count += 1
+                current = current.forward[0]
+            yield value, count
+
+    def irange(self, lo=None, hi=None, inclusive=(True, True),
+               reverse=False):
+        '''
+        (Skiplist, obj, obj, (bool, bool), bool) -> iterator
+        Yields the values between lo and hi in ascending order, or in
+        descending order if reverse is True. inclusive says whether lo and
+        hi themselves are included, and a bound of None is left open. Only
+        the nodes in the range are visited after one descent to its start.
+        REQ: the skiplist is not changed while the iterator is in use
+        '''
+        if reverse:
+            return self._irange_reverse(lo, hi, inclusive)
+        return self._irange_forward(lo, hi, inclusive)
+
+    def _irange_forward(self, lo, hi, inclusive):
+        '''
+        (Skiplist, obj, obj, (bool, bool)) -> iterator
+        Generator behind irange walking forwards from lo.
+        '''
+        tail = self.tail_node
+        if lo is None:
+            current = self.head_node.forward[0]
         else:
-            return False
+            current = self._descend(lo, not inclusive[0])[0].forward[0]
+        while current is not tail:
+            if hi is not None and (hi < current.data or
+                                   (not inclusive[1] and
+                                    current.data == hi)):
+                return
+            yield current.data
+            current = current.forward[0]
 
-    def remove_helper(self, current, value):
+    def _irange_reverse(self, lo, hi, inclusive):
         '''
-        (SKiplist, Node, obj) -> NoneType
-        removes one row (instance) of value from skiplist.
-        REQ: value is in the list
-        REQ: current points to the node that points to the value
+        (Skiplist, obj, obj, (bool, bool)) -> iterator
+        Generator behind irange walking backwards from hi.
         '''
-        # base case, bottom of list, current's next node is found
-        if ((current.down_node is None) and (current.next_node.data == value)):
-            current.next_node = current.next_node.next_node
+        head = self.head_node
+        if hi is None:
+            current = self.tail_node.backward
+        else:
+            current = self._descend(hi, inclusive[1])[0]
+        while current is not head:
+            if lo is not None and (current.data < lo or
+                                   (not inclusive[0] and
+                                    current.data == lo)):
+                return
+            yield current.data
+            current = current.backward
 
-        # elif current's next node is value, remove, recurse down
-        elif (current.next_node.data == value):
-            self.remove_helper(current.down_node, value)
-            current.next_node = current.next_node.next_node
 
-        # elif current's next node is smaller than value, recurse right
-        elif (current.next_node.data < value):
-            self.remove_helper(current.next_node, value)
+class CountedSkiplist(Skiplist):
+    '''
+    A skiplist inheriting from Skiplist that stores equal values run-length
+    encoded: one CountedNode per distinct value together with how often it
+    occurs. Link widths count occurrences, so len(), rank(), count_range()
+    and indexing behave as if every occurrence had its own node, while
+    insert, remove and count on a value already present take O(log d) time
+    in the number d of distinct values.
+    REQ: Data types are comparable
+    '''
+
+    _node_class = CountedNode
 
-    def guillotine(self, current):
+    def _bulk_load(self, values):
         '''
-        (Skiplist, Node) -> NoneType
-        chops off all heads that point straight to tail
-        REQ: current MUST point to head of list
+        (CountedSkiplist, list) -> NoneType
+        Builds every level from values in a single pass, one node per run
+        of equal values.
+        REQ: skiplist is empty
+        REQ: values is sorted
+        '''
+        distinct = []
+        counts = []
+        i = 0
+        while i < len(values):
+            value = values[i]
+            # find the end of the run of values equal to this one
+            j = i + 1
+            while j < len(values) and values[j] == value:
+                j += 1
+            distinct.append(value)
+            counts.append(j - i)
+            i = j
+        self._bulk_load_runs(distinct, counts)
+
+    def copy(self):
+        '''
+        (CountedSkiplist) -> CountedSkiplist
+        Returns a new skiplist holding the same values, sharing no nodes,
+        built in one pass over the runs. Tower heights are drawn again.
+        '''
+        values = []
+        counts = []
+        for value, count in self.runs():
+            values.append(value)
+            counts.append(count)
+        return self.from_runs(values, counts, self.level_generator)
+
+    def _bulk_load_runs(self, values, counts):
+        '''
+        (CountedSkiplist, list, list of int) -> NoneType
+        Builds every level in a single pass, one node per run.
+        REQ: skiplist is empty
+        REQ: values is sorted without repeats
+        REQ: every count is positive
+        '''
+        tail = self.tail_node
+        head = self.head_node
+        # last node on every level and its position
+        last = [head]
+        last_pos = [0]
+        pos = 0
+        for value, count, num in zip(values, counts,
+                                     self.level_generator.levels(
+                                         len(values))):
+            pos += count
+            while len(last) <= num:
+                head.forward.append(tail)
+                head.width.append(1)
+                last.append(head)
+                last_pos.append(0)
+            node = CountedNode(value, num, count)
+            node.backward = last[0]
+            for level in range(num + 1):
+                last[level].forward[level] = node
+                last[level].width[level] = pos - last_pos[level]
+                last[level] = node
+                last_pos[level] = pos
+        # close every level off at the tail
+        tail.backward = last[0]
+        for level in range(len(last)):
+            last[level].forward[level] = tail
+            last[level].width[level] = pos + 1 - last_pos[level]
+        self._size = pos
+
+    def insert(self, value):
+        '''
+        (CountedSkiplist, obj) -> NoneType
+        adds an occurrence of value to the skiplist.
+        '''
+        update, rank = self._find_predecessors(value)
+        self._insert_at(value, update, rank)
+
+    def _insert_at(self, value, update, rank):
+        '''
+        (CountedSkiplist, obj, list of Node, list of int) -> NoneType
+        adds an occurrence of value after its predecessors in update, only
+        adding a node if value is not present yet.
         '''
-        # base case if only one level of list
-        if ((current.down_node is None) and
-            (isinstance(current.next_node,
-                        TailNode))):
-            self.head_node = current
-        elif not isinstance(current.next_node, TailNode):
-            self.head_node = current
+        node = update[0].forward[0]
+        if node is not self.tail_node and node.data == value:
+            # every link on the way down spans the node
+            node.count += 1
+            for level in range(len(update)):
+                update[level].width[level] += 1
+            self._size += 1
+            self._version += 1
         else:
-            self.guillotine(current.down_node)
+            Skiplist._insert_at(self, value, update, rank)
+
+    def _splice(self, update, rank, node):
+        '''
+        (CountedSkiplist, list of Node, list of int, CountedNode) -> NoneType
+        Links node in like Skiplist._splice, also keeping the bottom row
+        widths, which hold the counts of the next nodes.
+        REQ: node.count is 1
+        '''
+        node.width[0] = update[0].width[0]
+        update[0].width[0] = 1
+        Skiplist._splice(self, update, rank, node)
 
     def remove(self, value):
         '''
-        (Skiplist, obj) -> NoneType
-        removes one row (instance) of the value from skiplist.
+        (CountedSkiplist, obj) -> NoneType
+        removes one occurrence of value from the skiplist.
+        '''
+        self._remove_at(value, self._find_predecessors(value)[0])
+
+    def _remove_at(self, value, update):
+        '''
+        (CountedSkiplist, obj, list of Node) -> NoneType
+        removes one occurrence of value, given its predecessors.
+        '''
+        target = update[0].forward[0]
+        if target is self.tail_node or target.data != value:
+            return
+        if target.count > 1:
+            target.count -= 1
+            for level in range(len(update)):
+                update[level].width[level] -= 1
+            self._size -= 1
+            self._version += 1
+        else:
+            self._unlink(update, target)
+
+    def _unlink(self, update, target):
+        '''
+        (CountedSkiplist, list of Node, CountedNode) -> NoneType
+        Unlinks target like Skiplist._unlink, also keeping the bottom row
+        widths.
+        REQ: target.count is 1
+        '''
+        update[0].width[0] = target.width[0]
+        Skiplist._unlink(self, update, target)
+
+    def count(self, value):
+        '''
+        (CountedSkiplist, obj) -> int
+        Returns the number of times value occurs in the skiplist.
+        '''
+        node = self.lower_bound(value)
+        if node is self.tail_node or node.data != value:
+            return 0
+        return node.count
+
+    def __iter__(self):
+        '''
+        (CountedSkiplist) -> iterator
+        Yields every occurrence of every value in ascending order.
+        '''
+        return self._irange_forward(None, None, (True, True))
+
+    def __reversed__(self):
+        '''
+        (CountedSkiplist) -> iterator
+        Yields every occurrence of every value in descending order.
+        '''
+        return self._irange_reverse(None, None, (True, True))
+
+    def runs(self):
+        '''
+        (CountedSkiplist) -> iterator
+        Yields (value, count) for every distinct value in ascending order.
+        '''
+        tail = self.tail_node
+        current = self.head_node.forward[0]
+        while current is not tail:
+            yield current.data, current.count
+            current = current.forward[0]
+
+    def _irange_forward(self, lo, hi, inclusive):
+        '''
+        (CountedSkiplist, obj, obj, (bool, bool)) -> iterator
+        Generator behind irange walking forwards from lo, repeating every
+        value as often as it occurs.
+        '''
+        tail = self.tail_node
+        if lo is None:
+            current = self.head_node.forward[0]
+        else:
+            current = self._descend(lo, not inclusive[0])[0].forward[0]
+        while current is not tail:
+            if hi is not None and (hi < current.data or
+                                   (not inclusive[1] and
+                                    current.data == hi)):
+                return
+            for i in range(current.count):
+                yield current.data
+            current = current.forward[0]
+
+    def _irange_reverse(self, lo, hi, inclusive):
+        '''
+        (CountedSkiplist, obj, obj, (bool, bool)) -> iterator
+        Generator behind irange walking backwards from hi, repeating every
+        value as often as it occurs.
+        '''
+        head = self.head_node
+        if hi is None:
+            current = self.tail_node.backward
+        else:
+            current = self._descend(hi, inclusive[1])[0]
+        while current is not head:
+            if lo is not None and (current.data < lo or
+                                   (not inclusive[0] and
+                                    current.data == lo)):
+                return
+            for i in range(current.count):
+                yield current.data
+            current = current.backward
+
+
+class LazySkiplist(CountedSkiplist):
+    '''
+    A CountedSkiplist inheriting class that deletes lazily. remove only
+    lowers the count of a node in one descent, and a node whose count drops
+    to 0 stays linked as a tombstone that readers skip, since it spans no
+    positions. compact unlinks tombstones a bounded number at a time, and
+    remove runs a few compaction steps itself once tombstones outnumber the
+    values. Inserting a value whose tombstone is still linked revives it.
+    REQ: Data types are comparable
+    '''
+
+    _finger_class = LazyFinger
+    # tombstones unlinked by a remove once they outnumber the values
+    compact_steps = 2
+
+    def __init__(self, *args, levels=None):
+        '''
+        (LazySkiplist, optional arguments, LevelGenerator) -> NoneType
+        Initializes a skiplist without tombstones, see Skiplist.
+        '''
+        # nodes whose count dropped to 0, possibly revived or unlinked since
+        self._dead = []
+        CountedSkiplist.__init__(self, *args, levels=levels)
+
+    def _remove_at(self, value, update):
+        '''
+        (LazySkiplist, obj, list of Node) -> NoneType
+        removes one occurrence of value, given its predecessors, leaving a
+        tombstone when it was the last one.
+        '''
+        target = update[0].forward[0]
+        if (target is self.tail_node or target.data != value or
+                not target.count):
+            return
+        target.count -= 1
+        for level in range(len(update)):
+            update[level].width[level] -= 1
+        self._size -= 1
+        self._version += 1
+        if not target.count:
+            self._dead.append(target)
+
+    def remove(self, value):
+        '''
+        (LazySkiplist, obj) -> NoneType
+        removes one occurrence of value from the skiplist, then runs a few
+        compaction steps if tombstones outnumber the values.
+        '''
+        self._remove_at(value, self._find_predecessors(value)[0])
+        self._compact_if_dead()
+
+    def _compact_if_dead(self):
+        '''
+        (LazySkiplist) -> NoneType
+        Runs compact_steps compaction steps if tombstones outnumber the
+        values.
+        '''
+        if len(self._dead) > self._size:
+            self.compact(self.compact_steps)
+
+    def compact(self, max_steps=None):
+        '''
+        (LazySkiplist, int) -> int
+        Unlinks up to max_steps tombstones, or all of them if max_steps is
+        None, then chops off the levels of the head left empty. Returns the
+        number of tombstones still waiting.
+        '''
+        steps = 0
+        while self._dead and (max_steps is None or steps < max_steps):
+            target = self._dead.pop()
+            steps += 1
+            if target.count:
+                continue
+            update = self._find_predecessors(target.data)[0]
+            # it may have been unlinked already after dying twice
+            if update[0].forward[0] is target:
+                self._unlink_dead(update, target)
+        self.guillotine(self.head_node)
+        return len(self._dead)
+
+    def _unlink_dead(self, update, target):
+        '''
+        (LazySkiplist, list of Node, CountedNode) -> NoneType
+        Unlinks the tombstone target from every level of its tower. It spans
+        no positions, so the links above it keep their widths.
+        REQ: update holds the predecessors of target on every level
+        REQ: target.count is 0
+        '''
+        update[0].width[0] = target.width[0]
+        update[0].forward[0] = target.forward[0]
+        target.forward[0].backward = update[0]
+        for level in range(1, len(target.forward)):
+            pred = update[level]
+            pred.width[level] += target.width[level]
+            pred.forward[level] = target.forward[level]
+        self._version += 1
+
+    def search(self, value):
+        '''
+        (LazySkiplist, obj) -> bool
+        Returns true if value can be found in skiplist. Otherwise, False is
+        returned. Tombstones are not found.
+        '''
+        return self.count(value) > 0
+
+    def runs(self):
+        '''
+        (LazySkiplist) -> iterator
+        Yields (value, count) for every distinct value in ascending order,
+        skipping tombstones.
         '''
-        found_node = self._search_helper(self.head_node, value)
-        # removes node only if it's found
-        if self.search(value):
-            self.remove_helper(found_node, value)
-            # remove excess heads
-            self.guillotine(self.head_node)
+        for value, count in CountedSkiplist.runs(self):
+            if count:
+                yield value, count
@@ -0,0 +1,292 @@
+import io
+import skiplist as sl
+
+
+class MapNode(sl.Node):
+    '''
+    A node inheriting from Node that carries a payload next to its key,
+    which is kept in data.
+    '''
+
+    __slots__ = ('value',)
+
+    def __init__(self, key, level):
+        '''
+        (MapNode, object, int) -> NoneType
+        Initializes a node with key, no payload yet and a tower of level + 1
+        empty 'next' references.
+        '''
+        sl.Node.__init__(self, key, level)
+        self.value = None
+
+
+class _MapSkiplist(sl.Skiplist):
+    '''
+    The skiplist behind a SkipListMap, holding one MapNode per key.
+    '''
+
+    _node_class = MapNode
+
+
+class SkipListMap():
+    '''
+    A sorted map from keys to values on the Skiplist engine. Every key is
+    one node holding its value, so lookups, updates, deletions and finding
+    the neighbours of a key take O(log n), and the items are always in key
+    order.
+    REQ: Keys are comparable
+    '''
+
+    # items shown by repr, None shows all of them
+    repr_max_items = 1000
+
+    def __init__(self, items=(), levels=None):
+        '''
+        (SkipListMap, mapping or iterable of pairs, sl.LevelGenerator)
+        -> NoneType
+        Initializes a map holding items, the last value given for a key
+        winning. The items are sorted once and the skiplist is built in
+        linear time. levels draws the tower heights, see sl.LevelGenerator.
+        '''
+        if hasattr(items, 'items'):
+            items = items.items()
+        # a stable sort keeps the later of equal keys last
+        pairs = sorted(items, key=lambda pair: pair[0])
+        unique = []
+        for key, value in pairs:
+            if unique and unique[-1][0] == key:
+                unique[-1] = (key, value)
+            else:
+                unique.append((key, value))
+        self._slist = _MapSkiplist(levels=levels)
+        self._load(unique)
+
+    def _load(self, pairs):
+        '''
+        (SkipListMap, list of tuple) -> NoneType
+        Builds the skiplist from pairs in one pass.
+        REQ: the map is empty
+        REQ: pairs is sorted by key without repeated keys
+        '''
+        self._slist._bulk_load([key for key, value in pairs])
+        current = self._slist.head_node.forward[0]
+        for key, value in pairs:
+            current.value = value
+            current = current.forward[0]
+
+    def _node(self, key):
+        '''
+        (SkipListMap, obj) -> MapNode
+        Returns the node holding key.
+        Raises KeyError if key is not in the map.
+        '''
+        node = self._slist.lower_bound(key)
+        if node is self._slist.tail_node or node.data != key:
+            raise KeyError(key)
+        return node
+
+    def __getitem__(self, key):
+        '''
+        (SkipListMap, obj or slice) -> obj or SkipListMap
+        Returns the value of key. A slice lo:hi returns a new map holding
+        the items with keys from lo up to but not including hi, a bound of
+        None being left open.
+        Raises KeyError if key is not in the map.
+        uses []
+        '''
+        if isinstance(key, slice):
+            if key.step is not None:
+                raise ValueError('SkipListMap slices take no step')
+            ret = SkipListMap(levels=self._slist.level_generator)
+            ret._load(list(self.items(key.start, key.stop, (True, False))))
+            return ret
+        return self._node(key).value
+
+    def get(self, key, default=None):
+        '''
+        (SkipListMap, obj, obj) -> obj
+        Returns the value of key, or default if key is not in the map.
+        '''
+        node = self._slist.lower_bound(key)
+        if node is self._slist.tail_node or node.data != key:
+            return default
+        return node.value
+
+    def __setitem__(self, key, value):
+        '''
+        (SkipListMap, obj, obj) -> NoneType
+        Sets the value of key, adding key if it is not in the map.
+        uses []
+        '''
+        slist = self._slist
+        update, rank = slist._find_predecessors(key)
+        node = update[0].forward[0]
+        if node is slist.tail_node or node.data != key:
+            slist._insert_at(key, update, rank)
+            node = update[0].forward[0]
+        node.value = value
+
+    def __delitem__(self, key):
+        '''
+        (SkipListMap, obj) -> NoneType
+        Removes key and its value from the map.
+        Raises KeyError if key is not in the map.
+        uses del
+        '''
+        slist = self._slist
+        update = slist._find_predecessors(key)[0]
+        target = update[0].forward[0]
+        if target is slist.tail_node or target.data != key:
+            raise KeyError(key)
+        slist._unlink(update, target)
+
+    def pop(self, key, *default):
+        '''
+        (SkipListMap, obj, optional obj) -> obj
+        Removes key and returns its value, or returns default if key is not
+        in the map and a default is given.
+        Raises KeyError if key is not in the map and no default is given.
+        '''
+        slist = self._slist
+        update = slist._find_predecessors(key)[0]
+        target = update[0].forward[0]
+        if target is slist.tail_node or target.data != key:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        slist._unlink(update, target)
+        return target.value
+
+    def __contains__(self, key):
+        '''
+        (SkipListMap, obj) -> bool
+        returns True if and only if key is in the map.
+        uses in
+        '''
+        return self._slist.search(key)
+
+    def __len__(self):
+        '''
+        (SkipListMap) -> int
+        returns the number of keys in the map.
+        uses len()
+        '''
+        return len(self._slist)
+
+    def floor_key(self, key):
+        '''
+        (SkipListMap, obj) -> obj
+        Returns the largest key not greater than key, or None if there is
+        none.
+        '''
+        node = self._slist._descend(key, True)[0]
+        if node is self._slist.head_node:
+            return None
+        return node.data
+
+    def ceiling_key(self, key):
+        '''
+        (SkipListMap, obj) -> obj
+        Returns the smallest key not smaller than key, or None if there is
+        none.
+        '''
+        node = self._slist.lower_bound(key)
+        if node is self._slist.tail_node:
+            return None
+        return node.data
+
+    def index(self, key):
+        '''
+        (SkipListMap, obj) -> int
+        Returns the number of keys smaller than key.
+        '''
+        return self._slist.rank(key)
+
+    def peekitem(self, index=-1):
+        '''
+        (SkipListMap, int) -> (obj, obj)
+        Returns the item at position index in key order, the last one by
+        default.
+        Raises IndexError if index is out of range.
+        '''
+        key = self._slist[index]
+        return key, self._node(key).value
+
+    def __iter__(self):
+        '''
+        (SkipListMap) -> iterator
+        Yields every key in ascending order.
+        '''
+        return iter(self._slist)
+
+    def __reversed__(self):
+        '''
+        (SkipListMap) -> iterator
+        Yields every key in descending order.
+        '''
+        return reversed(self._slist)
+
+    def keys(self):
+        '''
+        (SkipListMap) -> iterator
+        Yields every key in ascending order.
+        '''
+        return iter(self._slist)
+
+    def values(self):
+        '''
+        (SkipListMap) -> iterator
+        Yields the value of every key in key order.
+        '''
+        for key, value in self.items():
+            yield value
+
+    def items(self, lo=None, hi=None, inclusive=(True, True)):
+        '''
+        (SkipListMap, obj, obj, (bool, bool)) -> iterator
+        Yields (key, value) for every key between lo and hi in ascending
+        order. inclusive says whether lo and hi themselves are included, and
+        a bound of None is left open. Only the nodes in the range are
+        visited after one descent to its start.
+        REQ: the map is not changed while the iterator is in use
+        '''
+        slist = self._slist
+        tail = slist.tail_node
+        if lo is None:
+            current = slist.head_node.forward[0]
+        else:
+            current = slist._descend(lo, not inclusive[0])[0].forward[0]
+        while current is not tail:
+            if hi is not None and (hi < current.data or
+                                   (not inclusive[1] and
+                                    current.data == hi)):
+                return
+            yield current.data, current.value
+            current = current.forward[0]
+
+    def __eq__(self, map2):
+        '''
+        (SkipListMap, SkipListMap) -> bool
+        Returns True if and only if both maps hold the same items.
+        '''
+        if len(self) != len(map2):
+            return False
+        for item1, item2 in zip(self.items(), map2.items()):
+            if item1 != item2:
+                return False
+        return True
+
+    def __repr__(self):
+        '''
+        (SkipListMap) -> str
+        returns a string representation of the map, showing only the first
+        repr_max_items items.
+        uses repr()
+        '''
+        ret = io.StringIO()
+        ret.write("SkipListMap({")
+        sl.write_items(ret, (repr(key) + ": " + repr(value)
+                             for key, value in self.items()),
+                       len(self), self.repr_max_items)
+        ret.write("})")
+        return ret.getvalue()
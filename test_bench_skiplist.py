@@ -0,0 +1,43 @@
+import unittest
+import bench_skiplist as b
+
+
+class TestBenchSkiplist(unittest.TestCase):
+
+    def test_run_records(self):
+        records = b.run([50], ['random', 'duplicate'], ['skiplist', 'bisect'],
+                        20, 0)
+        self.assertEqual(len(records), 2 * 2 * len(b.OPERATIONS),
+                         "One record per target, distribution and operation.")
+        self.assertEqual(set(records[0]), {'target', 'operation',
+                                           'distribution', 'size', 'ops',
+                                           'seconds', 'ns_per_op'},
+                         "Records have every field.")
+
+    def test_targets_agree(self):
+        targets = b.make_targets(['skiplist', 'compressed', 'plain',
+                                  'bisect'], 0)
+        keys = b.make_keys('duplicate', 100, b.r.Random(1))
+        results = []
+        for target in targets.values():
+            s = target.build(keys)
+            target.insert(s, 3)
+            target.remove(s, 5)
+            results.append((target.count(s, 3), target.rank(s, 7),
+                            list(target.intersection(s, target.build([3])))))
+        self.assertEqual(results[0], results[1], "Targets agree.")
+        self.assertEqual(results[0], results[2], "Targets agree.")
+        self.assertEqual(results[0], results[3], "Targets agree.")
+
+    def test_bench_sharded(self):
+        records = b.bench_sharded(200, 2, 4, 0)
+        self.assertEqual({(record['target'], record['operation'])
+                          for record in records},
+                         {(target, operation)
+                          for target in ('multiset', 'sharded',
+                                         'sharded_pool')
+                          for operation in ('union', 'difference',
+                                            'intersection')},
+                         "One record per target and operation.")
+
+unittest.main(exit=False)
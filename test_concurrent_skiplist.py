@@ -0,0 +1,75 @@
+import threading
+import unittest
+import concurrent_skiplist as cs
+import skiplist as sl
+
+
+class TestConcurrentSkiplist(unittest.TestCase):
+
+    def test_insert_search_remove(self):
+        a = cs.ConcurrentSkiplist(3, 1, 2, 2)
+        self.assertEqual(list(a), [1, 2, 2, 3], "Values in order.")
+        a.remove(2)
+        self.assertEqual(a.search(2), True, "One 2 is left.")
+        a.remove(2)
+        self.assertEqual(a.search(2), False, "Both 2s are removed.")
+        self.assertEqual(len(a), 2, "Length should be 2.")
+
+    def test_remove_missing(self):
+        a = cs.ConcurrentSkiplist(1)
+        a.remove(5)
+        self.assertEqual(list(a), [1], "Nothing is removed.")
+
+    def test_levels_too_tall(self):
+        self.assertRaises(ValueError, cs.ConcurrentSkiplist,
+                          levels=sl.LevelGenerator())
+        a = cs.ConcurrentSkiplist(levels=sl.LevelGenerator(p=0.9,
+                                                           max_level=31))
+        for i in range(200):
+            a.insert(i)
+        self.assertEqual(list(a), list(range(200)), "Tallest towers fit.")
+
+    def test_parallel_inserts(self):
+        a = cs.ConcurrentSkiplist()
+
+        def work(start):
+            for i in range(start, 2000, 4):
+                a.insert(i % 500)
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(a), 2000, "Length should be 2000.")
+        self.assertEqual(list(a), sorted(i % 500 for i in range(2000)),
+                         "Values in order.")
+        self.assertEqual(a.count(7), 4, "4 occurences of 7.")
+
+    def test_parallel_removes_with_readers(self):
+        a = cs.ConcurrentSkiplist(*range(1000))
+        seen = []
+
+        def remove(start):
+            for i in range(start, 1000, 2):
+                a.remove(i)
+
+        removers = [threading.Thread(target=remove, args=(i,))
+                    for i in range(2)]
+
+        def read():
+            # one traversal at a time, each must be in order on its own
+            while any(t.is_alive() for t in removers):
+                values = list(a)
+                seen.append(values == sorted(values))
+        reader = threading.Thread(target=read)
+        for t in removers:
+            t.start()
+        reader.start()
+        for t in removers:
+            t.join()
+        reader.join()
+        self.assertEqual(a.is_empty(), True, "Every value is removed.")
+        self.assertEqual(list(a), [], "Every value is removed.")
+        self.assertEqual(all(seen), True, "Readers see sorted values.")
+
+unittest.main(exit=False)
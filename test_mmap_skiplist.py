@@ -0,0 +1,89 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import mmap_skiplist as ms
+import skiplist as sl
+
+
+class TestMmapSkiplist(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'set.skl')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_insert_search_remove(self):
+        with ms.MmapSkiplist(self.path) as s:
+            for i in (5, 1, 3, 3, 9):
+                s.insert(i)
+            self.assertEqual(list(s), [1, 3, 3, 5, 9], "Values in order.")
+            self.assertEqual(len(s), 5, "Length should be 5.")
+            self.assertEqual(s.count(3), 2, "2 occurences of 3.")
+            self.assertEqual(4 in s, False, "4 is not in skiplist.")
+            s.remove(3)
+            s.remove(3)
+            s.remove(4)
+            self.assertEqual(s.search(3), False, "3 was removed.")
+            self.assertEqual(list(s), [1, 5, 9], "Values in order.")
+
+    def test_reopen(self):
+        with ms.MmapSkiplist(self.path, 'd', 8) as s:
+            for i in range(3000):
+                s.insert(i / 2)
+            s.remove(1.5)
+        with ms.MmapSkiplist(self.path) as s:
+            self.assertEqual(s.key_format, 'd', "Format is stored.")
+            self.assertEqual(len(s), 2999, "Length should be 2999.")
+            self.assertEqual(s.count(1.5), 0, "1.5 was removed.")
+            self.assertEqual(s.search(1499.5), True, "1499.5 is stored.")
+
+    def test_random_against_list(self):
+        rand = random.Random(3)
+        expected = []
+        levels = sl.LevelGenerator(max_level=6, seed=3)
+        with ms.MmapSkiplist(self.path, max_level=6, levels=levels) as s:
+            for i in range(3000):
+                value = rand.randrange(200)
+                if rand.random() < 0.6:
+                    s.insert(value)
+                    expected.append(value)
+                else:
+                    s.remove(value)
+                    if value in expected:
+                        expected.remove(value)
+            expected.sort()
+            self.assertEqual(list(s), expected, "Matches a sorted list.")
+            self.assertEqual(s.count(7), expected.count(7), "Counts agree.")
+
+    def test_fixed_width_keys(self):
+        with ms.MmapSkiplist(self.path, '8s') as s:
+            s.insert(b'pear')
+            s.insert(b'apple')
+            self.assertEqual(b'pear' in s, True, "Short keys are padded.")
+            self.assertEqual(s.count(b'apple'), 1, "1 occurence of apple.")
+
+    def test_bad_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a skiplist at all' * 4)
+        self.assertRaises(ValueError, ms.MmapSkiplist, self.path)
+        os.remove(self.path)
+        ms.MmapSkiplist(self.path, 'q').close()
+        self.assertRaises(ValueError, ms.MmapSkiplist, self.path, 'd')
+        self.assertRaises(ValueError, ms.MmapSkiplist,
+                          os.path.join(self.dir, 'other'), 'qq')
+
+    def test_levels_too_tall(self):
+        levels = sl.LevelGenerator(p=0.9, seed=3)
+        self.assertRaises(ValueError, ms.MmapSkiplist, self.path,
+                          max_level=4, levels=levels)
+        levels = sl.LevelGenerator(p=0.9, max_level=4, seed=3)
+        with ms.MmapSkiplist(self.path, max_level=4, levels=levels) as s:
+            for i in range(200):
+                s.insert(i)
+            self.assertEqual(list(s), list(range(200)), "Towers fit.")
+
+unittest.main(exit=False)
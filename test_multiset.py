@@ -1,5 +1,11 @@
 import unittest
+import bisect
+import copy
+import io
+import pickle
+import random
 import multiset as m
+import skiplist as sl
 
 
 class TestMultiSet(unittest.TestCase):  # repr is not done it's dun now
@@ -411,4 +417,577 @@ class TestMultiSet(unittest.TestCase):  # repr is not done it's dun now
         c = a.isdisjoint(b)
         self.assertEqual(c, True, "Sets are disjoint, one is empty.")
 
+    def test_insert_long_sorted_run(self):
+        a = m.MultiSet(*range(5000))
+        a.remove(2500)
+        self.assertEqual(len(a), 4999, "Length should be 4999.")
+        self.assertEqual(2500 in a, False, "2500 was removed.")
+
+    def test_remove_duplicate_towers(self):
+        a = m.MultiSet(*([7] * 50))
+        for i in range(49):
+            a.remove(7)
+        self.assertEqual(a, m.MultiSet(7), "One 7 should be left.")
+
+    def test_rank_standard(self):
+        a = m.MultiSet(5, 1, 3, 3, 9)
+        self.assertEqual(a.rank(3), 1, "Only 1 is smaller than 3.")
+        self.assertEqual(a.rank(4), 3, "1, 3 and 3 are smaller than 4.")
+        self.assertEqual(a.rank(10), 5, "Every element is smaller.")
+
+    def test_getitem_standard(self):
+        a = m.MultiSet(*range(100, 0, -1))
+        self.assertEqual(a[0], 1, "Smallest element first.")
+        self.assertEqual(a[49], 50, "50th element is 50.")
+        self.assertEqual(a[-1], 100, "Largest element last.")
+
+    def test_getitem_out_of_range(self):
+        a = m.MultiSet(1, 2)
+        self.assertRaises(IndexError, a.__getitem__, 2)
+
+    def test_count_range_standard(self):
+        a = m.MultiSet(1, 2, 2, 3, 5, 8, 8)
+        self.assertEqual(a.count_range(2, 5), 4, "2, 2, 3 and 5.")
+        self.assertEqual(a.count_range(6, 7), 0, "Nothing between 6 and 7.")
+
+    def test_len_after_removals(self):
+        a = m.MultiSet(*range(200))
+        for i in range(0, 200, 2):
+            a.remove(i)
+        self.assertEqual(len(a), 100, "Length should be 100.")
+        self.assertEqual(a[10], 21, "Only odd numbers are left.")
+
+    def test_count_long_run(self):
+        a = m.MultiSet(*([4] * 30 + list(range(100))))
+        self.assertEqual(a.count(4), 31, "31 occurences of 4.")
+        self.assertEqual(a.count(100), 0, "There is no 100.")
+
+    def test_from_iterable_standard(self):
+        a = m.MultiSet.from_iterable([5, 3, 3, 1, 4])
+        b = m.MultiSet(1, 3, 3, 4, 5)
+        self.assertEqual(a, b, "Sets are identical.")
+        self.assertEqual(a[2], 3, "Third element is 3.")
+
+    def test_from_iterable_then_update(self):
+        a = m.MultiSet.from_iterable(range(1000))
+        a.insert(500)
+        a.remove(0)
+        self.assertEqual(len(a), 1000, "Length should be 1000.")
+        self.assertEqual(a.count(500), 2, "2 occurences of 500.")
+        self.assertEqual(a.rank(501), 501, "501 elements below 501.")
+
+    def test_from_iterable_empty(self):
+        a = m.MultiSet.from_iterable([])
+        self.assertEqual(a, m.MultiSet(), "Set is empty.")
+
+    def test_Le_fewer_occurrences(self):
+        a = m.MultiSet(2, 2, 2)
+        b = m.MultiSet(1, 2, 3)
+        c = (a <= b)
+        self.assertEqual(c, False, "b has only one 2.")
+        self.assertEqual(a, m.MultiSet(2, 2, 2), "a is left untouched.")
+
+    def test_add_leaves_operands(self):
+        a = m.MultiSet(1, 2)
+        b = m.MultiSet(2, 3)
+        c = a + b
+        self.assertEqual(a, m.MultiSet(1, 2), "a is left untouched.")
+        self.assertEqual(c, m.MultiSet(1, 2, 2, 3), "Sets are to be joined.")
+
+    def test_subtract_leaves_operands(self):
+        a = m.MultiSet(1, 2, 2, 3)
+        b = m.MultiSet(2)
+        c = a - b
+        self.assertEqual(a, m.MultiSet(1, 2, 2, 3), "a is left untouched.")
+        self.assertEqual(c, m.MultiSet(1, 2, 3), "One 2 is removed.")
+
+    def test_Eadd_both_empty(self):
+        a = m.MultiSet()
+        a += m.MultiSet()
+        self.assertEqual(a, m.MultiSet(), "Both sets are empty.")
+
+    def test_Eadd_large_sets(self):
+        a = m.MultiSet(*range(0, 400, 2))
+        a += m.MultiSet(*range(1, 400, 2))
+        self.assertEqual(a, m.MultiSet(*range(400)), "Sets are joined.")
+
+    def test_iter_standard(self):
+        a = m.MultiSet(3, 1, 2, 2)
+        self.assertEqual(list(a), [1, 2, 2, 3], "Elements in order.")
+        self.assertEqual(list(reversed(a)), [3, 2, 2, 1], "Reverse order.")
+
+    def test_iter_empty(self):
+        a = m.MultiSet()
+        self.assertEqual(list(a), [], "Set is empty.")
+        self.assertEqual(list(reversed(a)), [], "Set is empty.")
+
+    def test_reversed_after_updates(self):
+        a = m.MultiSet(*range(10))
+        a.remove(9)
+        a.remove(4)
+        a.insert(20)
+        expected = [20, 8, 7, 6, 5, 3, 2, 1, 0]
+        self.assertEqual(list(reversed(a)), expected, "Reverse order.")
+
+    def test_irange_standard(self):
+        a = m.MultiSet(1, 2, 2, 3, 5, 8, 8, 9)
+        self.assertEqual(list(a.irange(2, 8)), [2, 2, 3, 5, 8, 8],
+                         "Both bounds are included.")
+        self.assertEqual(list(a.irange(2, 8, (False, False))), [3, 5],
+                         "Both bounds are excluded.")
+        self.assertEqual(list(a.irange(4, None)), [5, 8, 8, 9],
+                         "Upper bound is open.")
+
+    def test_irange_reverse(self):
+        a = m.MultiSet(1, 2, 2, 3, 5, 8, 8, 9)
+        self.assertEqual(list(a.irange(2, 8, reverse=True)),
+                         [8, 8, 5, 3, 2, 2], "Descending order.")
+        self.assertEqual(list(a.irange(2, 8, (False, False), True)), [5, 3],
+                         "Both bounds are excluded.")
+
+    def test_compressed_count(self):
+        a = m.MultiSet(*([3] * 1000 + [1, 2]), compressed=True)
+        self.assertEqual(a.count(3), 1000, "1000 occurences of 3.")
+        self.assertEqual(len(a), 1002, "Length should be 1002.")
+        self.assertEqual(a[1], 2, "Second element is 2.")
+        self.assertEqual(a[-1], 3, "Largest element is 3.")
+
+    def test_compressed_insert_remove(self):
+        a = m.MultiSet(compressed=True)
+        for i in range(5):
+            a.insert(7)
+        a.insert(2)
+        a.remove(7)
+        a.remove(2)
+        self.assertEqual(a.count(7), 4, "4 occurences of 7.")
+        self.assertEqual(2 in a, False, "2 was removed.")
+        self.assertEqual(a, m.MultiSet(7, 7, 7, 7), "Sets are identical.")
+
+    def test_compressed_repr(self):
+        a = m.MultiSet(2, 1, 2, compressed=True)
+        expected = "MultiSet([1, 2, 2])"
+        self.assertEqual(repr(a), expected, "String represention is wrong.")
+
+    def test_compressed_operators_keep_mode(self):
+        a = m.MultiSet(1, 1, 2, compressed=True)
+        b = m.MultiSet(1, 3)
+        c = a + b
+        self.assertEqual(c, m.MultiSet(1, 1, 1, 2, 3), "Sets are joined.")
+        self.assertEqual(c.compressed, True, "Result is compressed.")
+        self.assertEqual(a - b, m.MultiSet(1, 2), "One 1 is removed.")
+
+    def test_levels_same_seed_same_shape(self):
+        a = m.MultiSet(levels=sl.LevelGenerator(seed=7))
+        b = m.MultiSet(levels=sl.LevelGenerator(seed=7))
+        for i in [5, 3, 9, 1, 4, 4, 8]:
+            a.insert(i)
+            b.insert(i)
+        self.assertEqual(str(a.slist), str(b.slist), "Same shape.")
+
+    def test_levels_max_level(self):
+        levels = sl.LevelGenerator(p=0.9, max_level=3, seed=1)
+        a = m.MultiSet.from_iterable(range(500), levels=levels)
+        self.assertEqual(a.slist.get_height() <= 3, True, "Height is capped.")
+        self.assertEqual(list(a), list(range(500)), "Elements in order.")
+
+    def test_levels_batch(self):
+        for p in (0.5, 0.9):
+            levels = sl.LevelGenerator(p=p, max_level=4, seed=2).levels(2000)
+            self.assertEqual(len(levels), 2000, "One level per node.")
+            self.assertEqual(set(levels), {0, 1, 2, 3, 4}, "Capped levels.")
+        levels = sl.LevelGenerator(seed=2).levels(sl._LEVEL_BATCH + 5)
+        self.assertEqual(len(levels), sl._LEVEL_BATCH + 5, "Several calls.")
+        levels = sl.LevelGenerator(p=0.9, max_level=3, seed=1)
+        a = m.MultiSet.from_iterable([i // 3 for i in range(600)],
+                                     compressed=True, levels=levels)
+        self.assertEqual(a.slist.get_height() <= 3, True, "Height is capped.")
+        self.assertEqual(a.count(7), 3, "Runs are kept.")
+        self.assertEqual(a[301], 100, "Widths span the runs.")
+
+    def test_levels_bad_probability(self):
+        self.assertRaises(ValueError, sl.LevelGenerator, 1.5)
+
+    def test_finger_sequential_inserts(self):
+        a = m.MultiSet()
+        finger = a.slist.finger()
+        for i in range(300):
+            finger.insert(i)
+        finger.insert(5)
+        self.assertEqual(len(a), 301, "Length should be 301.")
+        self.assertEqual(a.count(5), 2, "2 occurences of 5.")
+        self.assertEqual(finger.search(299), True, "299 is in multiset.")
+        self.assertEqual(finger.search(300), False, "300 is not in multiset.")
+
+    def test_finger_after_outside_changes(self):
+        a = m.MultiSet(*range(50))
+        finger = a.slist.finger()
+        finger.search(25)
+        a.remove(24)
+        a.insert(100)
+        finger.remove(23)
+        self.assertEqual(finger.search(24), False, "24 was removed.")
+        self.assertEqual(finger.search(100), True, "100 was inserted.")
+        self.assertEqual(a[23], 25, "23 and 24 are gone.")
+
+    def test_stats_counts_operations(self):
+        a = m.MultiSet(*range(100))
+        seen = []
+        stats = a.slist.enable_stats(lambda op, t: seen.append(op))
+        a.insert(50)
+        self.assertEqual(50 in a, True, "50 is in multiset.")
+        self.assertEqual(a.count(50), 2, "2 occurences of 50.")
+        a.remove(50)
+        report = stats.report()
+        self.assertEqual(seen, ['insert', 'search', 'count', 'remove'],
+                         "Callback sees every outermost operation.")
+        self.assertEqual(report['operations']['count']['calls'], 1,
+                         "count was called once.")
+        self.assertEqual(report['operations']['rank']['calls'], 0,
+                         "Nested rank calls are not recorded.")
+        self.assertEqual(report['operations']['insert']['hops'] > 0, True,
+                         "insert hops over nodes.")
+        self.assertEqual(report['operations']['search']['comparisons'] > 0,
+                         True, "search compares values.")
+        self.assertEqual(sum(report['levels'].values()), 100,
+                         "Histogram covers every node.")
+        self.assertEqual(report['height'], a.slist.get_height(),
+                         "Report has the current height.")
+
+    def test_stats_disable(self):
+        a = m.MultiSet(*range(10))
+        stats = a.slist.enable_stats()
+        a.slist.disable_stats()
+        a.insert(3)
+        self.assertEqual(a.count(3), 2, "2 occurences of 3.")
+        self.assertEqual(stats.operations['insert']['calls'], 0,
+                         "Nothing is counted after disable_stats.")
+        self.assertEqual('insert' in a.slist.__dict__, False,
+                         "Plain methods are back.")
+
+    def test_stats_compressed(self):
+        a = m.MultiSet(1, 1, 2, 3, 3, 3, compressed=True)
+        stats = a.slist.enable_stats()
+        a.insert(3)
+        self.assertEqual(a.count(3), 4, "4 occurences of 3.")
+        self.assertEqual(a.rank(3), 3, "3 values below 3.")
+        self.assertEqual(stats.operations['rank']['calls'], 1,
+                         "rank was called once.")
+
+    def test_dump_load(self):
+        a = m.MultiSet(*([3] * 5 + list(range(1000))))
+        f = io.BytesIO()
+        a.dump(f)
+        f.seek(0)
+        b = m.MultiSet.load(f)
+        self.assertEqual(b == a, True, "Loaded multiset equals dumped one.")
+        self.assertEqual(b.count(3), 6, "6 occurences of 3.")
+        self.assertEqual(b.compressed, False, "Storage mode is kept.")
+
+    def test_dump_load_compressed(self):
+        a = m.MultiSet(*([7] * 100), compressed=True)
+        a.insert(1)
+        f = io.BytesIO()
+        a.dump(f)
+        f.seek(0)
+        b = m.MultiSet.load(f)
+        self.assertEqual(b.compressed, True, "Storage mode is kept.")
+        self.assertEqual(list(b), [1] + [7] * 100, "Elements are kept.")
+
+    def test_dump_load_modes(self):
+        for mode in ({'lazy': True}, {'hashed': True},
+                     {'lazy': True, 'hashed': True}):
+            a = m.MultiSet(3, 1, 3, **mode)
+            a.remove(1)
+            f = io.BytesIO()
+            a.dump(f)
+            f.seek(0)
+            b = m.MultiSet.load(f)
+            self.assertEqual(b.lazy, a.lazy, "Lazy mode is kept.")
+            self.assertEqual(b.hashed, a.hashed, "Hashed mode is kept.")
+            self.assertEqual(b.compressed, a.compressed, "Mode is kept.")
+            self.assertEqual(list(b), [3, 3], "Elements are kept.")
+            self.assertEqual(b.count(3), 2, "2 occurences of 3.")
+
+    def test_runs_round_trip(self):
+        a = m.MultiSet.from_runs([5], [1000000], compressed=True)
+        f = io.BytesIO()
+        a.dump(f)
+        f.seek(0)
+        b = m.MultiSet.load(f)
+        self.assertEqual(b.count(5), 1000000, "Runs are kept.")
+        self.assertEqual(b.slist.head_node.forward[0].forward[0] is
+                         b.slist.tail_node, True, "One node holds the run.")
+        data = pickle.dumps(a)
+        self.assertEqual(len(data) < 200, True, "Pickle stores the runs.")
+        self.assertEqual(pickle.loads(data).count(5), 1000000,
+                         "Unpickled runs.")
+        c = m.MultiSet.from_runs([1, 4], [2, 3])
+        self.assertEqual(list(c), [1, 1, 4, 4, 4], "Plain runs expand.")
+        self.assertEqual(c.rank(4), 2, "Rank of 4 should be 2.")
+
+    def test_load_bad_file(self):
+        self.assertRaises(ValueError, m.MultiSet.load, io.BytesIO(b'nope'))
+        f = io.BytesIO()
+        m.MultiSet(1, 2).dump(f)
+        truncated = io.BytesIO(f.getvalue()[:-2])
+        self.assertRaises(ValueError, m.MultiSet.load, truncated)
+
+    def test_pickle_large(self):
+        a = m.MultiSet.from_iterable(range(100000))
+        b = pickle.loads(pickle.dumps(a))
+        self.assertEqual(len(b), 100000, "Length should be 100000.")
+        self.assertEqual(b == a, True, "Unpickled multiset equals original.")
+        c = copy.deepcopy(m.MultiSet(1, 1, 2, compressed=True))
+        self.assertEqual(list(c), [1, 1, 2], "Deep copy keeps elements.")
+        self.assertEqual(c.compressed, True, "Deep copy keeps the mode.")
+
+    def test_insert_many(self):
+        a = m.MultiSet(*range(0, 1000, 2))
+        a.insert_many([7, 3, 3, 999])
+        self.assertEqual(len(a), 504, "Length should be 504.")
+        self.assertEqual(a.count(3), 2, "2 occurences of 3.")
+        self.assertEqual(a[502], 998, "Index 502 holds 998.")
+        a.insert_many(range(1000))
+        self.assertEqual(a.count(4), 2, "Large batch is merged in.")
+        self.assertEqual(list(a), sorted(a), "Elements in order.")
+
+    def test_remove_many(self):
+        a = m.MultiSet(1, 1, 2, 5, 9, compressed=True)
+        a.remove_many([9, 1, 4])
+        self.assertEqual(list(a), [1, 2, 5], "One occurence each removed.")
+        b = m.MultiSet(*range(1000))
+        b.remove_many(range(0, 1000, 3))
+        self.assertEqual(list(b), [i for i in range(1000) if i % 3],
+                         "Large batch is merged out.")
+        b.remove_many([998, 1, 1])
+        self.assertEqual(b[0], 2, "1 was removed once.")
+        self.assertEqual(998 in b, False, "998 was removed.")
+
+    def test_contains_many(self):
+        a = m.MultiSet(*range(0, 100, 5))
+        self.assertEqual(a.contains_many([50, 3, 0, 95, 100, 50]),
+                         [True, False, True, True, False, True],
+                         "Answers come back in the order asked.")
+
+    def test_render_truncated(self):
+        a = m.MultiSet.from_iterable(range(5000))
+        out = io.StringIO()
+        a.render(out, 3)
+        self.assertEqual(out.getvalue(), "MultiSet([0, 1, 2, ...(4997 more)])",
+                         "Only 3 elements are written.")
+        self.assertEqual(repr(a).endswith("999, ...(4000 more)])"), True,
+                         "repr is bounded.")
+        out = io.StringIO()
+        m.MultiSet(1, 2).render(out, 0)
+        self.assertEqual(out.getvalue(), "MultiSet([...(2 more)])",
+                         "Nothing but the count is written.")
+
+    def test_render_chunks(self):
+        a = m.MultiSet.from_iterable(range(3000))
+        out = io.StringIO()
+        a.render(out)
+        self.assertEqual(out.getvalue(), "MultiSet([" +
+                         ", ".join(str(i) for i in range(3000)) + "])",
+                         "Chunks are joined seamlessly.")
+        out = io.StringIO()
+        a.slist.render(out, levels=True)
+        self.assertEqual(out.getvalue(), str(a.slist), "Same as str.")
+
+    def test_render_levels(self):
+        a = m.MultiSet(3, 1, 2, 2, compressed=True,
+                       levels=sl.LevelGenerator(max_level=0))
+        out = io.StringIO()
+        a.render(out, 2, levels=True)
+        self.assertEqual(out.getvalue(),
+                         "head -> 1 -> 2 -> ...(1 more) -> tail",
+                         "Level is cut after 2 nodes.")
+
+    def test_snapshot_is_stable(self):
+        a = m.MultiSet(*range(10))
+        snap = a.snapshot()
+        a.insert(3)
+        a.remove(0)
+        a.insert_many([20, 21])
+        self.assertEqual(list(snap), list(range(10)), "Snapshot unchanged.")
+        self.assertEqual(a.count(3), 2, "MultiSet changed.")
+        self.assertEqual(snap.count(3), 1, "Snapshot has one 3.")
+        snap2 = a.snapshot()
+        a -= m.MultiSet(*range(10))
+        a.clear()
+        self.assertEqual(len(snap2), 12, "Second snapshot unchanged.")
+        self.assertEqual(snap2[11], 21, "Index 11 holds 21.")
+
+    def test_snapshot_shares_until_write(self):
+        a = m.MultiSet(1, 2, 2, compressed=True)
+        snap = a.snapshot()
+        self.assertEqual(snap.slist is a.slist, True, "Structure is shared.")
+        self.assertEqual(snap.snapshot() is snap, True, "Snapshot is its own.")
+        a.remove(7)
+        self.assertEqual(snap.slist is a.slist, True, "No copy for nothing.")
+        a.insert(2)
+        self.assertEqual(snap.slist is a.slist, False, "Copied on write.")
+        self.assertEqual(list(snap), [1, 2, 2], "Snapshot unchanged.")
+        slist = a.slist
+        del snap
+        b = a.snapshot()
+        del b
+        a.insert(5)
+        self.assertEqual(a.slist is slist, True, "No copy without readers.")
+
+    def test_snapshot_copies_runs(self):
+        a = m.MultiSet(*([4] * 50 + [6, 6]), lazy=True)
+        a.remove(6)
+        a.remove(6)
+        snap = a.snapshot()
+        a.insert(5)
+        self.assertEqual(a.slist.compact(0), 0, "Copy drops tombstones.")
+        self.assertEqual(a.count(4), 50, "Runs are copied.")
+        self.assertEqual(list(snap), [4] * 50, "Snapshot unchanged.")
+        self.assertEqual(a.rank(6), 51, "Widths span the runs.")
+
+    def test_snapshot_read_only(self):
+        snap = m.MultiSet(1, 2).snapshot()
+        self.assertRaises(TypeError, snap.insert, 3)
+        self.assertRaises(TypeError, snap.remove, 1)
+        self.assertRaises(TypeError, snap.clear)
+        with self.assertRaises(TypeError):
+            snap += m.MultiSet(1)
+        union = snap + m.MultiSet(3)
+        union.insert(4)
+        self.assertEqual(list(union), [1, 2, 3, 4], "Algebra gives MultiSets.")
+        self.assertEqual(list(pickle.loads(pickle.dumps(snap))), [1, 2],
+                         "Snapshots can be pickled.")
+
+    def test_lazy_against_list(self):
+        rand = random.Random(4)
+        a = m.MultiSet(lazy=True, levels=sl.LevelGenerator(seed=4))
+        expected = []
+        for i in range(2000):
+            value = rand.randrange(60)
+            if rand.random() < 0.5:
+                a.insert(value)
+                expected.append(value)
+            else:
+                a.remove(value)
+                if value in expected:
+                    expected.remove(value)
+            if i % 500 == 0:
+                a.compact(10)
+        expected.sort()
+        self.assertEqual(list(a), expected, "Elements in order.")
+        self.assertEqual(list(reversed(a)), expected[::-1], "Reversed.")
+        self.assertEqual([a[i] for i in range(len(a))], expected,
+                         "Indexing skips tombstones.")
+        for value in range(60):
+            self.assertEqual(value in a, value in expected, "Membership.")
+            self.assertEqual(a.rank(value), bisect.bisect_left(expected,
+                                                               value),
+                             "Ranks agree.")
+        self.assertEqual(a.contains_many(range(60)),
+                         [i in expected for i in range(60)], "Batch.")
+        a.compact()
+        self.assertEqual(list(a), expected, "Compaction keeps elements.")
+        self.assertEqual(a.slist.compact(), 0, "No tombstones left.")
+
+    def test_lazy_compaction_during_sweep(self):
+        expected = list(range(55, 100))
+        for seed in range(20):
+            a = m.MultiSet.from_iterable(range(100), lazy=True,
+                                         levels=sl.LevelGenerator(seed=seed))
+            a.remove_many(range(40))
+            a -= m.MultiSet(*range(40, 55))
+            self.assertEqual([a[i] for i in range(len(a))], expected,
+                             "Widths survive compaction.")
+            self.assertEqual(a.rank(60), 5, "Rank of 60 should be 5.")
+            self.assertEqual(len(a.slist._dead) < 55, True, "Compacted.")
+
+    def test_lazy_tombstones(self):
+        a = m.MultiSet(1, 2, 2, 3, lazy=True)
+        a.remove(2)
+        a.remove(2)
+        a.remove(2)
+        self.assertEqual(2 in a, False, "2 was removed.")
+        self.assertEqual(a.count(2), 0, "No occurences of 2.")
+        self.assertEqual(len(a), 2, "Length should be 2.")
+        self.assertEqual(a.slist.compact(0), 1, "One tombstone waits.")
+        a.insert(2)
+        self.assertEqual(a[1], 2, "Tombstone is revived.")
+        self.assertEqual(a.slist.compact(), 0, "Revived node is kept.")
+        self.assertEqual(list(a), [1, 2, 3], "Elements in order.")
+        for value in (1, 2, 3):
+            a.remove(value)
+        self.assertEqual(a.slist.compact(), 0, "Removes compacted.")
+        self.assertEqual(a.slist.head_node.forward[0] is a.slist.tail_node,
+                         True, "Every node is unlinked.")
+        self.assertEqual((a + m.MultiSet(5)).lazy, True, "Mode is kept.")
+
+    def test_hashed_against_list(self):
+        rand = random.Random(9)
+        a = m.MultiSet(3, 3, 5, hashed=True)
+        expected = [3, 3, 5]
+        for i in range(2000):
+            value = rand.randrange(40)
+            if rand.random() < 0.55:
+                a.insert(value)
+                expected.append(value)
+            else:
+                a.remove(value)
+                if value in expected:
+                    expected.remove(value)
+        batch = [rand.randrange(50) for i in range(30)]
+        a.insert_many(batch)
+        expected += batch
+        batch = [rand.randrange(50) for i in range(30)]
+        a.remove_many(batch)
+        for value in batch:
+            if value in expected:
+                expected.remove(value)
+        a += m.MultiSet(*range(45))
+        expected += range(45)
+        a -= m.MultiSet(*range(0, 45, 3))
+        for value in range(0, 45, 3):
+            expected.remove(value)
+        expected.sort()
+        self.assertEqual(list(a), expected, "Elements in order.")
+        for value in range(60):
+            self.assertEqual(a.count(value), expected.count(value),
+                             "Counts agree.")
+            self.assertEqual(value in a, value in expected, "Membership.")
+        self.assertEqual(a.contains_many(range(60)),
+                         [i in expected for i in range(60)], "Batch.")
+        a &= m.MultiSet(*range(10))
+        self.assertEqual(a._counts, {value: 1 for value in range(10)
+                                     if value in expected},
+                         "Counts rebuilt by &=.")
+        a.clear()
+        self.assertEqual(a.count(1), 0, "Cleared counts.")
+
+    def test_hashed_rejected_inserts(self):
+        a = m.MultiSet(1, 2, hashed=True)
+        self.assertRaises(TypeError, a.insert, 'x')
+        self.assertEqual('x' in a, False, "'x' was not inserted.")
+        self.assertEqual(a.count('x'), 0, "No occurences of 'x'.")
+        self.assertRaises(TypeError, a.insert, [3])
+        self.assertEqual(list(a), [1, 2], "Elements unchanged.")
+        a.insert_many(range(10, 20))
+        self.assertRaises(TypeError, a.insert_many, ['x'])
+        self.assertRaises(TypeError, a.insert_many, [[3]])
+        self.assertEqual(a.contains_many(['x', 1, 15]), [False, True, True],
+                         "Batch membership.")
+        self.assertEqual(a._counts, {value: 1 for value in a},
+                         "Counts match the skiplist.")
+
+    def test_hashed_snapshot_and_pickle(self):
+        a = m.MultiSet(1, 2, 2, hashed=True)
+        snap = a.snapshot()
+        a.remove(2)
+        a.insert(4)
+        self.assertEqual(snap.count(2), 2, "Snapshot counts are stable.")
+        self.assertEqual(4 in snap, False, "Snapshot misses the insert.")
+        self.assertEqual(a.count(2), 1, "One 2 left.")
+        b = pickle.loads(pickle.dumps(a))
+        self.assertEqual(b.hashed, True, "Mode survives pickling.")
+        self.assertEqual(b.count(4), 1, "Counts rebuilt on load.")
+        self.assertEqual((a + b).count(2), 2, "Mode is kept.")
+
 unittest.main(exit=False)
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+import multiset as m
+import multiset_server as ms
+
+
+class TestMultiSetServer(unittest.TestCase):
+
+    def run_with_server(self, test, path=None):
+        async def run():
+            server = ms.MultiSetServer(m.MultiSet(3, 1, 2))
+            await server.start(path)
+            if path is None:
+                host, port = server.address[:2]
+                client = await ms.MultiSetClient.connect(host=host, port=port)
+            else:
+                client = await ms.MultiSetClient.connect(path)
+            try:
+                await test(server, client)
+            finally:
+                await client.close()
+                await server.close()
+        asyncio.run(run())
+
+    def test_operations(self):
+        async def test(server, client):
+            await client.insert(2)
+            await client.remove(3)
+            self.assertEqual(await client.count(2), 2, "2 occurences of 2.")
+            self.assertEqual(await client.contains(3), False,
+                             "3 was removed.")
+            self.assertEqual(await client.rank(2), 1, "1 element below 2.")
+            self.assertEqual(await client.get(-1), 2, "Last element is 2.")
+            self.assertEqual(await client.len(), 3, "Length should be 3.")
+            self.assertEqual(await client.irange(2, None), [2, 2],
+                             "Range from 2.")
+            self.assertEqual(await client.count_range(1, 2), 3,
+                             "3 elements in [1, 2].")
+            self.assertEqual(list(server.multiset), [1, 2, 2],
+                             "Server holds the MultiSet.")
+        self.run_with_server(test)
+
+    def test_pipelined_batches(self):
+        async def test(server, client):
+            calls = [client.insert_many(range(i * 100, i * 100 + 100))
+                     for i in range(10)]
+            calls.append(client.len())
+            results = await asyncio.gather(*calls)
+            self.assertEqual(results[-1], 1003, "Frames apply in order.")
+            self.assertEqual(await client.contains_many([5, 1000, 999]),
+                             [True, False, True], "Batch membership.")
+            results = await client.execute([(ms.INSERT, 7), (ms.INSERT, 7),
+                                             (ms.COUNT, 7), (ms.REMOVE, 7),
+                                             (ms.COUNT, 7)])
+            self.assertEqual(results[2], 3, "Writes before reads apply.")
+            self.assertEqual(results[4], 2, "Frame applies in order.")
+        self.run_with_server(test)
+
+    def test_errors(self):
+        async def test(server, client):
+            with self.assertRaises(IndexError):
+                await client.get(100)
+            with self.assertRaises(ValueError):
+                await client.execute([('?',)])
+            self.assertEqual(await client.len(), 3,
+                             "Connection survives errors.")
+        self.run_with_server(test)
+
+    def test_bad_operations(self):
+        async def test(server, client):
+            with self.assertRaises(TypeError):
+                await client.execute([()])
+            with self.assertRaises(IndexError):
+                await client.execute([(ms.INSERT,)])
+            results, errors = server.apply([(ms.LEN,), 5, (ms.COUNT, 1)])
+            self.assertEqual(results, [3, None, 1],
+                             "Good operations still apply.")
+            self.assertEqual(list(errors), [1], "Bad one fails by position.")
+            self.assertEqual(server.apply({})[1][0][0], 'TypeError',
+                             "A frame must hold a list.")
+            self.assertEqual(await client.len(), 3,
+                             "Connection survives bad frames.")
+        self.run_with_server(test)
+
+    def test_closed_connection(self):
+        async def test(server, client):
+            # the server drops a client sending an oversized frame
+            client._writer.write(ms._LENGTH.pack(ms.MAX_FRAME + 1))
+            await client._task
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(client.len(), 5)
+        self.run_with_server(test)
+
+    def test_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        try:
+            async def test(server, client):
+                await client.insert(10)
+                self.assertEqual(await client.get(3), 10, "Index 3 is 10.")
+            self.run_with_server(test, os.path.join(directory, 'sock'))
+        finally:
+            shutil.rmtree(directory)
+
+unittest.main(exit=False)
@@ -0,0 +1,102 @@
+import random
+import unittest
+
+try:
+    import numpy as np
+    import numeric_multiset as nm
+except ImportError:
+    nm = None
+
+
+@unittest.skipIf(nm is None, 'numpy is not installed')
+class TestNumericMultiSet(unittest.TestCase):
+
+    def test_insert_remove_count(self):
+        a = nm.NumericMultiSet([5, 1, 3], block_size=2)
+        for i in (3, 3, 9, 0):
+            a.insert(i)
+        a.remove(1)
+        a.remove(4)
+        self.assertEqual(list(a), [0, 3, 3, 3, 5, 9], "Elements in order.")
+        self.assertEqual(len(a), 6, "Length should be 6.")
+        self.assertEqual(a.count(3), 3, "3 occurences of 3.")
+        self.assertEqual(1 in a, False, "1 was removed.")
+        self.assertEqual(9 in a, True, "9 is in multiset.")
+
+    def test_runs_across_blocks(self):
+        a = nm.NumericMultiSet([2] * 10 + [1, 3], block_size=3)
+        self.assertEqual(a.count(2), 10, "10 occurences of 2.")
+        self.assertEqual(list(a.count_many([2, 1, 4, 3])), [10, 1, 0, 1],
+                         "Batch counts span blocks.")
+        for i in range(10):
+            a.remove(2)
+        self.assertEqual(list(a), [1, 3], "Every 2 was removed.")
+
+    def test_batches_against_list(self):
+        rand = random.Random(5)
+        keys = [rand.randrange(500) for i in range(2000)]
+        a = nm.NumericMultiSet(keys[:700], block_size=16)
+        a.insert_many(np.array(keys[700:]))
+        keys.sort()
+        self.assertEqual(list(a), keys, "Batch insert keeps order.")
+        self.assertEqual(list(a.to_array()), keys, "Array matches.")
+        probes = [rand.randrange(-10, 510) for i in range(300)]
+        self.assertEqual(list(a.count_many(probes)),
+                         [keys.count(p) for p in probes], "Counts agree.")
+        self.assertEqual(list(a.contains_many(probes)),
+                         [p in keys for p in probes], "Membership agrees.")
+
+    def test_smaller_key_before_spread_run(self):
+        a = nm.NumericMultiSet([1, 2, 2, 2, 2, 2], block_size=3)
+        a.insert(0)
+        self.assertEqual(list(a), [0, 1, 2, 2, 2, 2, 2], "Blocks in order.")
+        self.assertEqual(0 in a, True, "0 is in multiset.")
+        self.assertEqual(a.count(0), 1, "1 occurence of 0.")
+        b = nm.NumericMultiSet([1, 2, 2, 2, 2, 2], block_size=3)
+        b.insert_many([0])
+        self.assertEqual(list(b.count_many([0, 2])), [1, 5], "Batch counts.")
+        rand = random.Random(6)
+        c = nm.NumericMultiSet(block_size=2)
+        keys = []
+        for i in range(600):
+            key = rand.randrange(4)
+            if rand.random() < 0.7:
+                c.insert(key)
+                keys.append(key)
+            else:
+                c.remove(key)
+                if key in keys:
+                    keys.remove(key)
+        keys.sort()
+        self.assertEqual(list(c), keys, "Few keys over many blocks.")
+        self.assertEqual(list(c.count_many(range(4))),
+                         [keys.count(k) for k in range(4)], "Counts agree.")
+
+    def test_inexact_probes(self):
+        a = nm.NumericMultiSet([2, 3])
+        self.assertEqual(2.5 in a, False, "2.5 is not in multiset.")
+        self.assertEqual(a.count(2.5), 0, "No occurences of 2.5.")
+        self.assertEqual(2.0 in a, True, "2.0 is exactly 2.")
+        self.assertEqual(list(a.contains_many([2.5, 3, 2 ** 70, -1])),
+                         [False, True, False, False], "Batch membership.")
+        self.assertEqual(list(a.count_many(np.array([2.5, 2.0]))), [0, 1],
+                         "Batch counts.")
+        a.remove(2.5)
+        self.assertEqual(list(a), [2, 3], "Nothing is removed.")
+        self.assertRaises(ValueError, a.insert, 2.5)
+        self.assertRaises(ValueError, a.insert_many, [1, 2 ** 70])
+        b = nm.NumericMultiSet([2 ** 63 - 1], dtype='int64')
+        self.assertEqual(b.count(np.uint64(2 ** 64 - 1)), 0,
+                         "Wrapped integers are absent.")
+        self.assertEqual(list(a), [2, 3], "Failed inserts change nothing.")
+
+    def test_float_keys(self):
+        a = nm.NumericMultiSet(dtype='float64')
+        a.insert_many([0.5, 2.5, 0.5])
+        self.assertEqual(a.count(0.5), 2, "2 occurences of 0.5.")
+        self.assertEqual(list(a.contains_many([2.5, 1.0])), [True, False],
+                         "Membership of floats.")
+        self.assertEqual(len(nm.NumericMultiSet().count_many([1])), 1,
+                         "Empty multiset answers batches.")
+
+unittest.main(exit=False)
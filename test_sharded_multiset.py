@@ -0,0 +1,106 @@
+import concurrent.futures
+import random
+import unittest
+import multiset as m
+import sharded_multiset as s
+
+
+class TestShardedMultiSet(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(6)
+        self.keys1 = [rand.randrange(1000) for i in range(3000)]
+        self.keys2 = [rand.randrange(1000) for i in range(2000)]
+
+    def test_bulk_load(self):
+        a = s.ShardedMultiSet.from_iterable(self.keys1, 4, seed=1)
+        self.assertEqual(len(a.shards), 4, "4 shards.")
+        self.assertEqual(list(a), sorted(self.keys1), "Elements in order.")
+        self.assertEqual(a.count(17), self.keys1.count(17), "Counts agree.")
+        self.assertEqual(a[1500], sorted(self.keys1)[1500], "Indexing.")
+        self.assertEqual(a.rank(500), sum(k < 500 for k in self.keys1),
+                         "Ranks agree.")
+        for shard, pivot in zip(a.shards, a.pivots):
+            self.assertEqual(list(shard)[-1] < pivot, True,
+                             "Shards are split at the pivots.")
+
+    def test_algebra_matches_multiset(self):
+        a = s.ShardedMultiSet.from_iterable(self.keys1, 3, seed=1)
+        b = s.ShardedMultiSet.from_iterable(self.keys2, 5, seed=2)
+        a2 = m.MultiSet.from_iterable(self.keys1)
+        b2 = m.MultiSet.from_iterable(self.keys2)
+        self.assertEqual(list(a + b), list(a2 + b2), "Union agrees.")
+        self.assertEqual(list(a - b), list(a2 - b2), "Difference agrees.")
+        self.assertEqual(list(a & b), list(a2 & b2), "Intersection agrees.")
+
+    def test_process_pool(self):
+        with concurrent.futures.ProcessPoolExecutor(2) as pool:
+            a = s.ShardedMultiSet.from_iterable(self.keys1, 4, executor=pool,
+                                                seed=1)
+            b = s.ShardedMultiSet(a.pivots)
+            b.insert_many(self.keys2)
+            c = a.intersection(b, pool)
+        expected = m.MultiSet.from_iterable(self.keys1) & \
+            m.MultiSet.from_iterable(self.keys2)
+        self.assertEqual(list(c), list(expected), "Pool agrees.")
+        self.assertEqual(c.pivots, a.pivots, "Pivots are kept.")
+
+    def test_packed_shards(self):
+        a = s.ShardedMultiSet.from_iterable(self.keys1, 4, seed=1)
+        c = a + a
+        self.assertEqual(all(isinstance(shard, s.PackedShard)
+                             for shard in c.shards), True,
+                         "Algebra attaches the merged lists.")
+        c.remove(-1)
+        self.assertEqual(isinstance(c.shards[0], s.PackedShard), True,
+                         "Removing a missing element changes nothing.")
+        c.insert(0)
+        self.assertEqual(isinstance(c.shards[0], m.MultiSet), True,
+                         "First change makes a MultiSet.")
+        self.assertEqual(isinstance(c.shards[1], s.PackedShard), True,
+                         "Other shards stay packed.")
+        expected = sorted(self.keys1 * 2 + [0])
+        self.assertEqual(list(c), expected, "Elements in order.")
+        self.assertEqual(c.count(0), expected.count(0), "Counts agree.")
+        self.assertEqual(c.rank(600), expected.index(600), "Ranks agree.")
+        self.assertEqual(c[4000], expected[4000], "Indexing.")
+        self.assertEqual(c.contains_many([0, 1000]), [True, False],
+                         "Batch membership.")
+
+    def test_rebalance(self):
+        a = s.ShardedMultiSet.from_iterable(range(100), 4, seed=1)
+        for i in range(5000):
+            a.insert(1000 + i)
+        sizes = [len(shard) for shard in a.shards]
+        self.assertEqual(max(sizes) <= 2 * len(a) / 4 + 1, True,
+                         "Shards were rebalanced.")
+        self.assertEqual(list(a), list(range(100)) +
+                         list(range(1000, 6000)), "Elements in order.")
+
+    def test_rebalance_repeated_element(self):
+        a = s.ShardedMultiSet.from_iterable(range(10000), 8, seed=1)
+        calls = []
+        rebalance = a.rebalance
+
+        def counted():
+            calls.append(len(a))
+            rebalance()
+        a.rebalance = counted
+        for i in range(5000):
+            a.insert(5000)
+        self.assertEqual(len(calls) <= 12, True, "Few rebalances.")
+        self.assertEqual(a.count(5000), 5001, "Every 5000 is kept.")
+        self.assertEqual(len(a), 15000, "Length should be 15000.")
+        self.assertEqual(a[9999], 5000, "Elements in order.")
+
+    def test_lookups(self):
+        a = s.ShardedMultiSet.from_iterable([5, 1, 9, 9, 3], 3, seed=0)
+        self.assertEqual(a.contains_many([9, 2, 1, 10]),
+                         [True, False, True, False], "Batch membership.")
+        a.remove(9)
+        self.assertEqual(a.count(9), 1, "1 occurence of 9.")
+        self.assertEqual(4 in a, False, "4 is not in multiset.")
+        self.assertEqual(s.ShardedMultiSet.from_iterable([], 4).pivots, [],
+                         "Empty input has one shard.")
+
+unittest.main(exit=False)
@@ -0,0 +1,70 @@
+import random
+import unittest
+import skiplist_map as sm
+
+
+class TestSkipListMap(unittest.TestCase):
+
+    def test_set_get_del(self):
+        a = sm.SkipListMap()
+        a['b'] = 2
+        a['a'] = 1
+        a['c'] = 3
+        a['b'] = 20
+        self.assertEqual(a['b'], 20, "Value was replaced.")
+        self.assertEqual(len(a), 3, "Length should be 3.")
+        del a['a']
+        self.assertEqual('a' in a, False, "a was deleted.")
+        self.assertRaises(KeyError, a.__getitem__, 'a')
+        self.assertRaises(KeyError, a.__delitem__, 'z')
+        self.assertEqual(a.get('z', 0), 0, "Default for a missing key.")
+        self.assertEqual(a.pop('c'), 3, "pop returns the value.")
+        self.assertEqual(a.pop('c', None), None, "pop with a default.")
+        self.assertEqual(list(a.items()), [('b', 20)], "One item left.")
+
+    def test_order_and_neighbours(self):
+        a = sm.SkipListMap({5: 'e', 1: 'a', 3: 'c', 9: 'i'})
+        self.assertEqual(list(a), [1, 3, 5, 9], "Keys in order.")
+        self.assertEqual(list(reversed(a)), [9, 5, 3, 1], "Reversed keys.")
+        self.assertEqual(list(a.values()), ['a', 'c', 'e', 'i'],
+                         "Values in key order.")
+        self.assertEqual(a.floor_key(4), 3, "Floor of 4 is 3.")
+        self.assertEqual(a.floor_key(5), 5, "Floor of 5 is 5.")
+        self.assertEqual(a.floor_key(0), None, "Nothing below 1.")
+        self.assertEqual(a.ceiling_key(6), 9, "Ceiling of 6 is 9.")
+        self.assertEqual(a.ceiling_key(10), None, "Nothing above 9.")
+        self.assertEqual(a.index(5), 2, "2 keys below 5.")
+        self.assertEqual(a.peekitem(), (9, 'i'), "Last item.")
+        self.assertEqual(a.peekitem(1), (3, 'c'), "Item at 1.")
+
+    def test_slices(self):
+        a = sm.SkipListMap((i, i * i) for i in range(10))
+        b = a[3:6]
+        self.assertEqual(list(b.items()), [(3, 9), (4, 16), (5, 25)],
+                         "Half open slice.")
+        self.assertEqual(list(a[:2]), [0, 1], "Open start.")
+        self.assertEqual(list(a[8:]), [8, 9], "Open end.")
+        b[4] = 0
+        self.assertEqual(a[4], 16, "Slices are copies.")
+        self.assertEqual(list(a.items(2, 4, (False, True))),
+                         [(3, 9), (4, 16)], "Range with bounds.")
+
+    def test_against_dict(self):
+        rand = random.Random(8)
+        a = sm.SkipListMap([(1, 'x'), (1, 'y')])
+        expected = {1: 'y'}
+        for i in range(3000):
+            key = rand.randrange(300)
+            if rand.random() < 0.6:
+                a[key] = i
+                expected[key] = i
+            elif key in expected:
+                del a[key]
+                del expected[key]
+        self.assertEqual(list(a.items()), sorted(expected.items()),
+                         "Matches a sorted dict.")
+        self.assertEqual(a == sm.SkipListMap(expected), True, "Equal maps.")
+        self.assertEqual(repr(sm.SkipListMap({'k': 1})),
+                         "SkipListMap({'k': 1})", "repr of a map.")
+
+unittest.main(exit=False)
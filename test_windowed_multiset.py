@@ -0,0 +1,56 @@
+import random
+import unittest
+import windowed_multiset as w
+
+
+class TestWindowedMultiSet(unittest.TestCase):
+
+    def test_count_window(self):
+        a = w.WindowedMultiSet(size=3)
+        for i in (5, 1, 9, 7, 3):
+            a.insert(i)
+        self.assertEqual(list(a), [3, 7, 9], "Oldest samples evicted.")
+        self.assertEqual(list(a.arrivals()), [9, 7, 3], "Arrival order.")
+        self.assertEqual(a.min(), 3, "Min should be 3.")
+        self.assertEqual(a.max(), 9, "Max should be 9.")
+        self.assertEqual(a.median(), 7, "Median should be 7.")
+        self.assertEqual(5 in a, False, "5 was evicted.")
+
+    def test_time_window(self):
+        now = [0.0]
+        a = w.WindowedMultiSet(duration=10, clock=lambda: now[0])
+        for i in range(20):
+            now[0] = i
+            a.insert(i)
+        self.assertEqual(list(a), list(range(9, 20)), "Last 10 seconds.")
+        now[0] = 25
+        a.evict()
+        self.assertEqual(list(a), [15, 16, 17, 18, 19], "Evicted by clock.")
+        a.insert(1, timestamp=40)
+        self.assertEqual(list(a), [1], "Evicted by the new timestamp.")
+
+    def test_quantiles_against_sorted(self):
+        rand = random.Random(2)
+        a = w.WindowedMultiSet(size=100)
+        samples = []
+        for i in range(1000):
+            value = rand.randrange(50)
+            a.insert(value)
+            samples.append(value)
+        window = sorted(samples[-100:])
+        self.assertEqual(a.quantile(0.99), window[98], "p99 by rank.")
+        self.assertEqual(a.quantile(0), window[0], "p0 is the min.")
+        self.assertEqual(a.quantile(1), window[99], "p100 is the max.")
+        self.assertEqual(a.median(), window[49], "Lower median.")
+        self.assertEqual(a.count(7), window.count(7), "Counts agree.")
+
+    def test_empty(self):
+        a = w.WindowedMultiSet(size=5)
+        self.assertRaises(ValueError, a.median)
+        self.assertRaises(ValueError, a.min)
+        self.assertRaises(ValueError, a.max)
+        a.insert(1)
+        self.assertRaises(ValueError, a.quantile, 1.5)
+        self.assertRaises(ValueError, w.WindowedMultiSet, 0)
+
+unittest.main(exit=False)
@@ -0,0 +1,154 @@
+import collections
+import math
+import time
+import skiplist as sl
+
+
+class WindowedMultiSet():
+    '''
+    A multiset over the most recent samples of a stream. Samples are kept
+    in a skiplist for order statistics and in a queue in arrival order, so
+    the oldest ones are evicted once there are more than size of them or
+    once they are older than duration. Quantiles are found by index in
+    O(log n), the minimum and maximum in O(1).
+    REQ: Data types are comparable
+    '''
+
+    def __init__(self, size=None, duration=None, clock=time.monotonic,
+                 levels=None):
+        '''
+        (WindowedMultiSet, int, float, function, sl.LevelGenerator)
+        -> NoneType
+        Initializes an empty window holding at most size samples, none of
+        them older than duration, as measured by clock. Either bound may be
+        None. levels draws the tower heights of the skiplist, see
+        sl.LevelGenerator.
+        '''
+        if size is not None and size < 1:
+            raise ValueError('size must be positive')
+        if duration is not None and duration < 0:
+            raise ValueError('duration must not be negative')
+        self.size = size
+        self.duration = duration
+        self.clock = clock
+        self.slist = sl.Skiplist(levels=levels)
+        # (timestamp, value) of every sample, oldest first
+        self._arrivals = collections.deque()
+
+    def insert(self, value, timestamp=None):
+        '''
+        (WindowedMultiSet, obj, float) -> NoneType
+        adds a sample taken at timestamp, now by clock if None, and evicts
+        the samples that fall out of the window.
+        REQ: timestamps are not decreasing
+        '''
+        if timestamp is None:
+            timestamp = self.clock()
+        self._arrivals.append((timestamp, value))
+        self.slist.insert(value)
+        self.evict(timestamp)
+
+    def evict(self, now=None):
+        '''
+        (WindowedMultiSet, float) -> NoneType
+        removes the oldest samples until there are at most size of them and
+        none is older than duration at time now, by clock if None.
+        '''
+        arrivals = self._arrivals
+        if self.size is not None:
+            while len(arrivals) > self.size:
+                self.slist.remove(arrivals.popleft()[1])
+        if self.duration is not None:
+            if now is None:
+                now = self.clock()
+            oldest = now - self.duration
+            while arrivals and arrivals[0][0] < oldest:
+                self.slist.remove(arrivals.popleft()[1])
+
+    def quantile(self, q):
+        '''
+        (WindowedMultiSet, float) -> obj
+        Returns the sample at quantile q of the window, by nearest rank: the
+        smallest sample with at least a q share of the window at or below
+        it. Expired samples are only dropped by insert and evict.
+        Raises ValueError if the window is empty or q is not in [0, 1].
+        '''
+        if not 0 <= q <= 1:
+            raise ValueError('quantile must be between 0 and 1')
+        n = len(self.slist)
+        if not n:
+            raise ValueError('quantile of an empty window')
+        return self.slist[max(math.ceil(q * n) - 1, 0)]
+
+    def median(self):
+        '''
+        (WindowedMultiSet) -> obj
+        Returns the lower median of the window.
+        Raises ValueError if the window is empty.
+        '''
+        return self.quantile(0.5)
+
+    def min(self):
+        '''
+        (WindowedMultiSet) -> obj
+        Returns the smallest sample of the window.
+        Raises ValueError if the window is empty.
+        '''
+        if self.slist.is_empty():
+            raise ValueError('min of an empty window')
+        return self.slist.head_node.forward[0].data
+
+    def max(self):
+        '''
+        (WindowedMultiSet) -> obj
+        Returns the largest sample of the window.
+        Raises ValueError if the window is empty.
+        '''
+        if self.slist.is_empty():
+            raise ValueError('max of an empty window')
+        return self.slist.tail_node.backward.data
+
+    def arrivals(self):
+        '''
+        (WindowedMultiSet) -> iterator
+        Yields the samples of the window in the order they arrived.
+        '''
+        for timestamp, value in self._arrivals:
+            yield value
+
+    def __contains__(self, value):
+        '''
+        (WindowedMultiSet, obj) -> bool
+        returns True if and only if value is a sample of the window.
+        uses in
+        '''
+        return self.slist.search(value)
+
+    def count(self, value):
+        '''
+        (WindowedMultiSet, obj) -> int
+        Returns the number of samples of the window equal to value.
+        '''
+        return self.slist.count(value)
+
+    def rank(self, value):
+        '''
+        (WindowedMultiSet, obj) -> int
+        Returns the number of samples of the window smaller than value.
+        '''
+        return self.slist.rank(value)
+
+    def __len__(self):
+        '''
+        (WindowedMultiSet) -> int
+        returns the number of samples in the window.
+        uses len()
+        '''
+        return len(self.slist)
+
+    def __iter__(self):
+        '''
+        (WindowedMultiSet) -> iterator
+        Yields the samples of the window in ascending order.
+        '''
+        return iter(self.slist)